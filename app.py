@@ -1,9 +1,30 @@
 import sqlite3
 import json
 import requests
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 import os
+import threading
+import time
+from datetime import date, datetime, timezone
+
+from db import ConnectionPool
+from catalog import get_catalog
+from page_cache import CachedPage
+from students import get_student_id, forget_student
+from update_students import update_database_with_students
+from update_indexes import update_indexes
+from ollama_client import generate, stream_generate
+from llm_cache import ResponseCache, make_cache_key
+from jobs import JobQueue
+from metrics import Metrics, InstrumentedConnection, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from sqltrace import TRACE_ENABLED, TracedConnection
+from data_versions import read_data_versions, update_data_versions
+from change_log import PRUNE_EVERY, ChangeFeed, prune_changes, update_change_log
+from reward_stats import read_reward_stats, update_reward_rollups
+from search import SEARCH_LIMIT, search_words, update_search_index
+from lemmas import update_word_forms
+from writer import GroupCommitWriter
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -12,14 +33,102 @@ DATABASE = 'pathway.db'
 OLLAMA_URL = 'http://localhost:11434/api/generate'  # Default Ollama API endpoint
 OLLAMA_MODEL = 'qwen2.5'  # Changed to qwen2.5 model
 
+# Long-lived connections shared across requests (WAL mode, tuned pragmas);
+# their cursors count SQL statements, time and rows for /metrics, and with
+# PATHWAY_SQL_TRACE=1 also log slow statements (see sqltrace.py)
+db_pool = ConnectionPool(DATABASE, factory=TracedConnection if TRACE_ENABLED else InstrumentedConnection)
+
+# The page is static, so it is read and compressed once and revalidated with its ETag
+index_page = CachedPage('pathway.html')
+PAGE_CACHE_CONTROL = 'no-cache'
+
+# The full word catalog for /api/catalog, rebuilt when the catalog's content hash changes
+catalog_body = CachedPage(None, content_type='application/json')
+
+# Generated stories and questions, reused while the learning list stays the same
+llm_cache = ResponseCache()
+
+# Background generations; also limits how many requests reach Ollama at once
+generation_jobs = JobQueue()
+JOB_WAIT_LIMIT = 30  # Longest a poll may wait for a job to finish, in seconds
+
+# Per-route request, SQL and Ollama metrics, served in Prometheus format at /metrics
+metrics = Metrics()
+metrics.add_gauges('pathway_db_pool_connections', 'Pooled SQLite connections by state.',
+                   lambda: {(('state', state),): db_pool.stats()[state] for state in ('idle', 'in_use')})
+metrics.add_gauges('pathway_generation_jobs', 'Generation jobs by state.',
+                   lambda: {(('state', state),): generation_jobs.stats()[key] for state, key in (('queued', 'queue_depth'), ('running', 'running'))})
+
+# Status toggles and deletes arrive in bursts; one thread applies them and commits each burst together,
+# answering every request only once its write is on disk. It also trims the change log every PRUNE_EVERY writes
+writer = GroupCommitWriter(DATABASE, factory=TracedConnection if TRACE_ENABLED else InstrumentedConnection,
+                           observe=metrics.observe_write_batch, housekeeping=prune_changes,
+                           housekeeping_every=PRUNE_EVERY)
+
+# Every change to a student's rows, served to other tabs and teachers by long polling
+change_feed = ChangeFeed(lambda: db_pool.connection())
+CHANGE_WAIT_LIMIT = 30  # Longest a change poll may wait, in seconds
+WRITE_METHODS = ('POST', 'PATCH', 'DELETE')
+
+# Set once create_app has prepared the database and caches; cleared when shutdown begins
+ready = threading.Event()
+
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get the connection bound to the current app context, taking one from the pool if needed."""
+    if 'db_conn' not in g:
+        g.db_conn = db_pool.acquire()
+    return g.db_conn
+
+def get_word_catalog():
+    """Get the in-memory copy of the Words table."""
+    return get_catalog(DATABASE)
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    metrics.start_request()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        metrics.finish_request(route, request.method, response.status_code, time.perf_counter() - started)
+    return response
+
+@app.after_request
+def notify_change_feed(response):
+    # The triggers have already logged whatever this request changed; wake the waiting pollers
+    if request.method in WRITE_METHODS:
+        change_feed.notify()
+    return response
+
+@app.teardown_appcontext
+def release_db_connection(exception):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        db_pool.release(conn)
 
 @app.route('/')
 def index():
-    return render_template_string(open('pathway.html').read())
+    # In debug mode pick up edits to pathway.html without restarting
+    if index_page.etag is None or app.debug:
+        index_page.refresh()
+    
+    encoding = index_page.choose_encoding(request.headers.get('Accept-Encoding'))
+    headers = {
+        'ETag': index_page.etag_for(encoding),
+        'Cache-Control': PAGE_CACHE_CONTROL,
+        'Vary': 'Accept-Encoding'
+    }
+    
+    if index_page.matches(request.headers.get('If-None-Match')):
+        return '', 304, headers
+    
+    response = app.response_class(index_page.variants[encoding], content_type=index_page.content_type, headers=headers)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    return response
 
 @app.route('/api/student', methods=['POST'])
 def set_student():
@@ -36,53 +145,99 @@ def get_words_by_step_level(step, level):
     if not (1 <= step <= 28) or not (1 <= level <= 5):
         return jsonify({'error': 'Invalid step or level'}), 400
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT id, word FROM Words 
-        WHERE step = ? AND level = ? 
-        ORDER BY rank
-    """, (step, level))
-    
-    words = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    words = [{'id': word_id, 'word': word} for word_id, word in get_word_catalog().words_for(step, level)]
     
     return jsonify({'words': words})
 
-@app.route('/api/student/<student_name>/learning_words', methods=['GET'])
-def get_learning_words(student_name):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+@app.route('/api/catalog')
+def get_catalog_snapshot():
+    catalog = get_word_catalog()
+    # Serialized and compressed once per catalog; the page keeps its copy until the hash changes
+    if catalog_body.etag != catalog.hash:
+        catalog_body.set_content(json.dumps(catalog.compact(), separators=(',', ':')).encode(), etag=catalog.hash)
+    
+    encoding = catalog_body.choose_encoding(request.headers.get('Accept-Encoding'))
+    headers = {
+        'ETag': catalog_body.etag_for(encoding),
+        'Cache-Control': PAGE_CACHE_CONTROL,
+        'Vary': 'Accept-Encoding'
+    }
     
-    # Get regular learning words
+    if catalog_body.matches(request.headers.get('If-None-Match')):
+        return '', 304, headers
+    
+    response = app.response_class(catalog_body.variants[encoding], content_type=catalog_body.content_type, headers=headers)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+# Per-student GETs are revalidated with an ETag built from the student's data version
+DATA_CACHE_CONTROL = 'no-cache'
+
+def data_etag(conn, student_id):
+    """Strong ETag for everything read about one student; changes whenever a trigger bumps their version."""
+    version, list_version = read_data_versions(conn, student_id)
+    return f'"s{student_id or 0}-{version}-{list_version}-{get_word_catalog().version}"'
+
+def etag_matches(if_none_match, etag):
+    """Check an If-None-Match header against the current ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return etag in {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+
+def conditional_json(conn, student_id, build, etag_suffix=None):
+    """Answer 304 if the client already has the current data, otherwise build the JSON body."""
+    etag = data_etag(conn, student_id)
+    if etag_suffix:
+        # For responses that also depend on something besides the data (e.g. today's date)
+        etag = f'{etag[:-1]}-{etag_suffix}"'
+    headers = {'ETag': etag, 'Cache-Control': DATA_CACHE_CONTROL}
+    
+    # The version is read before the list queries, so a concurrent write can only make the next ETag newer
+    if etag_matches(request.headers.get('If-None-Match'), headers['ETag']):
+        return '', 304, headers
+    
+    return jsonify(build()), 200, headers
+
+def fetch_learning_words(cursor, student_id):
+    """Get a student's learning list: regular words in pathway order, then special words."""
+    # Get regular learning words (ids come from the covering index, the catalog puts them in order)
     cursor.execute("""
-        SELECT w.id, w.word, w.step, w.level, sw.status
-        FROM StudentWords sw
-        JOIN Words w ON sw.word_id = w.id
-        WHERE sw.student_name = ? AND sw.status = 'learning'
-        ORDER BY w.step, w.level, w.rank
-    """, (student_name,))
+        SELECT word_id
+        FROM StudentWords
+        WHERE student_id = ? AND status = 'learning'
+    """, (student_id,))
     
-    regular_words = [dict(row) for row in cursor.fetchall()]
+    entries = get_word_catalog().in_pathway_order(row['word_id'] for row in cursor.fetchall())
+    regular_words = [
+        {'id': entry['id'], 'word': entry['word'], 'rank': entry['rank'], 'step': entry['step'], 'level': entry['level'], 'status': 'learning'}
+        for entry in entries
+    ]
     
     # Get special learning words
     cursor.execute("""
-        SELECT sp.id, sp.word, NULL as step, NULL as level, sw.status, 'special' as word_type
+        SELECT sp.id, sp.word, NULL as step, NULL as level, sw.status, 'special' as word_type,
+               sw.special_word_id, sw.added_date
         FROM StudentSpecialWords sw
         JOIN SpecialWords sp ON sw.special_word_id = sp.id
-        WHERE sw.student_name = ? AND sw.status = 'learning'
+        WHERE sw.student_id = ? AND sw.status = 'learning'
         ORDER BY sw.added_date
-    """, (student_name,))
+    """, (student_id,))
     
     special_words = [dict(row) for row in cursor.fetchall()]
     
     # Combine and sort words
-    all_words = regular_words + special_words
-    
-    conn.close()
+    return regular_words + special_words
+
+@app.route('/api/student/<student_name>/learning_words', methods=['GET'])
+def get_learning_words(student_name):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    student_id = get_student_id(conn, student_name)
     
-    return jsonify({'words': all_words})
+    return conditional_json(conn, student_id, lambda: {'words': fetch_learning_words(cursor, student_id)})
 
 @app.route('/api/student/<student_name>/learning_words', methods=['POST'])
 def add_learning_words(student_name):
@@ -93,157 +248,245 @@ def add_learning_words(student_name):
     if not word_ids and not special_word_ids:
         return jsonify({'error': 'No word IDs provided'}), 400
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Add regular words
-    for word_id in word_ids:
-        cursor.execute("""
-            INSERT OR IGNORE INTO StudentWords (student_name, word_id, status)
+    def write(cursor):
+        student_id = get_student_id(cursor.connection, student_name, create=True, cached=False)
+        
+        # Add regular words
+        cursor.executemany("""
+            INSERT OR IGNORE INTO StudentWords (student_id, word_id, status)
             VALUES (?, ?, 'learning')
-        """, (student_name, word_id))
-    
-    # Add special words
-    for special_word_id in special_word_ids:
-        cursor.execute("""
-            INSERT OR IGNORE INTO StudentSpecialWords (student_name, special_word_id, status)
+        """, [(student_id, word_id) for word_id in word_ids])
+        
+        # Add special words
+        cursor.executemany("""
+            INSERT OR IGNORE INTO StudentSpecialWords (student_id, special_word_id, status)
             VALUES (?, ?, 'learning')
-        """, (student_name, special_word_id))
+        """, [(student_id, special_word_id) for special_word_id in special_word_ids])
     
-    conn.commit()
-    conn.close()
+    writer.execute(write)
     
     total_added = len(word_ids) + len(special_word_ids)
     return jsonify({'message': f'Added {total_added} word(s) to learning list'})
 
-@app.route('/api/student/<student_name>/learning_words/<int:word_id>', methods=['DELETE'])
-def remove_learning_word(student_name, word_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+# Operations accepted by the batch learning list endpoint
+LEARNING_LIST_OPERATIONS = ('remove', 'master', 'relearn')
+
+def apply_learning_list_operation(cursor, student_id, op, word_ids, special_word_ids):
+    """Apply one batch operation to all of its word ids at once; returns the number of rows changed."""
+    # json_each lets a whole id list travel as a single bound parameter
+    word_ids_json = json.dumps(word_ids)
+    special_word_ids_json = json.dumps(special_word_ids)
+    changed = 0
+    
+    if op == 'remove':
+        cursor.execute("""
+            DELETE FROM StudentWords
+            WHERE student_id = ? AND word_id IN (SELECT value FROM json_each(?))
+        """, (student_id, word_ids_json))
+        changed += cursor.rowcount
+        
+        cursor.execute("""
+            DELETE FROM StudentSpecialWords
+            WHERE student_id = ? AND special_word_id IN (SELECT value FROM json_each(?))
+        """, (student_id, special_word_ids_json))
+        changed += cursor.rowcount
     
-    cursor.execute("""
-        DELETE FROM StudentWords
-        WHERE student_name = ? AND word_id = ?
-    """, (student_name, word_id))
+    elif op == 'master':
+        # Only words that actually move from learning to mastered earn a reward
+        cursor.execute("""
+            UPDATE StudentWords
+            SET status = 'mastered'
+            WHERE student_id = ? AND status = 'learning'
+              AND word_id IN (SELECT value FROM json_each(?))
+            RETURNING word_id
+        """, (student_id, word_ids_json))
+        mastered_word_ids = [row[0] for row in cursor.fetchall()]
+        
+        cursor.executemany("""
+            INSERT INTO Rewards (student_id, word_id, reward_type, notes)
+            VALUES (?, ?, 'word_mastered', 'Mastered word')
+        """, [(student_id, word_id) for word_id in mastered_word_ids])
+        
+        cursor.execute("""
+            UPDATE StudentSpecialWords
+            SET status = 'mastered', mastered_date = CURRENT_TIMESTAMP
+            WHERE student_id = ? AND status = 'learning'
+              AND special_word_id IN (SELECT value FROM json_each(?))
+            RETURNING special_word_id
+        """, (student_id, special_word_ids_json))
+        mastered_special_word_ids = [row[0] for row in cursor.fetchall()]
+        
+        cursor.executemany("""
+            INSERT INTO Rewards (student_id, special_word_id, reward_type, notes)
+            VALUES (?, ?, 'special_word_mastered', 'Mastered special word')
+        """, [(student_id, special_word_id) for special_word_id in mastered_special_word_ids])
+        
+        changed = len(mastered_word_ids) + len(mastered_special_word_ids)
+    
+    elif op == 'relearn':
+        cursor.execute("""
+            UPDATE StudentWords
+            SET status = 'learning'
+            WHERE student_id = ? AND status = 'mastered'
+              AND word_id IN (SELECT value FROM json_each(?))
+        """, (student_id, word_ids_json))
+        changed += cursor.rowcount
+        
+        cursor.execute("""
+            UPDATE StudentSpecialWords
+            SET status = 'learning', mastered_date = NULL
+            WHERE student_id = ? AND status = 'mastered'
+              AND special_word_id IN (SELECT value FROM json_each(?))
+        """, (student_id, special_word_ids_json))
+        changed += cursor.rowcount
+    
+    return changed
+
+def run_learning_list_operation(student_name, op, word_ids=(), special_word_ids=()):
+    """Apply one operation through the writer; the single-word routes use this so they follow the batch rules exactly."""
+    def write(cursor):
+        student_id = get_student_id(cursor.connection, student_name, cached=False)
+        return apply_learning_list_operation(cursor, student_id, op, list(word_ids), list(special_word_ids))
     
-    conn.commit()
-    conn.close()
+    return writer.execute(write)
+
+@app.route('/api/student/<student_name>/learning_words', methods=['PATCH'])
+def update_learning_words(student_name):
+    data = request.get_json() or {}
+    operations = data.get('operations', [])
+    
+    if not operations or not isinstance(operations, list):
+        return jsonify({'error': 'Operations list is required'}), 400
+    
+    # Validate everything before touching the database
+    parsed = []
+    for operation in operations:
+        op = operation.get('op') if isinstance(operation, dict) else None
+        if op not in LEARNING_LIST_OPERATIONS:
+            return jsonify({'error': f'Unknown operation: {op}'}), 400
+        
+        word_ids = operation.get('word_ids', [])
+        special_word_ids = operation.get('special_word_ids', [])
+        if not isinstance(word_ids, list) or not isinstance(special_word_ids, list):
+            return jsonify({'error': 'word_ids and special_word_ids must be lists'}), 400
+        # bool is a subclass of int, but true and false are not word ids
+        if not all(type(i) is int for i in word_ids + special_word_ids):
+            return jsonify({'error': 'Word IDs must be integers'}), 400
+        
+        parsed.append((op, word_ids, special_word_ids))
+    
+    result_keys = {'remove': 'removed', 'master': 'mastered', 'relearn': 'relearned'}
+    
+    def write(cursor):
+        student_id = get_student_id(cursor.connection, student_name, cached=False)
+        results = {'removed': 0, 'mastered': 0, 'relearned': 0}
+        # Every operation is applied in order, and all of them or none are committed
+        for op, word_ids, special_word_ids in parsed:
+            changed = apply_learning_list_operation(cursor, student_id, op, word_ids, special_word_ids)
+            results[result_keys[op]] += changed
+        return student_id, results
+    
+    student_id, results = writer.execute(write)
+    
+    summary = []
+    if results['removed']:
+        summary.append(f"removed {results['removed']}")
+    if results['mastered']:
+        summary.append(f"mastered {results['mastered']}")
+    if results['relearned']:
+        summary.append(f"marked {results['relearned']} as learning")
+    message = f"Learning list updated: {', '.join(summary)} word(s)" if summary else 'No changes to learning list'
+    
+    return jsonify({
+        'message': message,
+        'results': results,
+        'words': fetch_learning_words(get_db_connection().cursor(), student_id)
+    })
+
+@app.route('/api/student/<student_name>/learning_words/<int:word_id>', methods=['DELETE'])
+def remove_learning_word(student_name, word_id):
+    run_learning_list_operation(student_name, 'remove', word_ids=[word_id])
     
     return jsonify({'message': 'Word removed from learning list'})
 
 @app.route('/api/student/<student_name>/learning_special_words/<int:special_word_id>', methods=['DELETE'])
 def remove_learning_special_word(student_name, special_word_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        DELETE FROM StudentSpecialWords
-        WHERE student_name = ? AND special_word_id = ?
-    """, (student_name, special_word_id))
-    
-    conn.commit()
-    conn.close()
+    run_learning_list_operation(student_name, 'remove', special_word_ids=[special_word_id])
     
     return jsonify({'message': 'Special word removed from learning list'})
 
 @app.route('/api/student/<student_name>/learning_words/<int:word_id>/master', methods=['POST'])
 def master_learning_word(student_name, word_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        UPDATE StudentWords
-        SET status = 'mastered'
-        WHERE student_name = ? AND word_id = ?
-    """, (student_name, word_id))
-    
-    # Add to rewards
-    cursor.execute("""
-        INSERT INTO Rewards (student_name, word_id, reward_type, notes)
-        VALUES (?, ?, 'word_mastered', 'Mastered word')
-    """, (student_name, word_id))
-    
-    conn.commit()
-    conn.close()
+    run_learning_list_operation(student_name, 'master', word_ids=[word_id])
     
     return jsonify({'message': 'Word marked as mastered'})
 
 @app.route('/api/student/<student_name>/learning_words/<int:word_id>/learning', methods=['POST'])
 def learning_learning_word(student_name, word_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        UPDATE StudentWords
-        SET status = 'learning'
-        WHERE student_name = ? AND word_id = ?
-    """, (student_name, word_id))
-    
-    conn.commit()
-    conn.close()
+    run_learning_list_operation(student_name, 'relearn', word_ids=[word_id])
     
     return jsonify({'message': 'Word marked as learning'})
 
+def fetch_students(cursor):
+    """Get all student names in alphabetical order."""
+    cursor.execute("SELECT name FROM Students ORDER BY name")
+    
+    return [row['name'] for row in cursor.fetchall()]
+
 @app.route('/api/students', methods=['GET'])
 def get_students():
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT DISTINCT student_name FROM StudentProgress
-        UNION
-        SELECT DISTINCT student_name FROM StudentWords
-        UNION
-        SELECT DISTINCT student_name FROM StudentSpecialWords
-        ORDER BY student_name
-    """)
-    
-    students = [row['student_name'] for row in cursor.fetchall()]
-    conn.close()
-    
-    return jsonify({'students': students})
+    # Only the student list version matters here
+    return conditional_json(conn, None, lambda: {'students': fetch_students(cursor)})
 
 @app.route('/api/student/<student_name>', methods=['DELETE'])
 def delete_student(student_name):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Delete all data associated with the student
-    cursor.execute("DELETE FROM StudentWords WHERE student_name = ?", (student_name,))
-    cursor.execute("DELETE FROM StudentSpecialWords WHERE student_name = ?", (student_name,))
-    cursor.execute("DELETE FROM StudentProgress WHERE student_name = ?", (student_name,))
-    cursor.execute("DELETE FROM Rewards WHERE student_name = ?", (student_name,))
+    def write(cursor):
+        student_id = get_student_id(cursor.connection, student_name, cached=False)
+        
+        # Delete all data associated with the student
+        cursor.execute("DELETE FROM StudentWords WHERE student_id = ?", (student_id,))
+        cursor.execute("DELETE FROM StudentSpecialWords WHERE student_id = ?", (student_id,))
+        cursor.execute("DELETE FROM StudentProgress WHERE student_id = ?", (student_id,))
+        cursor.execute("DELETE FROM Rewards WHERE student_id = ?", (student_id,))
+        cursor.execute("DELETE FROM Students WHERE id = ?", (student_id,))
     
-    conn.commit()
-    conn.close()
+    writer.execute(write)
+    forget_student(student_name)
     
     return jsonify({'message': f'Student "{student_name}" and all associated data have been deleted'})
 
-@app.route('/api/student/<student_name>/progress', methods=['GET'])
-def get_student_progress(student_name):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def fetch_progress(cursor, student_id):
+    """Get a student's current step and level."""
     cursor.execute("""
         SELECT current_step, current_level
         FROM StudentProgress
-        WHERE student_name = ?
-    """, (student_name,))
+        WHERE student_id = ?
+    """, (student_id,))
     
     progress = cursor.fetchone()
-    conn.close()
     
     if progress:
-        return jsonify({
+        return {
             'step': progress['current_step'],
             'level': progress['current_level']
-        })
+        }
     else:
         # Return default values if no progress is set
-        return jsonify({
+        return {
             'step': 1,
             'level': 1
-        })
+        }
+
+@app.route('/api/student/<student_name>/progress', methods=['GET'])
+def get_student_progress(student_name):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    student_id = get_student_id(conn, student_name)
+    
+    return conditional_json(conn, student_id, lambda: fetch_progress(cursor, student_id))
 
 @app.route('/api/student/<student_name>/progress', methods=['POST'])
 def set_student_progress(student_name):
@@ -257,58 +500,49 @@ def set_student_progress(student_name):
     if not (1 <= step <= 28) or not (1 <= level <= 5):
         return jsonify({'error': 'Invalid step or level'}), 400
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Insert or update student progress
-    cursor.execute("""
-        INSERT INTO StudentProgress (student_name, current_step, current_level)
-        VALUES (?, ?, ?)
-        ON CONFLICT(student_name) DO UPDATE SET
-            current_step = excluded.current_step,
-            current_level = excluded.current_level,
-            last_updated = CURRENT_TIMESTAMP
-    """, (student_name, step, level))
+    def write(cursor):
+        student_id = get_student_id(cursor.connection, student_name, create=True, cached=False)
+        
+        # Insert or update student progress
+        cursor.execute("""
+            INSERT INTO StudentProgress (student_id, current_step, current_level)
+            VALUES (?, ?, ?)
+            ON CONFLICT(student_id) DO UPDATE SET
+                current_step = excluded.current_step,
+                current_level = excluded.current_level,
+                last_updated = CURRENT_TIMESTAMP
+        """, (student_id, step, level))
     
-    conn.commit()
-    conn.close()
+    writer.execute(write)
     
     return jsonify({'message': f'Student progress updated to Step {step}, Level {level}'})
 
 @app.route('/api/student/<student_name>/special_words/<int:special_word_id>/learning', methods=['POST'])
 def learning_special_word(student_name, special_word_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        UPDATE StudentSpecialWords
-        SET status = 'learning', mastered_date = NULL
-        WHERE student_name = ? AND special_word_id = ?
-    """, (student_name, special_word_id))
-    
-    conn.commit()
-    conn.close()
+    run_learning_list_operation(student_name, 'relearn', special_word_ids=[special_word_id])
     
     return jsonify({'message': 'Special word marked as learning'})
 
-@app.route('/api/student/<student_name>/special_words', methods=['GET'])
-def get_special_words(student_name):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def fetch_special_words(cursor, student_id):
+    """Get all of a student's special words, newest first."""
     cursor.execute("""
         SELECT sw.id, sw.special_word_id, sw.status, sw.added_date, sw.mastered_date,
                sp.word, sp.notes
         FROM StudentSpecialWords sw
         JOIN SpecialWords sp ON sw.special_word_id = sp.id
-        WHERE sw.student_name = ?
+        WHERE sw.student_id = ?
         ORDER BY sw.added_date DESC
-    """, (student_name,))
+    """, (student_id,))
     
-    words = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    return [dict(row) for row in cursor.fetchall()]
+
+@app.route('/api/student/<student_name>/special_words', methods=['GET'])
+def get_special_words(student_name):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    student_id = get_student_id(conn, student_name)
     
-    return jsonify({'words': words})
+    return conditional_json(conn, student_id, lambda: {'words': fetch_special_words(cursor, student_id)})
 
 @app.route('/api/student/<student_name>/special_words', methods=['POST'])
 def add_special_word(student_name):
@@ -319,52 +553,53 @@ def add_special_word(student_name):
     if not word:
         return jsonify({'error': 'Word is required'}), 400
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # First check if the word already exists in the main Words table
-    cursor.execute("SELECT word, step, level FROM Words WHERE word = ?", (word,))
-    existing_word = cursor.fetchone()
+    # First check if the word, or the word it is a form of, is in the main Words table
+    existing_word = get_word_catalog().lookup_base(word)
     
     if existing_word:
-        conn.close()
+        if existing_word['word'].lower() == word.lower():
+            error = f'Word "{word}" already exists in the 2800-word list'
+        else:
+            error = f'Word "{word}" is a form of "{existing_word["word"]}", which is in the 2800-word list'
         return jsonify({
-            'error': f'Word "{word}" already exists in the 2800-word list',
+            'error': error,
+            'base_word': existing_word['word'],
             'step': existing_word['step'],
             'level': existing_word['level']
         }), 400
     
-    # Insert special word if it doesn't exist
-    cursor.execute("""
-        INSERT OR IGNORE INTO SpecialWords (word, notes)
-        VALUES (?, ?)
-    """, (word, notes))
-    
-    # Get the special word ID
-    cursor.execute("SELECT id FROM SpecialWords WHERE word = ?", (word,))
-    special_word_row = cursor.fetchone()
+    def write(cursor):
+        student_id = get_student_id(cursor.connection, student_name, create=True, cached=False)
+        
+        # Insert special word if it doesn't exist
+        cursor.execute("""
+            INSERT OR IGNORE INTO SpecialWords (word, notes)
+            VALUES (?, ?)
+        """, (word, notes))
+        
+        # Get the special word ID
+        cursor.execute("SELECT id FROM SpecialWords WHERE word = ?", (word,))
+        special_word_row = cursor.fetchone()
+        if not special_word_row:
+            return None
+        special_word_id = special_word_row['id']
+        
+        # Add to student's special words
+        cursor.execute("""
+            INSERT OR IGNORE INTO StudentSpecialWords (student_id, special_word_id, status)
+            VALUES (?, ?, 'learning')
+        """, (student_id, special_word_id))
+        
+        # Add to rewards
+        cursor.execute("""
+            INSERT INTO Rewards (student_id, special_word_id, reward_type, notes)
+            VALUES (?, ?, 'special_word_added', 'Added special word')
+        """, (student_id, special_word_id))
+        return special_word_id
     
-    if not special_word_row:
-        conn.close()
+    if writer.execute(write) is None:
         return jsonify({'error': 'Failed to add special word'}), 500
     
-    special_word_id = special_word_row['id']
-    
-    # Add to student's special words
-    cursor.execute("""
-        INSERT OR IGNORE INTO StudentSpecialWords (student_name, special_word_id, status)
-        VALUES (?, ?, 'learning')
-    """, (student_name, special_word_id))
-    
-    # Add to rewards
-    cursor.execute("""
-        INSERT INTO Rewards (student_name, special_word_id, reward_type, notes)
-        VALUES (?, ?, 'special_word_added', 'Added special word')
-    """, (student_name, special_word_id))
-    
-    conn.commit()
-    conn.close()
-    
     return jsonify({'message': f'Special word "{word}" added'})
 
 @app.route('/api/student/<student_name>/special_words/batch', methods=['POST'])
@@ -383,97 +618,72 @@ def add_special_words_batch(student_name):
         'errors': []
     }
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    # Sort the words in one pass over the in-memory catalog; only new special words touch the database
+    catalog = get_word_catalog()
+    to_add = []
+    in_main_list = set()
     for word in words:
-        try:
-            if not word:
-                results['errors'].append({'word': word, 'error': 'Word is required'})
-                continue
-                
-            # First check if the word already exists in the main Words table
-            cursor.execute("SELECT word, step, level FROM Words WHERE word = ?", (word,))
-            existing_word = cursor.fetchone()
-            
-            if existing_word:
-                existing_info = {
+        if not word or not isinstance(word, str):
+            results['errors'].append({'word': word, 'error': 'Word is required'})
+            continue
+        
+        # Inflected forms count as existing too (running -> run)
+        existing_word = catalog.lookup_base(word)
+        if existing_word:
+            if not force_add:
+                # Just inform user about existing word
+                results['existing'].append({
                     'word': word,
+                    'base_word': existing_word['word'],
                     'step': existing_word['step'],
                     'level': existing_word['level']
-                }
-                
-                # If force_add is True, we'll add it as a special word anyway
-                if force_add:
-                    # Insert special word even though it exists in main list
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO SpecialWords (word, notes)
-                        VALUES (?, ?)
-                    """, (word, notes))
-                    
-                    # Get the special word ID
-                    cursor.execute("SELECT id FROM SpecialWords WHERE word = ?", (word,))
-                    special_word_row = cursor.fetchone()
-                    
-                    if not special_word_row:
-                        results['errors'].append({'word': word, 'error': 'Failed to add special word'})
-                        continue
-                    
-                    special_word_id = special_word_row['id']
-                    
-                    # Add to student's special words
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO StudentSpecialWords (student_name, special_word_id, status)
-                        VALUES (?, ?, 'learning')
-                    """, (student_name, special_word_id))
-                    
-                    # Add to rewards
-                    cursor.execute("""
-                        INSERT INTO Rewards (student_name, special_word_id, reward_type, notes)
-                        VALUES (?, ?, 'special_word_added', 'Added special word')
-                    """, (student_name, special_word_id))
-                    
-                    results['added'].append({'word': word, 'id': special_word_id, 'existing': True})
-                else:
-                    # Just inform user about existing word
-                    results['existing'].append(existing_info)
+                })
                 continue
-            
-            # Insert special word if it doesn't exist in main list
-            cursor.execute("""
-                INSERT OR IGNORE INTO SpecialWords (word, notes)
-                VALUES (?, ?)
-            """, (word, notes))
-            
-            # Get the special word ID
-            cursor.execute("SELECT id FROM SpecialWords WHERE word = ?", (word,))
-            special_word_row = cursor.fetchone()
-            
-            if not special_word_row:
+            # force_add adds it as a special word anyway
+            in_main_list.add(word)
+        
+        # A word pasted twice is added (and rewarded) once
+        if word not in to_add:
+            to_add.append(word)
+    
+    def write(cursor):
+        student_id = get_student_id(cursor.connection, student_name, create=True, cached=False)
+        
+        # The whole list travels as one JSON parameter, so each step is a single statement
+        words_json = json.dumps(to_add)
+        cursor.execute("""
+            INSERT OR IGNORE INTO SpecialWords (word, notes)
+            SELECT value, ? FROM json_each(?)
+        """, (notes, words_json))
+        
+        special_word_ids = dict(cursor.execute("""
+            SELECT word, id FROM SpecialWords
+            WHERE word IN (SELECT value FROM json_each(?))
+        """, (words_json,)).fetchall())
+        added_ids = [special_word_ids[word] for word in to_add if word in special_word_ids]
+        
+        # Add to student's special words, then to rewards, in the order the words were given
+        cursor.executemany("""
+            INSERT OR IGNORE INTO StudentSpecialWords (student_id, special_word_id, status)
+            VALUES (?, ?, 'learning')
+        """, [(student_id, special_word_id) for special_word_id in added_ids])
+        cursor.executemany("""
+            INSERT INTO Rewards (student_id, special_word_id, reward_type, notes)
+            VALUES (?, ?, 'special_word_added', 'Added special word')
+        """, [(student_id, special_word_id) for special_word_id in added_ids])
+        return special_word_ids
+    
+    if to_add:
+        special_word_ids = writer.execute(write)
+        for word in to_add:
+            special_word_id = special_word_ids.get(word)
+            if special_word_id is None:
                 results['errors'].append({'word': word, 'error': 'Failed to add special word'})
                 continue
-            
-            special_word_id = special_word_row['id']
-            
-            # Add to student's special words
-            cursor.execute("""
-                INSERT OR IGNORE INTO StudentSpecialWords (student_name, special_word_id, status)
-                VALUES (?, ?, 'learning')
-            """, (student_name, special_word_id))
-            
-            # Add to rewards
-            cursor.execute("""
-                INSERT INTO Rewards (student_name, special_word_id, reward_type, notes)
-                VALUES (?, ?, 'special_word_added', 'Added special word')
-            """, (student_name, special_word_id))
-            
-            results['added'].append({'word': word, 'id': special_word_id})
-            
-        except Exception as e:
-            results['errors'].append({'word': word, 'error': str(e)})
-    
-    conn.commit()
-    conn.close()
+            added = {'word': word, 'id': special_word_id}
+            if word in in_main_list:
+                added['existing'] = True
+            results['added'].append(added)
     
     message = f"Added {len(results['added'])} special word(s)"
     if results['existing']:
@@ -488,57 +698,173 @@ def add_special_words_batch(student_name):
 
 @app.route('/api/student/<student_name>/special_words/<int:special_word_id>', methods=['DELETE'])
 def remove_special_word(student_name, special_word_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        DELETE FROM StudentSpecialWords
-        WHERE student_name = ? AND special_word_id = ?
-    """, (student_name, special_word_id))
-    
-    conn.commit()
-    conn.close()
+    run_learning_list_operation(student_name, 'remove', special_word_ids=[special_word_id])
     
     return jsonify({'message': 'Special word removed from learning list'})
 
 @app.route('/api/student/<student_name>/special_words/<int:special_word_id>/master', methods=['POST'])
 def master_special_word(student_name, special_word_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        UPDATE StudentSpecialWords
-        SET status = 'mastered', mastered_date = CURRENT_TIMESTAMP
-        WHERE student_name = ? AND special_word_id = ?
-    """, (student_name, special_word_id))
+    run_learning_list_operation(student_name, 'master', special_word_ids=[special_word_id])
     
-    # Add to rewards
-    cursor.execute("""
-        INSERT INTO Rewards (student_name, special_word_id, reward_type, notes)
-        VALUES (?, ?, 'special_word_mastered', 'Mastered special word')
-    """, (student_name, special_word_id))
+    return jsonify({'message': 'Special word marked as mastered'})
+
+# Rewards are sent a page at a time, newest first
+REWARDS_PAGE_SIZE = 50
+MAX_REWARDS_PAGE_SIZE = 200
+
+def fetch_rewards(cursor, student_id, before=None, limit=REWARDS_PAGE_SIZE, reward_types=None,
+                  date_from=None, date_to=None, text=None):
+    """Get one page of a student's rewards, newest first, with the cursor for the next page.
+    
+    `before` is a (reward_date, id) pair from a previous page; the filters are applied in SQL
+    so the page size stays the same however many rewards a student has.
+    """
+    conditions = ["r.student_id = ?"]
+    params = [student_id]
+    
+    # Keyset pagination: seek straight to the position after the last row sent
+    if before:
+        conditions.append("(r.reward_date, r.id) < (?, ?)")
+        params.extend(before)
+    if reward_types:
+        conditions.append("r.reward_type IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(reward_types))
+    if date_from:
+        conditions.append("r.reward_date >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("r.reward_date < date(?, '+1 day')")
+        params.append(date_to)
+    if text:
+        pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        conditions.append("(r.notes LIKE ? ESCAPE '\\' OR w.word LIKE ? ESCAPE '\\' OR sp.word LIKE ? ESCAPE '\\')")
+        params.extend([pattern] * 3)
+    
+    # One extra row tells whether there is another page
+    cursor.execute(f"""
+        SELECT r.id, r.reward_type, r.reward_date, r.notes, r.word_id, r.special_word_id,
+               COALESCE(w.word, sp.word) AS word
+        FROM Rewards r
+        LEFT JOIN Words w ON w.id = r.word_id
+        LEFT JOIN SpecialWords sp ON sp.id = r.special_word_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY r.reward_date DESC, r.id DESC
+        LIMIT ?
+    """, params + [limit + 1])
     
-    conn.commit()
-    conn.close()
+    rewards = [dict(row) for row in cursor.fetchall()]
+    next_before = None
+    if len(rewards) > limit:
+        rewards = rewards[:limit]
+        next_before = f"{rewards[-1]['reward_date']},{rewards[-1]['id']}"
     
-    return jsonify({'message': 'Special word marked as mastered'})
+    return {'rewards': rewards, 'next_before': next_before}
+
+def check_date_prefix(name, value):
+    """Raise ValueError unless value starts with a valid YYYY-MM-DD date; only that part is compared in SQL."""
+    try:
+        # fromisoformat also takes forms like 20240501 that would not compare correctly as text
+        valid = date.fromisoformat(value[:10]).isoformat() == value[:10]
+    except ValueError:
+        valid = False
+    if not valid:
+        raise ValueError(f'{name} must start with a date like 2024-05-01')
+
+def parse_reward_filters(args):
+    """Read the paging and filter parameters of the rewards endpoint; raises ValueError if one is invalid."""
+    filters = {}
+    
+    before = args.get('before')
+    if before:
+        reward_date, _, reward_id = before.rpartition(',')
+        if not reward_date or not reward_id.isdigit():
+            raise ValueError('before must be "<reward_date>,<id>"')
+        check_date_prefix('before', reward_date)
+        filters['before'] = (reward_date, int(reward_id))
+    
+    # Read as a string, since type=int would quietly turn limit=abc into the default
+    limit = args.get('limit', str(REWARDS_PAGE_SIZE))
+    if not limit.isdecimal() or not 1 <= int(limit) <= MAX_REWARDS_PAGE_SIZE:
+        raise ValueError(f'limit must be a number between 1 and {MAX_REWARDS_PAGE_SIZE}')
+    filters['limit'] = int(limit)
+    
+    reward_types = [value.strip() for value in args.get('type', '').split(',') if value.strip()]
+    if reward_types:
+        filters['reward_types'] = reward_types
+    
+    for name, key in (('from', 'date_from'), ('to', 'date_to')):
+        value = args.get(name)
+        if value:
+            # Only the date part is used, so 2024-05-01 and 2024-05-01T10:00 both work
+            check_date_prefix(name, value)
+            filters[key] = value[:10]
+    
+    text = args.get('q', '').strip()
+    if text:
+        filters['text'] = text
+    
+    return filters
 
 @app.route('/api/student/<student_name>/rewards', methods=['GET'])
 def get_rewards(student_name):
+    try:
+        filters = parse_reward_filters(request.args)
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+    
     conn = get_db_connection()
     cursor = conn.cursor()
+    student_id = get_student_id(conn, student_name)
     
-    cursor.execute("""
-        SELECT id, reward_type, reward_date, notes
-        FROM Rewards
-        WHERE student_name = ?
-        ORDER BY reward_date DESC
-    """, (student_name,))
+    return conditional_json(conn, student_id, lambda: fetch_rewards(cursor, student_id, **filters))
+
+@app.route('/api/student/<student_name>/stats', methods=['GET'])
+def get_reward_stats(student_name):
+    conn = get_db_connection()
+    student_id = get_student_id(conn, student_name)
     
-    rewards = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    # Streaks and the chart windows move with the date even when no reward changes
+    today = datetime.now(timezone.utc).date()
+    return conditional_json(conn, student_id, lambda: read_reward_stats(conn, student_id, today), today.isoformat())
+
+# Parts of the dashboard and how to read each one
+DASHBOARD_FIELDS = {
+    'learning_words': fetch_learning_words,
+    'special_words': fetch_special_words,
+    'rewards': fetch_rewards,
+    'progress': fetch_progress,
+    'students': lambda cursor, student_id: fetch_students(cursor)
+}
+
+@app.route('/api/student/<student_name>/dashboard', methods=['GET'])
+def get_dashboard(student_name):
+    fields = request.args.get('fields')
+    
+    if fields:
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in DASHBOARD_FIELDS]
+        if unknown:
+            return jsonify({'error': f"Unknown dashboard field(s): {', '.join(unknown)}"}), 400
+    else:
+        fields = list(DASHBOARD_FIELDS)
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
     
-    return jsonify({'rewards': rewards})
+    # Read everything inside one transaction so all parts come from the same snapshot
+    cursor.execute("BEGIN")
+    try:
+        student_id = get_student_id(conn, student_name)
+        
+        def build():
+            dashboard = {'student': student_name}
+            for field in fields:
+                dashboard[field] = DASHBOARD_FIELDS[field](cursor, student_id)
+            return dashboard
+        
+        return conditional_json(conn, student_id, build)
+    finally:
+        conn.commit()
 
 @app.route('/api/student/<student_name>/special_words')
 def get_special_words_list():
@@ -551,137 +877,404 @@ def get_special_words_list():
     """)
     
     words = [dict(row) for row in cursor.fetchall()]
-    conn.close()
     
     return jsonify({'words': words})
 
-@app.route('/api/student/<student_name>/generate_story', methods=['POST'])
-def generate_story(student_name):
-    # Get the learning words for the student
+MAX_SEARCH_LIMIT = 100
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    query = request.args.get('q', '').strip()
+    limit = request.args.get('limit', SEARCH_LIMIT, type=int)
+    if not 1 <= limit <= MAX_SEARCH_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {MAX_SEARCH_LIMIT}'}), 400
+    
+    step = request.args.get('step', type=int)
+    level = request.args.get('level', type=int)
+    
+    return jsonify(search_words(get_db_connection(), query, limit, step, level))
+
+def describe_change(change):
+    """Add the word text, step and level to a learning word change, so clients can apply it directly."""
+    if change['entity'] == 'word' and change['action'] == 'upsert':
+        entry = get_word_catalog().entry(change['data']['word_id'])
+        if entry:
+            change['data'].update(word=entry['word'], rank=entry['rank'], step=entry['step'], level=entry['level'])
+    return change
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    since = request.args.get('since', type=int)
+    
+    # Without a starting point, just tell the client where the log is now
+    if since is None:
+        return jsonify({'latest': change_feed.latest(), 'changes': [], 'reset': False, 'more': False})
+    
+    student_name = request.args.get('student')
+    student_id = None
+    if student_name:
+        with db_pool.connection() as conn:
+            # An unknown student has no changes yet (no student has id 0), but the student list still does
+            student_id = get_student_id(conn, student_name) or 0
+    
+    wait = min(max(request.args.get('wait', 0, type=float), 0), CHANGE_WAIT_LIMIT)
+    result = change_feed.wait(since, student_id, wait)
+    result['changes'] = [describe_change(change) for change in result['changes']]
+    
+    return jsonify(result)
+
+@app.route('/api/db/stats', methods=['GET'])
+def get_db_stats():
+    return jsonify(dict(db_pool.stats(), writer=writer.stats()))
+
+@app.route('/readyz', methods=['GET'])
+def get_readiness():
+    checks = {'started': ready.is_set(), 'catalog': False, 'database': False}
+    
+    try:
+        checks['catalog'] = len(get_word_catalog()) > 0
+        get_db_connection().execute("SELECT 1").fetchone()
+        checks['database'] = True
+    except sqlite3.Error:
+        pass
+    
+    # Load balancers only look at the status; the body says which check failed
+    status = 200 if all(checks.values()) else 503
+    return jsonify({'ready': status == 200, 'checks': checks, 'pid': os.getpid()}), status
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return app.response_class(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/api/llm_cache/stats', methods=['GET'])
+def get_llm_cache_stats():
+    return jsonify(llm_cache.stats(get_db_connection()))
+
+def fetch_learning_word_texts(student_name):
+    """Get the text of every word a student is learning, regular words first."""
     conn = get_db_connection()
     cursor = conn.cursor()
+    student_id = get_student_id(conn, student_name)
     
     # Get regular learning words
     cursor.execute("""
-        SELECT w.word
-        FROM StudentWords sw
-        JOIN Words w ON sw.word_id = w.id
-        WHERE sw.student_name = ? AND sw.status = 'learning'
-        ORDER BY w.step, w.level, w.rank
-    """, (student_name,))
+        SELECT word_id
+        FROM StudentWords
+        WHERE student_id = ? AND status = 'learning'
+    """, (student_id,))
     
-    regular_words = [row['word'] for row in cursor.fetchall()]
+    regular_words = [entry['word'] for entry in get_word_catalog().in_pathway_order(row['word_id'] for row in cursor.fetchall())]
     
     # Get special learning words
     cursor.execute("""
         SELECT sp.word
         FROM StudentSpecialWords sw
         JOIN SpecialWords sp ON sw.special_word_id = sp.id
-        WHERE sw.student_name = ? AND sw.status = 'learning'
+        WHERE sw.student_id = ? AND sw.status = 'learning'
         ORDER BY sw.added_date
-    """, (student_name,))
+    """, (student_id,))
     
     special_words = [row['word'] for row in cursor.fetchall()]
     
-    conn.close()
-    
     # Combine all learning words
-    all_words = regular_words + special_words
+    return regular_words + special_words
+
+# Bump these when the prompt text changes so old cached responses are not reused
+STORY_PROMPT_VERSION = 1
+QUESTIONS_PROMPT_VERSION = 1
+
+def build_story_prompt(all_words):
+    """Create the Ollama prompt for a story using the given words."""
+    words_list = ', '.join(all_words)
+    return f"Write a 200 word story that will be easy for an A2 level ESL learner to understand. Students at this level have a very limited vocabulary. Use these words in the story: {words_list}. Include the word list."
+
+def build_questions_prompt(all_words):
+    """Create the Ollama prompt for a multiple choice quiz on the given words."""
+    words_list = ', '.join(all_words)
+    return f"Create multiple choice questions to test a learner's understanding of the following words. The student is an A2 level ESL learner with a limited vocabulary. Restrict your word choice to make it easy for an A2 level ESL learner to understand. Create one question for EACH word in the list. Number the questions sequentially from 1 to {len(all_words)}. In each question, the student will select which word best fills the blank. Provide exactly 4 choices: one correct answer and three distractors (incorrect options). Do NOT indicate the correct answer in the quiz. Use simple numbering like '1:' instead of 'Question 1:'. Do NOT use labels like 'Answer Choices:'. Format the options as 'A) word', 'B) word', 'C) word', 'D) word'. Put the answers in a separate section at the end of your response. Do NOT use # or * in the response. Test these words: {words_list}"
+
+def format_sse(event, data):
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def wants_force_refresh():
+    """Check whether the request asked to skip the cached response."""
+    return request.args.get('force_refresh', '').lower() in ('1', 'true', 'yes')
+
+def generation_error_message(error, error_label):
+    """Turn an exception from an Ollama call into the message shown to the teacher."""
+    if isinstance(error, requests.exceptions.Timeout):
+        return 'Request to Ollama timed out. Please check if Ollama is running and try again.'
+    if isinstance(error, requests.exceptions.RequestException):
+        return f'Error connecting to Ollama: {str(error)}'
+    return f'Error generating {error_label}: {str(error)}'
+
+def cached_text(cache_key):
+    """Look up a previously generated response."""
+    with db_pool.connection() as conn:
+        return llm_cache.get(conn, cache_key)
+
+def generate_and_cache(cache_key, kind, prompt_version, all_words, prompt):
+    """Run a prompt through Ollama and remember the response; returns None if Ollama gave nothing."""
+    started = time.perf_counter()
+    try:
+        text = generate(prompt, OLLAMA_URL, OLLAMA_MODEL)
+    except Exception:
+        metrics.observe_ollama('generate', time.perf_counter() - started, error=True)
+        raise
+    metrics.observe_ollama('generate', time.perf_counter() - started)
+    
+    if text:
+        with db_pool.connection() as conn:
+            llm_cache.put(conn, cache_key, kind, OLLAMA_MODEL, prompt_version, all_words, text)
+    return text
+
+def generate_text(kind, prompt_version, all_words, prompt, fallback):
+    """Return (text, cached) for a prompt, calling Ollama only on a cache miss."""
+    cache_key = make_cache_key(kind, OLLAMA_MODEL, prompt_version, all_words)
+    
+    if not wants_force_refresh():
+        text = cached_text(cache_key)
+        if text is not None:
+            return text, True
+    
+    with generation_jobs.slots:
+        text = generate_and_cache(cache_key, kind, prompt_version, all_words, prompt)
+    return text or fallback, False
+
+def stream_generation_response(prompt, error_label, cache_key, cache_entry):
+    """Stream an Ollama generation to the browser as Server-Sent Events."""
+    def events():
+        # Tell the page it is waiting in line when Ollama is already busy
+        if not generation_jobs.slots.acquire(blocking=False):
+            yield format_sse('queued', {})
+            generation_jobs.slots.acquire()
+        
+        pieces = []
+        started = time.perf_counter()
+        first_token = None
+        try:
+            for text in stream_generate(prompt, OLLAMA_URL, OLLAMA_MODEL):
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                pieces.append(text)
+                yield format_sse('token', {'text': text})
+        except Exception as e:
+            metrics.observe_ollama('stream', time.perf_counter() - started, first_token, error=True)
+            yield format_sse('error', {'error': generation_error_message(e, error_label)})
+            return
+        finally:
+            generation_jobs.slots.release()
+        
+        metrics.observe_ollama('stream', time.perf_counter() - started, first_token)
+        
+        # Only complete responses are cached; a cancelled stream never gets here
+        if pieces:
+            with db_pool.connection() as conn:
+                llm_cache.put(conn, cache_key, *cache_entry, ''.join(pieces))
+        yield format_sse('done', {'cached': False})
+    
+    return app.response_class(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def cached_stream_response(text):
+    """Send a cached response in the same Server-Sent Events format as a live one."""
+    body = format_sse('token', {'text': text}) + format_sse('done', {'cached': True})
+    return app.response_class(body, mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+def stream_text(kind, prompt_version, all_words, prompt, error_label):
+    """Stream a prompt's response, replaying it from the cache when possible."""
+    cache_key = make_cache_key(kind, OLLAMA_MODEL, prompt_version, all_words)
+    
+    if not wants_force_refresh():
+        text = cached_text(cache_key)
+        if text is not None:
+            return cached_stream_response(text)
+    
+    return stream_generation_response(prompt, error_label, cache_key, (kind, OLLAMA_MODEL, prompt_version, all_words))
+
+def submit_generation_job(kind, prompt_version, all_words, prompt, fallback, error_label):
+    """Queue a generation and answer straight away with the job to poll."""
+    cache_key = make_cache_key(kind, OLLAMA_MODEL, prompt_version, all_words)
+    
+    if not wants_force_refresh():
+        text = cached_text(cache_key)
+        if text is not None:
+            return jsonify({'job_id': None, 'kind': kind, 'status': 'done', 'result': text, 'cached': True})
+    
+    def run():
+        try:
+            text = generate_and_cache(cache_key, kind, prompt_version, all_words, prompt)
+        except Exception as e:
+            raise RuntimeError(generation_error_message(e, error_label)) from e
+        return text or fallback, False
+    
+    # Identical word lists share one job, so repeated clicks don't queue extra generations
+    job, deduplicated = generation_jobs.submit(cache_key, kind, run)
+    
+    response = job.to_dict()
+    response['deduplicated'] = deduplicated
+    return jsonify(response), 202
+
+@app.route('/api/student/<student_name>/generate_story', methods=['POST'])
+def generate_story(student_name):
+    # Get the learning words for the student
+    all_words = fetch_learning_word_texts(student_name)
     
     if not all_words:
         return jsonify({'error': 'No learning words found for this student'}), 400
     
     # Create the prompt for Ollama
-    words_list = ', '.join(all_words)
-    prompt = f"Write a 200 word story that will be easy for an A2 level ESL learner to understand. Students at this level have a very limited vocabulary. Use these words in the story: {words_list}. Include the word list."
-    
-    # Prepare the request to Ollama
-    payload = {
-        "model": OLLAMA_MODEL,
-        "prompt": prompt,
-        "stream": False
-    }
+    prompt = build_story_prompt(all_words)
     
     try:
-        # Send request to Ollama
-        response = requests.post(OLLAMA_URL, json=payload, timeout=60)  # 60 second timeout
-        response.raise_for_status()
+        # Send request to Ollama (or reuse the story for this exact word set)
+        story, cached = generate_text('story', STORY_PROMPT_VERSION, all_words, prompt, 'Sorry, I could not generate a story.')
         
-        # Parse the response
-        result = response.json()
-        story = result.get('response', 'Sorry, I could not generate a story.')
-        
-        return jsonify({'story': story})
-    except requests.exceptions.Timeout:
-        return jsonify({'error': 'Request to Ollama timed out. Please check if Ollama is running and try again.'}), 500
-    except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Error connecting to Ollama: {str(e)}'}), 500
+        return jsonify({'story': story, 'cached': cached})
     except Exception as e:
-        return jsonify({'error': f'Error generating story: {str(e)}'}), 500
+        return jsonify({'error': generation_error_message(e, 'story')}), 500
+
+@app.route('/api/student/<student_name>/generate_story/stream', methods=['POST'])
+def generate_story_stream(student_name):
+    # Read the words before streaming so the database connection is released straight away
+    all_words = fetch_learning_word_texts(student_name)
+    
+    if not all_words:
+        return jsonify({'error': 'No learning words found for this student'}), 400
+    
+    return stream_text('story', STORY_PROMPT_VERSION, all_words, build_story_prompt(all_words), 'story')
+
+@app.route('/api/student/<student_name>/generate_story/jobs', methods=['POST'])
+def generate_story_job(student_name):
+    all_words = fetch_learning_word_texts(student_name)
+    
+    if not all_words:
+        return jsonify({'error': 'No learning words found for this student'}), 400
+    
+    return submit_generation_job('story', STORY_PROMPT_VERSION, all_words, build_story_prompt(all_words),
+                                 'Sorry, I could not generate a story.', 'story')
 
 @app.route('/api/student/<student_name>/generate_questions', methods=['POST'])
 def generate_questions(student_name):
     # Get the learning words for the student
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    all_words = fetch_learning_word_texts(student_name)
     
-    # Get regular learning words
-    cursor.execute("""
-        SELECT w.word
-        FROM StudentWords sw
-        JOIN Words w ON sw.word_id = w.id
-        WHERE sw.student_name = ? AND sw.status = 'learning'
-        ORDER BY w.step, w.level, w.rank
-    """, (student_name,))
-    
-    regular_words = [row['word'] for row in cursor.fetchall()]
+    if not all_words:
+        return jsonify({'error': 'No learning words found for this student'}), 400
     
-    # Get special learning words
-    cursor.execute("""
-        SELECT sp.word
-        FROM StudentSpecialWords sw
-        JOIN SpecialWords sp ON sw.special_word_id = sp.id
-        WHERE sw.student_name = ? AND sw.status = 'learning'
-        ORDER BY sw.added_date
-    """, (student_name,))
+    # Create the prompt for Ollama
+    prompt = build_questions_prompt(all_words)
     
-    special_words = [row['word'] for row in cursor.fetchall()]
+    try:
+        # Send request to Ollama (or reuse the questions for this exact word set)
+        questions, cached = generate_text('questions', QUESTIONS_PROMPT_VERSION, all_words, prompt, 'Sorry, I could not generate questions.')
+        
+        return jsonify({'questions': questions, 'cached': cached})
+    except Exception as e:
+        return jsonify({'error': generation_error_message(e, 'questions')}), 500
+
+@app.route('/api/student/<student_name>/generate_questions/stream', methods=['POST'])
+def generate_questions_stream(student_name):
+    # Read the words before streaming so the database connection is released straight away
+    all_words = fetch_learning_word_texts(student_name)
     
-    conn.close()
+    if not all_words:
+        return jsonify({'error': 'No learning words found for this student'}), 400
     
-    # Combine all learning words
-    all_words = regular_words + special_words
+    return stream_text('questions', QUESTIONS_PROMPT_VERSION, all_words, build_questions_prompt(all_words), 'questions')
+
+@app.route('/api/student/<student_name>/generate_questions/jobs', methods=['POST'])
+def generate_questions_job(student_name):
+    all_words = fetch_learning_word_texts(student_name)
     
     if not all_words:
         return jsonify({'error': 'No learning words found for this student'}), 400
     
-    # Create the prompt for Ollama
-    words_list = ', '.join(all_words)
-    prompt = f"Create multiple choice questions to test a learner's understanding of the following words. The student is an A2 level ESL learner with a limited vocabulary. Restrict your word choice to make it easy for an A2 level ESL learner to understand. Create one question for EACH word in the list. Number the questions sequentially from 1 to {len(all_words)}. In each question, the student will select which word best fills the blank. Provide exactly 4 choices: one correct answer and three distractors (incorrect options). Do NOT indicate the correct answer in the quiz. Use simple numbering like '1:' instead of 'Question 1:'. Do NOT use labels like 'Answer Choices:'. Format the options as 'A) word', 'B) word', 'C) word', 'D) word'. Put the answers in a separate section at the end of your response. Do NOT use # or * in the response. Test these words: {words_list}"
+    return submit_generation_job('questions', QUESTIONS_PROMPT_VERSION, all_words, build_questions_prompt(all_words),
+                                 'Sorry, I could not generate questions.', 'questions')
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = generation_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    # ?wait=N holds the request open until the job finishes (long polling)
+    wait = min(request.args.get('wait', 0, type=float), JOB_WAIT_LIMIT)
+    if wait > 0:
+        job.wait(wait)
+    
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/stats', methods=['GET'])
+def get_job_stats():
+    return jsonify(generation_jobs.stats())
+
+def create_app(database=None):
+    """Bring the database schema up to date, load the shared in-memory state and return the WSGI app.
+    
+    Production servers call this once before forking workers (see serve.py), so every worker
+    starts with the catalog and page already loaded.
+    """
+    global DATABASE, db_pool, writer
+    if database and database != DATABASE:
+        DATABASE = database
+        db_pool = ConnectionPool(DATABASE, factory=TracedConnection if TRACE_ENABLED else InstrumentedConnection)
+        writer = GroupCommitWriter(DATABASE, factory=TracedConnection if TRACE_ENABLED else InstrumentedConnection,
+                                   observe=metrics.observe_write_batch, housekeeping=prune_changes,
+                                   housekeeping_every=PRUNE_EVERY)
     
-    # Prepare the request to Ollama
-    payload = {
-        "model": OLLAMA_MODEL,
-        "prompt": prompt,
-        "stream": False
-    }
+    if not os.path.exists(DATABASE):
+        raise FileNotFoundError(f"Database '{DATABASE}' not found. Please run setup_db.py first.")
     
-    try:
-        # Send request to Ollama
-        response = requests.post(OLLAMA_URL, json=payload, timeout=60)  # 60 second timeout
-        response.raise_for_status()
-        
-        # Parse the response
-        result = response.json()
-        questions = result.get('response', 'Sorry, I could not generate questions.')
-        
-        return jsonify({'questions': questions})
-    except requests.exceptions.Timeout:
-        return jsonify({'error': 'Request to Ollama timed out. Please check if Ollama is running and try again.'}), 500
-    except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Error connecting to Ollama: {str(e)}'}), 500
-    except Exception as e:
-        return jsonify({'error': f'Error generating questions: {str(e)}'}), 500
+    # Convert older databases that still key student tables on student_name
+    update_database_with_students(DATABASE)
+    
+    # Add the covering indexes the list endpoints rely on
+    update_indexes(DATABASE)
+    
+    # Keep per-student data versions for the ETags on GET endpoints
+    update_data_versions(DATABASE)
+    
+    # Journal student changes for the /api/changes feed
+    update_change_log(DATABASE)
+    
+    # Daily reward counts for /api/student/<name>/stats
+    update_reward_rollups(DATABASE)
+    
+    # Trigram index behind /api/search
+    update_search_index(DATABASE)
+    
+    # Inflected forms, so "running" is recognised as "run" when adding special words
+    update_word_forms(DATABASE)
+    
+    # Load the word catalog and the page once before serving requests
+    get_word_catalog()
+    index_page.load()
+    
+    ready.set()
+    return app
+
+def reset_after_fork():
+    """Drop the database connections inherited from the parent (called in each forked worker)."""
+    db_pool.reset()
+    writer.reset()
+
+def begin_shutdown():
+    """Fail the readiness check and release long polls, so in-flight requests can finish quickly."""
+    ready.clear()
+    change_feed.close()
+
+def shutdown():
+    """Wait for running generations, commit queued writes and close the pooled connections (after the last request)."""
+    generation_jobs.shutdown()
+    writer.close()
+    with db_pool.connection() as conn:
+        llm_cache.flush(conn)
+    db_pool.close_all()
 
 if __name__ == '__main__':
     # Check if database exists, if not, create it
@@ -689,4 +1282,6 @@ if __name__ == '__main__':
         print("Database not found. Please run setup_db.py first.")
         exit(1)
     
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    # Development server with the reloader; use serve.py for production
+    create_app()
+    app.run(debug=True, port=5001)
@@ -0,0 +1,286 @@
+import sqlite3
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from werkzeug.serving import make_server
+
+from setup_db import create_database, import_words
+from update_db import update_database
+from update_student_progress import update_database_with_student_progress
+
+def build_synthetic_database(db_path, csv_path='words_rank.csv', students=200, words_per_student=150,
+                             special_words=50, special_words_per_student=5, rewards_per_student=100, seed=1):
+    """Create a pathway.db filled with a made-up classroom."""
+    create_database(db_path)
+    import_words(csv_path, db_path)
+    update_database(db_path)
+    update_database_with_student_progress(db_path)
+    
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    word_ids = [row[0] for row in cursor.execute("SELECT id FROM Words")]
+    
+    cursor.executemany("INSERT INTO SpecialWords (word, notes) VALUES (?, ?)",
+                       [(f"special{i:04d}", 'Synthetic special word') for i in range(1, special_words + 1)])
+    special_word_ids = [row[0] for row in cursor.execute("SELECT id FROM SpecialWords")]
+    
+    cursor.executemany("INSERT INTO Students (name) VALUES (?)",
+                       [(f"Student{i:04d}",) for i in range(1, students + 1)])
+    student_ids = [row[0] for row in cursor.execute("SELECT id FROM Students")]
+    
+    now = time.time()
+    for student_id in student_ids:
+        # Roughly a third of each student's words are still being learned
+        chosen = rng.sample(word_ids, min(words_per_student, len(word_ids)))
+        cursor.executemany("INSERT INTO StudentWords (student_id, word_id, status) VALUES (?, ?, ?)",
+                           [(student_id, word_id, 'learning' if rng.random() < 0.33 else 'mastered') for word_id in chosen])
+        
+        chosen_special = rng.sample(special_word_ids, min(special_words_per_student, len(special_word_ids)))
+        cursor.executemany("INSERT INTO StudentSpecialWords (student_id, special_word_id, status) VALUES (?, ?, ?)",
+                           [(student_id, special_word_id, rng.choice(('learning', 'mastered'))) for special_word_id in chosen_special])
+        
+        cursor.execute("INSERT INTO StudentProgress (student_id, current_step, current_level) VALUES (?, ?, ?)",
+                       (student_id, rng.randint(1, 28), rng.randint(1, 5)))
+        
+        # A year of reward history
+        rewards = []
+        for _ in range(rewards_per_student):
+            reward_date = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now - rng.uniform(0, 365 * 86400)))
+            rewards.append((student_id, rng.choice(word_ids), 'word_mastered', reward_date, 'Mastered word'))
+        cursor.executemany("""
+            INSERT INTO Rewards (student_id, word_id, reward_type, reward_date, notes)
+            VALUES (?, ?, ?, ?, ?)
+        """, rewards)
+    
+    conn.commit()
+    conn.close()
+    
+    return [f"Student{i:04d}" for i in range(1, students + 1)]
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/generate like Ollama, after a fixed delay, without running a model."""
+    
+    delay = 0.2
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        time.sleep(self.delay)
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        
+        text = 'Once upon a time there was a student who learned many words.'
+        if payload.get('stream'):
+            for word in text.split(' '):
+                self.wfile.write((json.dumps({'response': word + ' ', 'done': False}) + '\n').encode('utf-8'))
+            self.wfile.write(b'{"response": "", "done": true}\n')
+        else:
+            self.wfile.write(json.dumps({'response': text, 'done': True}).encode('utf-8'))
+
+def start_stub_ollama(delay):
+    """Run the stub Ollama server in a background thread; returns (server, url)."""
+    handler = type('Handler', (StubOllamaHandler,), {'delay': delay})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/api/generate"
+
+def start_app(db_path, ollama_url):
+    """Serve app.py against the synthetic database on a real threaded HTTP server."""
+    import app as pathway_app
+    
+    pathway_app.OLLAMA_URL = ollama_url
+    pathway_app.create_app(db_path)
+    
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, pathway_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+class Teacher:
+    """One simulated teacher working through students, recording the latency of every request."""
+    
+    def __init__(self, base_url, students, rng, story_ratio):
+        self.base_url = base_url
+        self.students = students
+        self.rng = rng
+        self.story_ratio = story_ratio
+        self.session = requests.Session()
+        self.samples = {}
+        self.errors = {}
+    
+    def request(self, route, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=120, **kwargs)
+            ok = response.status_code < 400
+            body = response.json() if ok and response.headers.get('Content-Type', '').startswith('application/json') else None
+        except requests.exceptions.RequestException:
+            ok, body = False, None
+        elapsed = time.perf_counter() - start
+        
+        self.samples.setdefault(route, []).append(elapsed)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+        return body
+    
+    def run_session(self):
+        """Select a student, browse a level, add words, master some, maybe make a story, then clear them again."""
+        student = self.rng.choice(self.students)
+        step, level = self.rng.randint(1, 28), self.rng.randint(1, 5)
+        
+        self.request('GET /api/students', 'GET', '/api/students')
+        self.request('GET /api/student/<name>/dashboard', 'GET', f'/api/student/{student}/dashboard')
+        
+        body = self.request('GET /api/words/step/<step>/level/<level>', 'GET', f'/api/words/step/{step}/level/{level}')
+        word_ids = [word['id'] for word in (body or {}).get('words', [])]
+        added = self.rng.sample(word_ids, min(5, len(word_ids)))
+        
+        self.request('POST /api/student/<name>/learning_words', 'POST', f'/api/student/{student}/learning_words',
+                     json={'word_ids': added})
+        self.request('PATCH /api/student/<name>/learning_words (master)', 'PATCH', f'/api/student/{student}/learning_words',
+                     json={'operations': [{'op': 'master', 'word_ids': added[:2]}]})
+        self.request('GET /api/student/<name>/learning_words', 'GET', f'/api/student/{student}/learning_words')
+        
+        if self.rng.random() < self.story_ratio:
+            self.request('POST /api/student/<name>/generate_story', 'POST', f'/api/student/{student}/generate_story')
+        
+        self.request('PATCH /api/student/<name>/learning_words (clear)', 'PATCH', f'/api/student/{student}/learning_words',
+                     json={'operations': [{'op': 'remove', 'word_ids': added}]})
+        self.request('GET /api/student/<name>/rewards', 'GET', f'/api/student/{student}/rewards')
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def summarize(samples, errors, elapsed):
+    """Per-route latency percentiles (in milliseconds) and throughput."""
+    routes = {}
+    for route, values in sorted(samples.items()):
+        values = sorted(values)
+        routes[route] = {
+            'count': len(values),
+            'errors': errors.get(route, 0),
+            'throughput_rps': round(len(values) / elapsed, 2),
+            'mean_ms': round(sum(values) / len(values) * 1000, 2),
+            'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+            'max_ms': round(values[-1] * 1000, 2)
+        }
+    return routes
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_benchmark(base_url, students, concurrency=8, duration=30.0, story_ratio=0.05, seed=1):
+    """Run concurrent teachers for a fixed time; returns (samples, errors, elapsed seconds)."""
+    teachers = [Teacher(base_url, students, random.Random(seed + i), story_ratio) for i in range(concurrency)]
+    deadline = time.monotonic() + duration
+    
+    def work(teacher):
+        while time.monotonic() < deadline:
+            teacher.run_session()
+    
+    start = time.perf_counter()
+    threads = [threading.Thread(target=work, args=(teacher,)) for teacher in teachers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    samples, errors = {}, {}
+    for teacher in teachers:
+        for route, values in teacher.samples.items():
+            samples.setdefault(route, []).extend(values)
+        for route, count in teacher.errors.items():
+            errors[route] = errors.get(route, 0) + count
+    
+    return samples, errors, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Pathway web API against a synthetic classroom')
+    parser.add_argument('--students', type=int, default=200, help='Number of synthetic students')
+    parser.add_argument('--words-per-student', type=int, default=150, help='Words on each student\'s list')
+    parser.add_argument('--special-words', type=int, default=50, help='Number of special words')
+    parser.add_argument('--special-words-per-student', type=int, default=5, help='Special words on each student\'s list')
+    parser.add_argument('--rewards-per-student', type=int, default=100, help='Reward history per student')
+    parser.add_argument('--concurrency', type=int, default=8, help='Teachers sending requests at the same time')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run the load')
+    parser.add_argument('--story-ratio', type=float, default=0.05, help='Fraction of sessions that generate a story')
+    parser.add_argument('--ollama-delay', type=float, default=0.2, help='Seconds the stub Ollama takes to answer')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the data and the request mix')
+    parser.add_argument('--csv', default='words_rank.csv', help='Word list to import')
+    parser.add_argument('--db', help='Where to build the synthetic database (default: a temp file)')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    args = parser.parse_args()
+    
+    tmp_dir = None
+    db_path = args.db
+    if db_path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp_dir.name, 'pathway.db')
+    elif os.path.exists(db_path):
+        print(f"Error: {db_path} already exists; the benchmark needs a new file.", file=sys.stderr)
+        sys.exit(1)
+    
+    print(f"Building synthetic database with {args.students} students...", file=sys.stderr)
+    # The setup scripts print progress; keep stdout for the JSON report
+    with redirect_stdout(sys.stderr):
+        students = build_synthetic_database(db_path, args.csv, args.students, args.words_per_student, args.special_words,
+                                            args.special_words_per_student, args.rewards_per_student, args.seed)
+    
+    ollama_server, ollama_url = start_stub_ollama(args.ollama_delay)
+    app_server, base_url = start_app(db_path, ollama_url)
+    
+    print(f"Running {args.concurrency} teachers for {args.duration:g} seconds...", file=sys.stderr)
+    samples, errors, elapsed = run_benchmark(base_url, students, args.concurrency, args.duration, args.story_ratio, args.seed)
+    
+    app_server.shutdown()
+    ollama_server.shutdown()
+    
+    total = sum(len(values) for values in samples.values())
+    report = {
+        'commit': current_commit(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('db', 'output')},
+        'elapsed_seconds': round(elapsed, 2),
+        'total_requests': total,
+        'total_errors': sum(errors.values()),
+        'throughput_rps': round(total / elapsed, 2),
+        'routes': summarize(samples, errors, elapsed)
+    }
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from array import array
+
+from setup_db import compute_step_level
+
+# How often (in seconds) a cached catalog checks whether setup_db.py re-imported the words
+VERSION_CHECK_INTERVAL = 5.0
+
+def read_catalog_version(conn):
+    """Read the version stamp written by setup_db.import_words (0 if never stamped)."""
+    try:
+        row = conn.execute("SELECT version FROM CatalogVersion WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        # Database created before the version stamp existed
+        return 0
+    return row[0] if row else 0
+
+class WordCatalog:
+    """Immutable, array-backed copy of the Words table ordered by rank."""
+    
+    __slots__ = ('version', 'hash', 'ids', 'ranks', 'steps', 'levels', 'words', '_index', '_positions', '_slices', '_forms')
+    
+    def __init__(self, rows, version=0, forms=()):
+        rows = sorted(rows, key=lambda row: row[2])
+        
+        self.version = version
+        self.ids = array('l', (row[0] for row in rows))
+        self.words = tuple(row[1] for row in rows)
+        self.ranks = array('h', (row[2] for row in rows))
+        self.steps = array('b')
+        self.levels = array('b')
+        self._index = {}
+        self._positions = {}
+        self._slices = {}
+        
+        for i, (word_id, word, rank) in enumerate(rows):
+            step, level = compute_step_level(rank)
+            self.steps.append(step)
+            self.levels.append(level)
+            # Case-insensitive, like the form index; the more frequent spelling wins
+            self._index.setdefault(word.lower(), i)
+            self._positions[word_id] = i
+            
+            # Rows are rank ordered, so each (step, level) is one contiguous slice
+            start, _ = self._slices.get((step, level), (i, i))
+            self._slices[(step, level)] = (start, i + 1)
+        
+        # Inflected forms (from the WordForms table) point at the position of their base word
+        self._forms = {form: self._positions[word_id] for form, word_id in forms if word_id in self._positions}
+        
+        # Identifies the content (unlike the version, which every import bumps), so clients keep their copy across no-op imports
+        digest = hashlib.sha256(json.dumps([list(self.ids), self.words, self._slice_list()]).encode())
+        self.hash = digest.hexdigest()[:16]
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def __contains__(self, word):
+        return word.lower() in self._index
+    
+    def _entry(self, i):
+        return {
+            'id': self.ids[i],
+            'word': self.words[i],
+            'rank': self.ranks[i],
+            'step': self.steps[i],
+            'level': self.levels[i]
+        }
+    
+    def lookup(self, word):
+        """Return id, word, rank, step and level for a word (in any case), or None if it is not in the list."""
+        i = self._index.get(word.lower())
+        return None if i is None else self._entry(i)
+    
+    def lookup_base(self, word):
+        """Like lookup, but also finds the list word that `word` is an inflected form of (running -> run)."""
+        key = word.lower()
+        i = self._index.get(key)
+        if i is None:
+            i = self._forms.get(key)
+        return None if i is None else self._entry(i)
+    
+    def entry(self, word_id):
+        """Return id, word, rank, step and level for a Words id, or None."""
+        i = self._positions.get(word_id)
+        return None if i is None else self._entry(i)
+    
+    def word_id(self, word):
+        """Return the Words.id for a word (in any case), or None."""
+        i = self._index.get(word.lower())
+        return None if i is None else self.ids[i]
+    
+    def in_pathway_order(self, word_ids):
+        """Return entries for the given Words ids sorted by step, level and rank (unknown ids are skipped)."""
+        # Sorting here instead of in SQL lets student queries read ids straight from their index
+        positions = sorted(self._positions[word_id] for word_id in word_ids if word_id in self._positions)
+        return [self._entry(i) for i in positions]
+    
+    def _slice_list(self):
+        return [[step, level, start, stop] for (step, level), (start, stop) in sorted(self._slices.items())]
+    
+    def compact(self):
+        """The whole catalog as parallel id and word lists in rank order, with [step, level, start, stop] slices into them."""
+        return {
+            'hash': self.hash,
+            'ids': list(self.ids),
+            'words': list(self.words),
+            'slices': self._slice_list()
+        }
+    
+    def words_for(self, step, level):
+        """Return (id, word) pairs for a step and level, in rank order."""
+        start, stop = self._slices.get((step, level), (0, 0))
+        return list(zip(self.ids[start:stop], self.words[start:stop]))
+
+def load_catalog(db_path='pathway.db', conn=None):
+    """Build a WordCatalog from the Words table."""
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect(db_path)
+    
+    try:
+        version = read_catalog_version(conn)
+        rows = conn.execute("SELECT id, word, rank FROM Words").fetchall()
+        try:
+            forms = conn.execute("SELECT form, word_id FROM WordForms").fetchall()
+        except sqlite3.OperationalError:
+            # Database created before the form index existed
+            forms = []
+    finally:
+        if own_conn:
+            conn.close()
+    
+    return WordCatalog([tuple(row) for row in rows], version, [tuple(row) for row in forms])
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+def get_catalog(db_path='pathway.db'):
+    """Return the shared catalog for a database, reloading it if the version stamp changed."""
+    now = time.monotonic()
+    cached = _catalogs.get(db_path)
+    
+    if cached is not None:
+        catalog, checked_at = cached
+        if now - checked_at < VERSION_CHECK_INTERVAL:
+            return catalog
+        
+        conn = sqlite3.connect(db_path)
+        try:
+            version = read_catalog_version(conn)
+            if version == catalog.version:
+                _catalogs[db_path] = (catalog, now)
+                return catalog
+        finally:
+            conn.close()
+    
+    with _catalogs_lock:
+        cached = _catalogs.get(db_path)
+        if cached is not None and cached[1] >= now:
+            # Another thread reloaded while we were waiting for the lock
+            return cached[0]
+        
+        catalog = load_catalog(db_path)
+        _catalogs[db_path] = (catalog, time.monotonic())
+        return catalog
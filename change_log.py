@@ -0,0 +1,215 @@
+import sqlite3
+import argparse
+import json
+import threading
+import time
+
+# Only the newest entries are kept; clients that fall further behind reload everything
+MAX_CHANGES = 10000
+BATCH_LIMIT = 500  # Changes returned by one read
+POLL_INTERVAL = 1.0  # Seconds between checks for changes written by other processes
+PRUNE_EVERY = 100  # Writes through the server's writer between trims of the log
+
+# What each student table records: entity name, column holding the student id,
+# the columns identifying a row, and the JSON describing the row ({row} is NEW or OLD)
+TRACKED_TABLES = {
+    'StudentWords': (
+        'word', 'student_id', ('student_id', 'word_id'),
+        "json_object('word_id', {row}.word_id, 'status', {row}.status)",
+        "json_object('word_id', {row}.word_id)"
+    ),
+    'StudentSpecialWords': (
+        'special_word', 'student_id', ('student_id', 'special_word_id'),
+        """json_object('id', {row}.id, 'special_word_id', {row}.special_word_id, 'status', {row}.status,
+                       'added_date', {row}.added_date, 'mastered_date', {row}.mastered_date,
+                       'word', (SELECT word FROM SpecialWords WHERE id = {row}.special_word_id),
+                       'notes', (SELECT notes FROM SpecialWords WHERE id = {row}.special_word_id))""",
+        "json_object('special_word_id', {row}.special_word_id)"
+    ),
+    'Rewards': (
+        'reward', 'student_id', ('id',),
+        """json_object('id', {row}.id, 'reward_type', {row}.reward_type, 'reward_date', {row}.reward_date,
+                       'notes', {row}.notes, 'word_id', {row}.word_id, 'special_word_id', {row}.special_word_id,
+                       'word', COALESCE((SELECT word FROM Words WHERE id = {row}.word_id),
+                                        (SELECT word FROM SpecialWords WHERE id = {row}.special_word_id)))""",
+        "json_object('id', {row}.id)"
+    ),
+    'StudentProgress': (
+        'progress', 'student_id', ('student_id',),
+        "json_object('step', {row}.current_step, 'level', {row}.current_level)",
+        "json_object()"
+    ),
+    'Students': (
+        'student', 'id', ('id',),
+        "json_object('name', {row}.name)",
+        "json_object('name', {row}.name)"
+    )
+}
+
+def _log(entity, student_column, row, action, data, condition='true'):
+    return f"""
+            INSERT INTO ChangeLog (student_id, entity, action, data)
+            SELECT {row}.{student_column}, '{entity}', '{action}', {data.format(row=row)}
+            WHERE {condition};"""
+
+def create_change_log(cursor):
+    """Create the change journal and the triggers that append to it; tables that don't exist yet are skipped."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ChangeLog (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            entity TEXT NOT NULL,
+            action TEXT NOT NULL CHECK(action IN ('upsert', 'delete')),
+            data TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    
+    for table, (entity, student_column, key_columns, upsert_data, delete_data) in TRACKED_TABLES.items():
+        if table not in tables:
+            continue
+        prefix = f"trg_{table.lower()}_changes"
+        key_changed = ' OR '.join(f"OLD.{column} IS NOT NEW.{column}" for column in key_columns)
+        
+        # Recreated every time so databases pick up changes to what is recorded
+        for event in ('insert', 'update', 'delete'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {prefix}_{event}")
+        
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {prefix}_insert AFTER INSERT ON {table}
+            BEGIN{_log(entity, student_column, 'NEW', 'upsert', upsert_data)}
+            END
+        """)
+        # An update that moves a row to another key is a delete of the old key as well
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {prefix}_update AFTER UPDATE ON {table}
+            BEGIN{_log(entity, student_column, 'OLD', 'delete', delete_data, key_changed)}{_log(entity, student_column, 'NEW', 'upsert', upsert_data)}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {prefix}_delete AFTER DELETE ON {table}
+            BEGIN{_log(entity, student_column, 'OLD', 'delete', delete_data)}
+            END
+        """)
+
+def latest_seq(conn):
+    """The sequence number of the newest change ever written (0 if none)."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'ChangeLog'").fetchone()
+    return row[0] if row else 0
+
+def read_changes(conn, since, student_id=None, limit=BATCH_LIMIT):
+    """Return the changes after `since`, for one student (plus changes to the student list) or for everyone.
+    
+    `latest` is the sequence number to ask from next time. `reset` means some of the requested
+    changes were already pruned, so the client has to reload its lists instead.
+    """
+    latest = latest_seq(conn)
+    oldest = conn.execute("SELECT min(seq) FROM ChangeLog").fetchone()[0]
+    first_kept = oldest if oldest is not None else latest + 1
+    
+    if since < first_kept - 1:
+        return {'latest': latest, 'changes': [], 'reset': True, 'more': False}
+    
+    # Bounded by latest so a change committed meanwhile is picked up by the next read, not skipped
+    sql = """
+        SELECT seq, student_id, entity, action, data
+        FROM ChangeLog
+        WHERE seq > ? AND seq <= ?
+    """
+    params = [since, latest]
+    if student_id is not None:
+        sql += " AND (student_id = ? OR entity = 'student')"
+        params.append(student_id)
+    sql += " ORDER BY seq LIMIT ?"
+    params.append(limit)
+    
+    changes = [
+        {'seq': seq, 'student_id': row_student_id, 'entity': entity, 'action': action, 'data': json.loads(data)}
+        for seq, row_student_id, entity, action, data in conn.execute(sql, params).fetchall()
+    ]
+    
+    more = len(changes) == limit
+    if more:
+        latest = changes[-1]['seq']
+    
+    return {'latest': latest, 'changes': changes, 'reset': False, 'more': more}
+
+def prune_changes(cursor, keep=MAX_CHANGES):
+    """Delete all but the newest `keep` changes; returns the number deleted (the caller commits).
+    
+    The server runs this as the writer's housekeeping, inside a write transaction.
+    """
+    cursor.execute("DELETE FROM ChangeLog WHERE seq <= ?", (latest_seq(cursor) - keep,))
+    return cursor.rowcount
+
+class ChangeFeed:
+    """Long-poll access to the change log for the web server."""
+    
+    def __init__(self, connection, poll_interval=POLL_INTERVAL):
+        # connection() must return a context manager yielding a database connection
+        self.connection = connection
+        self.poll_interval = poll_interval
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._closed = False
+    
+    def notify(self):
+        """Wake the waiting readers (called after this process writes)."""
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+    
+    def close(self):
+        """Make waiting and future reads return at once (called when the server shuts down)."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+    
+    def latest(self):
+        with self.connection() as conn:
+            return latest_seq(conn)
+    
+    def read(self, since, student_id=None):
+        with self.connection() as conn:
+            return read_changes(conn, since, student_id)
+    
+    def wait(self, since, student_id=None, timeout=0):
+        """Read changes after `since`, waiting up to `timeout` seconds for the first one to arrive."""
+        deadline = time.monotonic() + timeout
+        
+        while True:
+            with self._condition:
+                generation = self._generation
+            
+            # No connection is held while waiting, so idle clients don't tie up the pool
+            result = self.read(since, student_id)
+            remaining = deadline - time.monotonic()
+            if result['changes'] or result['reset'] or remaining <= 0 or self._closed:
+                return result
+            
+            # Writes from this process wake us at once; other processes are noticed on the next poll
+            with self._condition:
+                if self._generation == generation and not self._closed:
+                    self._condition.wait(min(remaining, self.poll_interval))
+
+def update_change_log(db_path='pathway.db'):
+    """Add the change log and its triggers to an existing database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        create_change_log(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Add the change log to the Pathway database')
+    parser.add_argument('--db', default='pathway.db', help='Path to the database')
+    args = parser.parse_args()
+    
+    update_change_log(args.db)
+    print("Change log is up to date!")
+
+if __name__ == '__main__':
+    main()
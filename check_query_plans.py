@@ -0,0 +1,238 @@
+import sqlite3
+import argparse
+import os
+import sys
+import tempfile
+
+# The queries behind the list endpoints and CLIs, with sample parameters.
+# A query marked allow_scan reads a whole (small) table on purpose, but it must still avoid a sort.
+CANONICAL_QUERIES = [
+    {
+        'name': 'learning word ids',
+        'sql': "SELECT word_id FROM StudentWords WHERE student_id = ? AND status = 'learning'",
+        'params': (1,)
+    },
+    {
+        'name': 'special learning words',
+        'sql': """
+            SELECT sp.id, sp.word, sw.status, sw.special_word_id, sw.added_date
+            FROM StudentSpecialWords sw
+            JOIN SpecialWords sp ON sw.special_word_id = sp.id
+            WHERE sw.student_id = ? AND sw.status = 'learning'
+            ORDER BY sw.added_date
+        """,
+        'params': (1,)
+    },
+    {
+        'name': 'special words tab',
+        'sql': """
+            SELECT sw.id, sw.special_word_id, sw.status, sw.added_date, sw.mastered_date,
+                   sp.word, sp.notes
+            FROM StudentSpecialWords sw
+            JOIN SpecialWords sp ON sw.special_word_id = sp.id
+            WHERE sw.student_id = ?
+            ORDER BY sw.added_date DESC
+        """,
+        'params': (1,)
+    },
+    {
+        'name': 'rewards first page',
+        'sql': """
+            SELECT r.id, r.reward_type, r.reward_date, r.notes, r.word_id, r.special_word_id,
+                   COALESCE(w.word, sp.word) AS word
+            FROM Rewards r
+            LEFT JOIN Words w ON w.id = r.word_id
+            LEFT JOIN SpecialWords sp ON sp.id = r.special_word_id
+            WHERE r.student_id = ?
+            ORDER BY r.reward_date DESC, r.id DESC
+            LIMIT ?
+        """,
+        'params': (1, 51)
+    },
+    {
+        'name': 'rewards next page',
+        'sql': """
+            SELECT r.id, r.reward_type, r.reward_date, r.notes, r.word_id, r.special_word_id,
+                   COALESCE(w.word, sp.word) AS word
+            FROM Rewards r
+            LEFT JOIN Words w ON w.id = r.word_id
+            LEFT JOIN SpecialWords sp ON sp.id = r.special_word_id
+            WHERE r.student_id = ? AND (r.reward_date, r.id) < (?, ?)
+              AND r.reward_type IN (SELECT value FROM json_each(?))
+            ORDER BY r.reward_date DESC, r.id DESC
+            LIMIT ?
+        """,
+        'params': (1, '2024-01-01 00:00:00', 100, '["word_mastered"]', 51)
+    },
+    {
+        'name': 'progress',
+        'sql': "SELECT current_step, current_level FROM StudentProgress WHERE student_id = ?",
+        'params': (1,)
+    },
+    {
+        'name': 'student id by name',
+        'sql': "SELECT id FROM Students WHERE name = ?",
+        'params': ('Yumi',)
+    },
+    {
+        'name': 'special word by text',
+        'sql': "SELECT id FROM SpecialWords WHERE word = ?",
+        'params': ('example',)
+    },
+    {
+        'name': 'batch master',
+        'sql': """
+            UPDATE StudentWords
+            SET status = 'mastered'
+            WHERE student_id = ? AND status = 'learning'
+              AND word_id IN (SELECT value FROM json_each(?))
+        """,
+        'params': (1, '[1, 2, 3]')
+    },
+    {
+        'name': 'batch remove special words',
+        'sql': """
+            DELETE FROM StudentSpecialWords
+            WHERE student_id = ? AND special_word_id IN (SELECT value FROM json_each(?))
+        """,
+        'params': (1, '[1, 2, 3]')
+    },
+    {
+        'name': 'delete student rewards',
+        'sql': "DELETE FROM Rewards WHERE student_id = ?",
+        'params': (1,)
+    },
+    {
+        'name': 'change feed',
+        'sql': """
+            SELECT seq, student_id, entity, action, data
+            FROM ChangeLog
+            WHERE seq > ? AND seq <= ? AND (student_id = ? OR entity = 'student')
+            ORDER BY seq LIMIT ?
+        """,
+        'params': (0, 100, 1, 500)
+    },
+    {
+        'name': 'reward stats window',
+        'sql': """
+            SELECT day, reward_type, count
+            FROM RewardDaily
+            WHERE student_id = ? AND day >= ? AND day <= ?
+        """,
+        'params': (1, '2024-01-01', '2024-03-31')
+    },
+    {
+        'name': 'reward streak',
+        'sql': """
+            SELECT DISTINCT day
+            FROM RewardDaily
+            WHERE student_id = ? AND day <= ?
+            ORDER BY day DESC
+        """,
+        'params': (1, '2024-03-31')
+    },
+    {
+        'name': 'word search',
+        'sql': """
+            SELECT rowid, word, kind, step, level
+            FROM WordSearch
+            WHERE WordSearch MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """,
+        'params': ('"bec" OR "ecu"', 200)
+    },
+    {
+        'name': 'word prefix search',
+        'sql': """
+            SELECT id, word, 'word', step, level FROM Words WHERE word >= ? AND word < ?
+            UNION ALL
+            SELECT -id, word, 'special', NULL, NULL FROM SpecialWords WHERE word >= ? AND word < ?
+            LIMIT ?
+        """,
+        'params': ('be', 'be\U0010ffff', 'be', 'be\U0010ffff', 200)
+    },
+    {
+        'name': 'student list',
+        'sql': "SELECT name FROM Students ORDER BY name",
+        'params': (),
+        'allow_scan': True
+    },
+    {
+        'name': 'special words list',
+        'sql': "SELECT id, word FROM SpecialWords ORDER BY word",
+        'params': (),
+        'allow_scan': True
+    }
+]
+
+def explain(conn, sql, params):
+    """Return the detail lines of a query's plan."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+def plan_problems(details, allow_scan=False):
+    """List the steps of a plan that would get slower as the tables grow."""
+    problems = []
+    for detail in details:
+        if 'USE TEMP B-TREE' in detail:
+            problems.append(detail)
+        elif detail.startswith('SCAN ') and 'VIRTUAL TABLE' not in detail:
+            # json_each is a scan of the bound id list, not of a table
+            if not (allow_scan and 'COVERING INDEX' in detail):
+                problems.append(detail)
+    return problems
+
+def check_query_plans(conn, verbose=False):
+    """Explain every canonical query; returns a list of (name, problems) for the ones that regressed."""
+    failures = []
+    for query in CANONICAL_QUERIES:
+        details = explain(conn, query['sql'], query['params'])
+        problems = plan_problems(details, query.get('allow_scan', False))
+        
+        if verbose or problems:
+            status = 'FAIL' if problems else 'ok'
+            print(f"[{status}] {query['name']}")
+            for detail in details:
+                print(f"    {detail}")
+        
+        if problems:
+            failures.append((query['name'], problems))
+    
+    return failures
+
+def build_fresh_database(db_path):
+    """Create an empty database with the schema the setup scripts produce."""
+    from setup_db import create_database
+    from update_db import update_database
+    from update_student_progress import update_database_with_student_progress
+    
+    create_database(db_path)
+    update_database(db_path)
+    update_database_with_student_progress(db_path)
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail if a hot query would scan a table or sort in a temp B-tree')
+    parser.add_argument('--db', default='pathway.db', help='Path to the database to check')
+    parser.add_argument('--fresh', action='store_true', help='Check a newly created schema instead of --db')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan, not just the failing ones')
+    args = parser.parse_args()
+    
+    if args.fresh:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp_dir.name, 'pathway.db')
+        build_fresh_database(db_path)
+    else:
+        db_path = args.db
+    
+    conn = sqlite3.connect(db_path)
+    failures = check_query_plans(conn, args.verbose)
+    conn.close()
+    
+    if failures:
+        print(f"{len(failures)} of {len(CANONICAL_QUERIES)} queries have slow plans. Run update_indexes.py or fix the query.")
+        sys.exit(1)
+    
+    print(f"All {len(CANONICAL_QUERIES)} query plans use indexes.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import os
+import shutil
+
+import pytest
+
+from setup_db import create_database, import_words
+from update_db import update_database
+from update_student_progress import update_database_with_student_progress
+from reward_stats import update_reward_rollups
+from lemmas import update_word_forms
+from students import clear_student_cache
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def build_database(db_path):
+    """Create a database the way a new install does: the schema, the word list and the student tables."""
+    create_database(db_path)
+    import_words(os.path.join(ROOT, 'words_rank.csv'), db_path)
+    update_database(db_path)
+    update_database_with_student_progress(db_path)
+    update_reward_rollups(db_path)
+    update_word_forms(db_path)
+
+@pytest.fixture(scope='session')
+def template_db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('template') / 'pathway.db')
+    build_database(path)
+    return path
+
+@pytest.fixture
+def db_path(template_db, tmp_path):
+    """A fresh copy of the built database for one test."""
+    path = str(tmp_path / 'pathway.db')
+    shutil.copy(template_db, path)
+    return path
+
+@pytest.fixture
+def pathway_app(db_path, monkeypatch):
+    """The app module, started on the test's database."""
+    import app as pathway_app
+    
+    # The page is read from the working directory
+    monkeypatch.chdir(ROOT)
+    clear_student_cache()
+    pathway_app.create_app(db_path)
+    yield pathway_app
+    pathway_app.writer.close()
+    pathway_app.db_pool.close_all()
+    clear_student_cache()
+
+@pytest.fixture
+def client(pathway_app):
+    return pathway_app.app.test_client()
+
+@pytest.fixture
+def sql_statements(pathway_app):
+    """Read the SQL statement count /metrics reports for a route."""
+    def read(route):
+        prefix = f'pathway_sql_statements_total{{route="{route}"}} '
+        for line in pathway_app.metrics.render().splitlines():
+            if line.startswith(prefix):
+                return int(line[len(prefix):])
+        return 0
+    return read
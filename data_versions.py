@@ -0,0 +1,83 @@
+import sqlite3
+import argparse
+
+# Tables whose rows belong to one student; any change bumps that student's version
+VERSIONED_TABLES = ('StudentWords', 'StudentSpecialWords', 'Rewards', 'StudentProgress')
+
+# StudentDataVersion row that tracks the list of students itself
+STUDENT_LIST_ID = 0
+
+def _bump(student_id_expression, condition=''):
+    where = f" WHERE {condition}" if condition else " WHERE true"
+    return f"""
+            INSERT INTO StudentDataVersion (student_id, version)
+            SELECT {student_id_expression}, 1{where}
+            ON CONFLICT(student_id) DO UPDATE SET version = version + 1;"""
+
+def create_data_version_triggers(cursor):
+    """Create the version table and the triggers that keep it current; tables that don't exist yet are skipped."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS StudentDataVersion (
+            student_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    
+    tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    
+    for table in VERSIONED_TABLES:
+        if table not in tables:
+            continue
+        prefix = f"trg_{table.lower()}_version"
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {prefix}_insert AFTER INSERT ON {table}
+            BEGIN{_bump('NEW.student_id')}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {prefix}_update AFTER UPDATE ON {table}
+            BEGIN{_bump('NEW.student_id')}{_bump('OLD.student_id', 'OLD.student_id != NEW.student_id')}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {prefix}_delete AFTER DELETE ON {table}
+            BEGIN{_bump('OLD.student_id')}
+            END
+        """)
+    
+    if 'Students' in tables:
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_students_version_{event.lower()} AFTER {event} ON Students
+                BEGIN{_bump(STUDENT_LIST_ID)}
+                END
+            """)
+
+def read_data_versions(conn, student_id):
+    """Return (student version, student list version); 0 when nothing was recorded yet."""
+    row = conn.execute("""
+        SELECT
+            (SELECT version FROM StudentDataVersion WHERE student_id = ?),
+            (SELECT version FROM StudentDataVersion WHERE student_id = ?)
+    """, (student_id, STUDENT_LIST_ID)).fetchone()
+    return row[0] or 0, row[1] or 0
+
+def update_data_versions(db_path='pathway.db'):
+    """Add the data version table and triggers to an existing database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        create_data_version_triggers(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Add per-student data versions to the Pathway database')
+    parser.add_argument('--db', default='pathway.db', help='Path to the database')
+    args = parser.parse_args()
+    
+    update_data_versions(args.db)
+    print("Student data versions are up to date!")
+
+if __name__ == '__main__':
+    main()
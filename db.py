@@ -0,0 +1,116 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Connection tuning applied to every pooled connection
+JOURNAL_MODE = 'WAL'
+SYNCHRONOUS = 'NORMAL'
+CACHE_SIZE_KB = 20000  # ~20 MB page cache per connection
+MMAP_SIZE = 268435456  # 256 MB memory-mapped I/O
+BUSY_TIMEOUT_MS = 5000  # Wait up to 5 seconds for the write lock
+POOL_SIZE = 8  # Idle connections kept open between requests
+
+def configure_connection(conn):
+    """Apply the performance pragmas to a freshly opened connection."""
+    conn.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}")
+    conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+class ConnectionPool:
+    """A small pool of long-lived SQLite connections shared between threads."""
+    
+    def __init__(self, db_path, max_idle=POOL_SIZE, factory=sqlite3.Connection):
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self.factory = factory
+        self._idle = []
+        self._lock = threading.Lock()
+        self._created = 0
+        self._reused = 0
+        self._closed = 0
+        self._in_use = 0
+    
+    def _open(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        configure_connection(conn)
+        return conn
+    
+    def acquire(self):
+        """Take an idle connection from the pool or open a new one."""
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            if conn is not None:
+                self._reused += 1
+            self._in_use += 1
+        
+        if conn is None:
+            try:
+                conn = self._open()
+            except Exception:
+                with self._lock:
+                    self._in_use -= 1
+                raise
+            with self._lock:
+                self._created += 1
+        
+        return conn
+    
+    def release(self, conn):
+        """Return a connection to the pool, closing it if the pool is full."""
+        # Never hand out a connection with a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+        
+        with self._lock:
+            self._in_use -= 1
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self._closed += 1
+        
+        conn.close()
+    
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with block (for code outside a request)."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+    
+    def close_all(self):
+        """Close every idle connection (used on shutdown)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._closed += len(idle)
+        
+        for conn in idle:
+            conn.close()
+    
+    def reset(self):
+        """Forget every connection without closing it (call in a child process after fork).
+        
+        SQLite connections must not be used on both sides of a fork, and closing the child's
+        copies could disturb the parent's, so they are simply dropped; new ones are opened on demand.
+        """
+        with self._lock:
+            self._idle = []
+            self._in_use = 0
+    
+    def stats(self):
+        """Return counters describing the pool's current state."""
+        with self._lock:
+            return {
+                'db_path': self.db_path,
+                'max_idle': self.max_idle,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'created': self._created,
+                'reused': self._reused,
+                'closed': self._closed
+            }
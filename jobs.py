@@ -0,0 +1,152 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_CONCURRENCY = 2  # Generations allowed to run against Ollama at the same time
+JOB_RETENTION_SECONDS = 600  # How long finished jobs stay available to poll
+
+class Job:
+    """One queued generation and its outcome."""
+    
+    __slots__ = ('id', 'key', 'kind', 'status', 'result', 'cached', 'error',
+                 'submitted_at', 'started_at', 'finished_at', '_finished')
+    
+    def __init__(self, key, kind):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.kind = kind
+        self.status = 'queued'
+        self.result = None
+        self.cached = False
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._finished = threading.Event()
+    
+    def wait(self, timeout):
+        """Block until the job finishes or the timeout passes; returns True if finished."""
+        return self._finished.wait(timeout)
+    
+    def to_dict(self):
+        job = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if self.status == 'done':
+            job['result'] = self.result
+            job['cached'] = self.cached
+        elif self.status == 'error':
+            job['error'] = self.error
+        return job
+
+class JobQueue:
+    """Runs generations on a small worker pool, sharing one queue for identical requests."""
+    
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, retention=JOB_RETENTION_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.retention = retention
+        # Also taken by streaming requests, so Ollama never sees more than max_concurrency generations
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='generation')
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._active = {}
+        self._submitted = 0
+        self._deduplicated = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+    
+    def submit(self, key, kind, func):
+        """Queue func() unless an identical job is already waiting or running.
+        
+        Returns (job, deduplicated). func must return (text, cached).
+        """
+        with self._lock:
+            self._prune()
+            
+            job = self._active.get(key)
+            if job is not None:
+                self._deduplicated += 1
+                return job, True
+            
+            job = Job(key, kind)
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._submitted += 1
+        
+        self._executor.submit(self._run, job, func)
+        return job, False
+    
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def _run(self, job, func):
+        with self.slots:
+            job.started_at = time.time()
+            job.status = 'running'
+            try:
+                job.result, job.cached = func()
+                job.status = 'done'
+            except Exception as e:
+                job.error = str(e)
+                job.status = 'error'
+            job.finished_at = time.time()
+        
+        waited = job.started_at - job.submitted_at
+        ran = job.finished_at - job.started_at
+        with self._lock:
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
+            if job.status == 'done':
+                self._completed += 1
+            else:
+                self._failed += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._run_total += ran
+            self._run_max = max(self._run_max, ran)
+        
+        job._finished.set()
+    
+    def _prune(self):
+        # Caller holds the lock
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+    
+    def shutdown(self):
+        """Stop accepting work and wait for running jobs to finish."""
+        self._executor.shutdown(wait=True)
+    
+    def stats(self):
+        """Return queue depth and wait/run time counters."""
+        with self._lock:
+            queued = sum(1 for job in self._active.values() if job.status == 'queued')
+            running = sum(1 for job in self._active.values() if job.status == 'running')
+            finished = self._completed + self._failed
+            return {
+                'max_concurrency': self.max_concurrency,
+                'queue_depth': queued,
+                'running': running,
+                'submitted': self._submitted,
+                'deduplicated': self._deduplicated,
+                'completed': self._completed,
+                'failed': self._failed,
+                'avg_wait_seconds': round(self._wait_total / finished, 3) if finished else None,
+                'max_wait_seconds': round(self._wait_max, 3),
+                'avg_run_seconds': round(self._run_total / finished, 3) if finished else None,
+                'max_run_seconds': round(self._run_max, 3)
+            }
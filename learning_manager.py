@@ -1,37 +1,34 @@
-import sqlite3
-import pyperclip
 import argparse
-import sys
+
+from catalog import get_catalog
+from students import get_student_id
+from sqltrace import connect
+from pathway import ask_student, ask_step_level
 
 def get_words_by_step_level(step, level, db_path='pathway.db'):
     """Get words for a specific step and level."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT id, word FROM Words 
-        WHERE step = ? AND level = ? 
-        ORDER BY rank
-    """, (step, level))
-    
-    words = cursor.fetchall()
-    conn.close()
-    
-    return words
+    return get_catalog(db_path).words_for(step, level)
 
-def save_learning_words(student_name, word_ids, db_path='pathway.db'):
-    """Save selected words as 'learning' for a student."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+def save_learning_words(student_name, word_ids, db_path='pathway.db', conn=None):
+    """Save selected words as 'learning' for a student.
     
-    for word_id in word_ids:
-        cursor.execute("""
-            INSERT OR IGNORE INTO StudentWords (student_name, word_id, status)
-            VALUES (?, ?, 'learning')
-        """, (student_name, word_id))
+    With a connection passed in, the caller commits (so several calls can share one transaction).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = connect(db_path)
     
-    conn.commit()
-    conn.close()
+    try:
+        student_id = get_student_id(conn, student_name, create=True, cached=False)
+        conn.executemany("""
+            INSERT OR IGNORE INTO StudentWords (student_id, word_id, status)
+            VALUES (?, ?, 'learning')
+        """, [(student_id, word_id) for word_id in word_ids])
+        if own_conn:
+            conn.commit()
+    finally:
+        if own_conn:
+            conn.close()
 
 def format_clipboard_output(student_name, step, level, words):
     """Format the output for clipboard."""
@@ -72,35 +69,8 @@ def main():
     args = parser.parse_args()
     
     # Prompt for missing arguments
-    if args.student is None:
-        args.student = input("Enter student name: ").strip()
-    
-    if not args.student:
-        print("Student name cannot be empty.")
-        sys.exit(1)
-    
-    if args.step is None:
-        try:
-            args.step = int(input("Enter step (1-28): "))
-        except ValueError:
-            print("Invalid step number.")
-            sys.exit(1)
-    
-    if args.level is None:
-        try:
-            args.level = int(input("Enter level (1-5): "))
-        except ValueError:
-            print("Invalid level number.")
-            sys.exit(1)
-    
-    # Validate inputs
-    if not (1 <= args.step <= 28):
-        print("Step must be between 1 and 28.")
-        sys.exit(1)
-    
-    if not (1 <= args.level <= 5):
-        print("Level must be between 1 and 5.")
-        sys.exit(1)
+    args.student = ask_student(args.student)
+    args.step, args.level = ask_step_level(args.step, args.level)
     
     # Get words for step and level
     words = get_words_by_step_level(args.step, args.level)
@@ -127,6 +97,7 @@ def main():
     selected_words = [(wid, word) for wid, word in words if wid in selected_word_ids]
     
     # Format and copy to clipboard
+    import pyperclip
     output = format_clipboard_output(args.student, args.step, args.level, selected_words)
     pyperclip.copy(output)
     
@@ -0,0 +1,340 @@
+import sqlite3
+import argparse
+
+VOWELS = set('aeiou')
+
+# Irregular forms of common words: base, then the forms that map back to it
+IRREGULAR_FORMS = """
+arise arose arisen
+awake awoke awoken
+be am is are was were been being
+bear bore borne born
+beat beaten
+become became
+begin began begun
+bend bent
+bet
+bind bound
+bite bit bitten
+bleed bled
+blow blew blown
+break broke broken
+breed bred
+bring brought
+build built
+burn burnt
+buy bought
+catch caught
+choose chose chosen
+cling clung
+come came
+cost
+creep crept
+cut
+deal dealt
+dig dug
+do does did done doing
+draw drew drawn
+dream dreamt
+drink drank drunk
+drive drove driven
+eat ate eaten
+fall fell fallen
+feed fed
+feel felt
+fight fought
+find found
+flee fled
+fly flew flown flies
+forbid forbade forbidden
+forget forgot forgotten
+forgive forgave forgiven
+freeze froze frozen
+get got gotten
+give gave given
+go goes went gone
+grind ground
+grow grew grown
+hang hung
+have has had having
+hear heard
+hide hid hidden
+hit
+hold held
+hurt
+keep kept
+kneel knelt
+know knew known
+lay laid
+lead led
+lean leant
+leap leapt
+learn learnt
+leave left
+lend lent
+let
+lie lay lain
+light lit
+lose lost
+make made
+mean meant
+meet met
+pay paid
+prove proven
+put
+quit
+read
+ride rode ridden
+ring rang rung
+rise rose risen
+run ran
+say said
+see saw seen
+seek sought
+sell sold
+send sent
+set
+sew sewn
+shake shook shaken
+shine shone
+shoot shot
+show shown
+shrink shrank shrunk
+shut
+sing sang sung
+sink sank sunk
+sit sat
+sleep slept
+slide slid
+speak spoke spoken
+speed sped
+spend spent
+spin spun
+spit spat
+split
+spread
+spring sprang sprung
+stand stood
+steal stole stolen
+stick stuck
+sting stung
+stink stank stunk
+strike struck stricken
+swear swore sworn
+sweep swept
+swim swam swum
+swing swung
+take took taken
+teach taught
+tear tore torn
+tell told
+think thought
+throw threw thrown
+understand understood
+wake woke woken
+wear wore worn
+weep wept
+win won
+wind wound
+write wrote written
+bad worse worst
+far farther further farthest furthest
+good better best
+little less least
+many more most
+much more most
+well better best
+child children
+foot feet
+goose geese
+man men
+mouse mice
+ox oxen
+person people
+tooth teeth
+woman women
+"""
+
+# Short function words get no regular endings: she -> shed or but -> butted would only
+# claim unrelated words
+FUNCTION_WORDS = set("""
+the and but nor for yet via per ago she her his him its our you who why how any few
+may can not too off out all
+""".split())
+
+# Spellings the rules produce that are mostly words of their own, not forms of the word they
+# come from: united is not about units, and goods or manners are not more than one good or manner
+STANDALONE_WORDS = set("""
+united wedding goods earnest customs manners premises gifted talented minded handed
+icing siding bedding willing cunning
+""".split())
+
+def _irregular_forms():
+    forms = {}
+    for line in IRREGULAR_FORMS.strip().splitlines():
+        base, *inflected = line.split()
+        forms[base] = inflected
+    return forms
+
+_IRREGULAR = _irregular_forms()
+
+def _doubles_final_consonant(word):
+    # stop -> stopped, big -> biggest: a single vowel before a final consonant (not w, x or y)
+    return (len(word) >= 3 and word[-1] not in VOWELS and word[-1] not in 'wxy'
+            and word[-2] in VOWELS and word[-3] not in VOWELS)
+
+def _vowel_groups(word):
+    groups = 0
+    previous = False
+    for char in word:
+        vowel = char in VOWELS or char == 'y'
+        if vowel and not previous:
+            groups += 1
+        previous = vowel
+    return groups
+
+def inflections(word):
+    """Rule-based inflected forms of a word (plurals, verb endings, comparatives); the word itself is not included.
+    
+    The rules over-generate on purpose: a spelling nobody uses costs nothing, and forms that are
+    words in their own right are left out when the index is built. Common words the rules would
+    claim (STANDALONE_WORDS) are never returned.
+    """
+    word = word.lower()
+    # Two-letter words are mostly function words too (he, if, by); only their irregular forms count
+    if len(word) < 3 or not word.isalpha() or word in FUNCTION_WORDS:
+        return set(_IRREGULAR.get(word, ()))
+    
+    forms = set(_IRREGULAR.get(word, ()))
+    consonant_y = word.endswith('y') and word[-2] not in VOWELS
+    stem = word[:-1]
+    
+    # Plurals and third person: -s, -es, -ies, -ves
+    if consonant_y:
+        forms.add(stem + 'ies')
+    elif word.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        forms.add(word + 'es')
+    else:
+        forms.add(word + 's')
+        if word.endswith('o'):
+            forms.add(word + 'es')
+        if word.endswith('f') and not word.endswith('ff'):
+            forms.add(stem + 'ves')
+        elif word.endswith('fe'):
+            forms.add(word[:-2] + 'ves')
+    
+    # Past tense and participles: -ed, -ing
+    if consonant_y:
+        forms.update((stem + 'ied', word + 'ing'))
+    elif word.endswith('ie'):
+        forms.update((word + 'd', word[:-2] + 'ying'))
+    elif word.endswith('e'):
+        forms.add(word + 'd')
+        # see -> seeing, but make -> making
+        forms.add(word + 'ing' if word.endswith(('ee', 'ye', 'oe')) else stem + 'ing')
+    else:
+        doubled = _doubles_final_consonant(word)
+        # One syllable always doubles (stopped, not stoped, so caring stays with care, not car);
+        # longer words depend on stress (preferred but visited), so both spellings are kept
+        if not doubled or _vowel_groups(word) > 1:
+            forms.update((word + 'ed', word + 'ing'))
+        if doubled:
+            forms.update((word + word[-1] + 'ed', word + word[-1] + 'ing'))
+    
+    # Superlatives, and -ier comparatives; other -er endings mostly make different
+    # words (corn -> corner, but -> butter, he -> her), so they are left out
+    if consonant_y:
+        forms.update((stem + 'ier', stem + 'iest'))
+    elif word.endswith('e'):
+        forms.add(word + 'st')
+    elif _doubles_final_consonant(word):
+        forms.add(word + word[-1] + 'est')
+        if _vowel_groups(word) > 1:
+            forms.add(word + 'est')
+    else:
+        forms.add(word + 'est')
+    
+    forms.discard(word)
+    return forms - STANDALONE_WORDS
+
+def create_word_forms(cursor):
+    """Create the inflected form index over Words, filling it when it is first created. Does nothing until Words exists."""
+    tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'Words' not in tables:
+        return
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS WordForms (
+            form TEXT PRIMARY KEY,
+            word_id INTEGER NOT NULL,
+            FOREIGN KEY(word_id) REFERENCES Words(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    
+    if 'WordForms' not in tables:
+        rebuild_word_forms(cursor)
+
+def rebuild_word_forms(cursor):
+    """Recompute the form index from Words; returns the number of forms.
+    
+    A form that is a word of its own in the list is not indexed, and a form shared by two
+    words belongs to the more frequent one.
+    """
+    rows = cursor.execute("SELECT id, word FROM Words ORDER BY rank").fetchall()
+    words = {word.lower() for _, word in rows}
+    
+    forms = {}
+    for word_id, word in rows:
+        for form in inflections(word):
+            if form not in words and form not in forms:
+                forms[form] = word_id
+    
+    cursor.execute("DELETE FROM WordForms")
+    cursor.executemany("INSERT INTO WordForms (form, word_id) VALUES (?, ?)", forms.items())
+    return len(forms)
+
+def update_word_forms(db_path='pathway.db', rebuild=False):
+    """Add the form index to an existing database, optionally recomputing it."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        create_word_forms(cursor)
+        if rebuild:
+            rebuild_word_forms(cursor)
+            # Running apps reload their catalog, and with it the forms, when the version stamp moves
+            if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'CatalogVersion'").fetchone():
+                # setup_db imports this module, so its helper is imported here
+                from setup_db import bump_catalog_version
+                bump_catalog_version(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the inflected form index, or look words up in it')
+    parser.add_argument('words', nargs='*', help='Words to look up')
+    parser.add_argument('--db', default='pathway.db', help='Path to the database')
+    parser.add_argument('--rebuild', action='store_true', help='Recompute the index from the Words table')
+    args = parser.parse_args()
+    
+    update_word_forms(args.db, args.rebuild)
+    if not args.words:
+        print("Word forms rebuilt!" if args.rebuild else "Word forms are up to date!")
+        return
+    
+    conn = sqlite3.connect(args.db)
+    for word in args.words:
+        row = conn.execute("""
+            SELECT w.word, w.step, w.level
+            FROM Words w
+            WHERE w.word = ?
+               OR w.id = (SELECT word_id FROM WordForms WHERE form = ?)
+        """, (word, word.lower())).fetchone()
+        if row:
+            print(f"{word}: {row[0]} (Step {row[1]}, Level {row[2]})")
+        else:
+            print(f"{word}: not in the word list")
+    conn.close()
+
+if __name__ == '__main__':
+    main()
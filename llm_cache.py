@@ -0,0 +1,153 @@
+import hashlib
+import json
+import threading
+import time
+
+# Generated text is kept for a week, and only the most recently used entries are kept
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+MAX_ENTRIES = 500
+
+def create_llm_cache_table(cursor):
+    """Create the table that stores generated stories and questions."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS LLMCache (
+            cache_key TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            model TEXT NOT NULL,
+            prompt_version INTEGER NOT NULL,
+            words TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_llmcache_last_used ON LLMCache(last_used)")
+
+def normalize_words(words):
+    """Lowercase, trim and sort a word list so the same set always gives the same key."""
+    return sorted({word.strip().lower() for word in words if word.strip()})
+
+def make_cache_key(kind, model, prompt_version, words):
+    """Hash everything that affects the generated text into one key."""
+    material = json.dumps([kind, model, prompt_version, normalize_words(words)])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """LRU + TTL cache of Ollama responses stored in the LLMCache table."""
+    
+    def __init__(self, ttl=CACHE_TTL_SECONDS, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._ready = False
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        # Hits are noted here (key -> [last used, count]) and written with the next put or flush,
+        # so a cache hit is a single SELECT with no write transaction
+        self._pending = {}
+    
+    def _ensure_table(self, conn):
+        # Databases created before the cache existed don't have the table yet
+        if self._ready:
+            return
+        create_llm_cache_table(conn.cursor())
+        conn.commit()
+        self._ready = True
+    
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+    
+    def get(self, conn, key):
+        """Return the cached response for a key, or None if it is missing or expired.
+        
+        Nothing is written here: expired rows are removed by the next put.
+        """
+        self._ensure_table(conn)
+        now = time.time()
+        
+        row = conn.execute("SELECT response, created_at FROM LLMCache WHERE cache_key = ?", (key,)).fetchone()
+        if row is None or now - row[1] > self.ttl:
+            self._count('_misses')
+            return None
+        
+        with self._lock:
+            self._hits += 1
+            pending = self._pending.setdefault(key, [now, 0])
+            pending[0] = max(pending[0], now)
+            pending[1] += 1
+        return row[0]
+    
+    def _write_pending(self, conn):
+        # Record the hits noted since the last write (the caller commits)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        conn.executemany(
+            "UPDATE LLMCache SET last_used = MAX(last_used, ?), hits = hits + ? WHERE cache_key = ?",
+            [(last_used, hits, key) for key, (last_used, hits) in pending.items()]
+        )
+    
+    def flush(self, conn):
+        """Write the hit counts and last-used times noted since the last put."""
+        self._ensure_table(conn)
+        if self._pending:
+            self._write_pending(conn)
+            conn.commit()
+    
+    def put(self, conn, key, kind, model, prompt_version, words, response):
+        """Store a response, then drop expired and least recently used entries."""
+        self._ensure_table(conn)
+        now = time.time()
+        
+        # Recent hits count towards the LRU order below
+        self._write_pending(conn)
+        conn.execute("""
+            INSERT INTO LLMCache (cache_key, kind, model, prompt_version, words, response, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                response = excluded.response,
+                created_at = excluded.created_at,
+                last_used = excluded.last_used,
+                hits = 0
+        """, (key, kind, model, prompt_version, json.dumps(normalize_words(words)), response, now, now))
+        
+        evicted = conn.execute("DELETE FROM LLMCache WHERE created_at < ?", (now - self.ttl,)).rowcount
+        evicted += conn.execute("""
+            DELETE FROM LLMCache WHERE cache_key IN (
+                SELECT cache_key FROM LLMCache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,)).rowcount
+        conn.commit()
+        
+        self._count('_stores')
+        self._count('_evictions', evicted)
+    
+    def clear(self, conn):
+        """Remove every cached response."""
+        self._ensure_table(conn)
+        with self._lock:
+            self._pending = {}
+        conn.execute("DELETE FROM LLMCache")
+        conn.commit()
+    
+    def stats(self, conn):
+        """Return hit/miss counters and the current size of the cache."""
+        self._ensure_table(conn)
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(response)), 0) FROM LLMCache").fetchone()
+        
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': entries,
+                'response_chars': size,
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else None,
+                'stores': self._stores,
+                'evictions': self._evictions
+            }
@@ -0,0 +1,228 @@
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COMMIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# SQL counters for the request running on this thread
+_current = threading.local()
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+    
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+    
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+class Metrics:
+    """Counters and histograms kept in memory; the text format is only built when /metrics is scraped."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._request_latency = {}
+        self._sql_statements = {}
+        self._sql_seconds = {}
+        self._sql_rows = {}
+        self._ollama_latency = {}
+        self._ollama_first_token = {}
+        self._ollama_errors = {}
+        self._write_batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self._write_commit_latency = Histogram(COMMIT_BUCKETS)
+        self._write_failures = 0
+        self._gauges = []
+    
+    def start_request(self):
+        """Begin counting SQL work for the request on this thread."""
+        _current.stats = [0, 0.0, 0]  # statements, seconds, rows
+    
+    def finish_request(self, route, method, status, seconds):
+        """Record a finished request together with the SQL work it did."""
+        stats = getattr(_current, 'stats', None) or [0, 0.0, 0]
+        _current.stats = None
+        
+        with self._lock:
+            key = (route, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._request_latency.setdefault((route, method), Histogram()).observe(seconds)
+            self._sql_statements[route] = self._sql_statements.get(route, 0) + stats[0]
+            self._sql_seconds[route] = self._sql_seconds.get(route, 0.0) + stats[1]
+            self._sql_rows[route] = self._sql_rows.get(route, 0) + stats[2]
+    
+    def observe_ollama(self, mode, seconds, first_token_seconds=None, error=False):
+        """Record one call to Ollama (mode is 'generate' or 'stream')."""
+        with self._lock:
+            self._ollama_latency.setdefault(mode, Histogram()).observe(seconds)
+            if first_token_seconds is not None:
+                self._ollama_first_token.setdefault(mode, Histogram()).observe(first_token_seconds)
+            if error:
+                self._ollama_errors[mode] = self._ollama_errors.get(mode, 0) + 1
+    
+    def observe_write_batch(self, size, commit_seconds, failed=0):
+        """Record one group commit of the database writer."""
+        with self._lock:
+            self._write_batch_size.observe(size)
+            self._write_commit_latency.observe(commit_seconds)
+            self._write_failures += failed
+    
+    def add_gauges(self, name, help_text, collect):
+        """Register a callback returning {label_value_tuple_or_None: value}, read at scrape time."""
+        self._gauges.append((name, help_text, collect))
+    
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        
+        with self._lock:
+            _counter(lines, 'pathway_http_requests_total', 'HTTP requests by route, method and status.',
+                     ('route', 'method', 'status'), self._requests)
+            _histogram(lines, 'pathway_http_request_duration_seconds', 'HTTP request latency.',
+                       ('route', 'method'), self._request_latency)
+            _counter(lines, 'pathway_sql_statements_total', 'SQL statements executed, by route.',
+                     ('route',), self._sql_statements)
+            _counter(lines, 'pathway_sql_duration_seconds_total', 'Time spent executing SQL, by route.',
+                     ('route',), self._sql_seconds)
+            _counter(lines, 'pathway_sql_rows_total', 'Rows fetched from SQLite, by route.',
+                     ('route',), self._sql_rows)
+            _histogram(lines, 'pathway_ollama_request_duration_seconds', 'Time until Ollama finished a generation.',
+                       ('mode',), self._ollama_latency)
+            _histogram(lines, 'pathway_ollama_first_token_seconds', 'Time until Ollama streamed its first token.',
+                       ('mode',), self._ollama_first_token)
+            _counter(lines, 'pathway_ollama_errors_total', 'Failed Ollama calls.', ('mode',), self._ollama_errors)
+            _histogram(lines, 'pathway_write_batch_size', 'Writes committed together by the database writer.',
+                       (), {(): self._write_batch_size})
+            _histogram(lines, 'pathway_write_commit_duration_seconds', 'Time taken by each group commit.',
+                       (), {(): self._write_commit_latency})
+            _counter(lines, 'pathway_write_failures_total', 'Writes rolled back by the database writer.',
+                     (), {(): self._write_failures})
+        
+        for name, help_text, collect in self._gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in collect().items():
+                lines.append(f"{name}{_labels(labels or ())} {_number(value)}")
+        
+        return '\n'.join(lines) + '\n'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _number(value):
+    if value is None:
+        return 'NaN'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _counter(lines, name, help_text, label_names, values):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for key, value in sorted(values.items()):
+        key = key if isinstance(key, tuple) else (key,)
+        lines.append(f"{name}{_labels(list(zip(label_names, key)))} {_number(value)}")
+
+def _histogram(lines, name, help_text, label_names, histograms):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items()):
+        key = key if isinstance(key, tuple) else (key,)
+        pairs = list(zip(label_names, key))
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f"{name}_bucket{_labels(pairs + [('le', le)])} {cumulative}")
+        lines.append(f"{name}_sum{_labels(pairs)} {repr(histogram.total)}")
+        lines.append(f"{name}_count{_labels(pairs)} {histogram.count}")
+
+def count_sql(stats):
+    """Add the SQL work done on this thread to `stats` ([statements, seconds, rows]); None stops counting."""
+    _current.stats = stats
+
+def add_sql(stats):
+    """Add SQL work done for this thread elsewhere (such as on the database writer) to its request."""
+    current = getattr(_current, 'stats', None)
+    if current is not None:
+        current[0] += stats[0]
+        current[1] += stats[1]
+        current[2] += stats[2]
+
+def _record_sql(seconds, rows=0):
+    stats = getattr(_current, 'stats', None)
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] += rows
+
+def _record_rows(rows):
+    stats = getattr(_current, 'stats', None)
+    if stats is not None:
+        stats[2] += rows
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that adds its statement count, time and fetched rows to the current request."""
+    
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_sql(time.perf_counter() - start)
+    
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_sql(time.perf_counter() - start)
+    
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            _record_rows(1)
+        return row
+    
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        _record_rows(len(rows))
+        return rows
+    
+    def fetchall(self):
+        rows = super().fetchall()
+        _record_rows(len(rows))
+        return rows
+    
+    def __next__(self):
+        row = super().__next__()
+        _record_rows(1)
+        return row
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute shortcuts) are InstrumentedCursors."""
+    
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,45 @@
+import json
+import requests
+
+OLLAMA_TIMEOUT = 60  # Seconds to wait for Ollama (per chunk when streaming)
+
+def generate(prompt, url, model, timeout=OLLAMA_TIMEOUT):
+    """Run a prompt through Ollama and return the whole response text."""
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": False
+    }
+    
+    response = requests.post(url, json=payload, timeout=timeout)
+    response.raise_for_status()
+    
+    return response.json().get('response')
+
+def stream_generate(prompt, url, model, timeout=OLLAMA_TIMEOUT):
+    """Run a prompt through Ollama and yield the response text as it is produced."""
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": True
+    }
+    
+    response = requests.post(url, json=payload, timeout=timeout, stream=True)
+    try:
+        response.raise_for_status()
+        
+        # Ollama streams one JSON object per line
+        for line in response.iter_lines():
+            if not line:
+                continue
+            
+            chunk = json.loads(line)
+            if chunk.get('error'):
+                raise RuntimeError(chunk['error'])
+            if chunk.get('response'):
+                yield chunk['response']
+            if chunk.get('done'):
+                break
+    finally:
+        # Closing the connection tells Ollama to stop generating (e.g. when the browser cancels)
+        response.close()
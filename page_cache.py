@@ -0,0 +1,75 @@
+import gzip
+import hashlib
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+class CachedPage:
+    """A static file (or a generated body) held in memory with precompressed variants and a strong ETag."""
+    
+    def __init__(self, path, content_type='text/html; charset=utf-8'):
+        self.path = path
+        self.content_type = content_type
+        self.mtime = None
+        self.etag = None
+        self.variants = {}
+        self._lock = threading.Lock()
+    
+    def load(self):
+        """Read the file and rebuild the compressed variants."""
+        with open(self.path, 'rb') as file:
+            body = file.read()
+        self.set_content(body, mtime=os.path.getmtime(self.path))
+    
+    def set_content(self, body, etag=None, mtime=None):
+        """Replace the content with a body built in memory; the ETag defaults to a hash of the body."""
+        variants = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            variants['br'] = brotli.compress(body, quality=11)
+        
+        with self._lock:
+            self.variants = variants
+            self.etag = etag or hashlib.sha256(body).hexdigest()[:32]
+            self.mtime = mtime
+    
+    def refresh(self):
+        """Reload the file if it changed on disk since it was last loaded."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self.mtime:
+            self.load()
+    
+    def choose_encoding(self, accept_encoding):
+        """Pick the smallest variant the client accepts."""
+        accepted = set()
+        for part in (accept_encoding or '').split(','):
+            coding, _, params = part.strip().partition(';')
+            if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                continue
+            accepted.add(coding.strip().lower())
+        
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and (encoding in accepted or '*' in accepted):
+                return encoding
+        return 'identity'
+    
+    def etag_for(self, encoding):
+        """Strong ETag for one encoded representation."""
+        if encoding == 'identity':
+            return f'"{self.etag}"'
+        return f'"{self.etag}-{encoding}"'
+    
+    def matches(self, if_none_match):
+        """Check an If-None-Match header against any representation of the current content."""
+        if not if_none_match or self.etag is None:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return any(self.etag_for(encoding) in tags for encoding in self.variants)
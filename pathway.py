@@ -0,0 +1,255 @@
+import argparse
+import shlex
+import sqlite3
+import sys
+
+# Only argparse is imported up front; each command imports what it needs when it runs,
+# so `pathway fetch 3 2` doesn't pay for the search index or the clipboard
+
+DATABASE = 'pathway.db'
+STEPS = 28
+LEVELS = 5
+
+class BatchError(Exception):
+    """A line of a batch file that could not be parsed or run."""
+
+class _BatchParser(argparse.ArgumentParser):
+    # In a batch file a bad line should stop the batch with its line number, not exit halfway
+    def error(self, message):
+        raise BatchError(message)
+
+def ask_student(student):
+    """Prompt for the student name if it was not given; exits if it is empty."""
+    if student is None:
+        student = input("Enter student name: ").strip()
+    
+    if not student:
+        print("Student name cannot be empty.")
+        sys.exit(1)
+    return student
+
+def ask_step_level(step, level):
+    """Prompt for whichever of step and level was not given and check both; exits on bad input."""
+    if step is None:
+        try:
+            step = int(input(f"Enter step (1-{STEPS}): "))
+        except ValueError:
+            print("Invalid step number.")
+            sys.exit(1)
+    
+    if level is None:
+        try:
+            level = int(input(f"Enter level (1-{LEVELS}): "))
+        except ValueError:
+            print("Invalid level number.")
+            sys.exit(1)
+    
+    if not (1 <= step <= STEPS):
+        print(f"Step must be between 1 and {STEPS}.")
+        sys.exit(1)
+    
+    if not (1 <= level <= LEVELS):
+        print(f"Level must be between 1 and {LEVELS}.")
+        sys.exit(1)
+    
+    return step, level
+
+def _bounded(name, highest):
+    def parse(value):
+        try:
+            number = int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid {name} number: {value}")
+        if not 1 <= number <= highest:
+            raise argparse.ArgumentTypeError(f"{name} must be between 1 and {highest}")
+        return number
+    return parse
+
+def run_fetch(args, conn):
+    from subgroup_fetcher import get_words_by_step_level, format_clipboard_output
+    
+    words = get_words_by_step_level(args.step, args.level, args.db)
+    if not words:
+        return "No words found for the specified step and level."
+    return format_clipboard_output(args.step, args.level, words)
+
+def run_assign(args, conn):
+    from learning_manager import get_words_by_step_level, save_learning_words, format_clipboard_output
+    
+    words = get_words_by_step_level(args.step, args.level, args.db)
+    if args.numbers:
+        # Numbers are positions in the level, as printed by `fetch` (1 is its most frequent word)
+        if not all(1 <= number <= len(words) for number in args.numbers):
+            raise BatchError(f"word numbers must be between 1 and {len(words)}")
+        words = [words[number - 1] for number in dict.fromkeys(args.numbers)]
+    
+    if not words:
+        return "No words found for the specified step and level."
+    save_learning_words(args.student, [word_id for word_id, _ in words], conn=conn)
+    return format_clipboard_output(args.student, args.step, args.level, words)
+
+def run_retrieve(args, conn):
+    from retrieve_learning import get_learning_words, format_clipboard_output
+    
+    return format_clipboard_output(args.student, get_learning_words(args.student, args.db, conn=conn))
+
+def run_add(args, conn):
+    from update_learning import add_words_to_learning
+    
+    add_words_to_learning(args.student, args.word_ids, conn=conn)
+    return f"Added {len(args.word_ids)} word(s) to {args.student}'s learning list."
+
+def run_remove(args, conn):
+    from update_learning import remove_words_from_learning
+    
+    remove_words_from_learning(args.student, args.word_ids, conn=conn)
+    return f"Removed {len(args.word_ids)} word(s) from {args.student}'s learning list."
+
+def run_list(args, conn):
+    from update_learning import get_learning_words, list_all_words, format_words_list
+    
+    if args.student is None:
+        return "All words in database:\n" + format_words_list(list_all_words(args.db))
+    
+    words = get_learning_words(args.student, args.db, conn=conn)
+    if not words:
+        return f"{args.student} has no words in learning list."
+    return f"{args.student}'s current learning words:\n" + format_words_list(words)
+
+def run_search(args, conn):
+    from search import search_words
+    
+    found = search_words(conn, args.query, args.limit)
+    if not found['results']:
+        return "No matching words found."
+    
+    lines = []
+    for match in found['results']:
+        where = 'special word' if match['type'] == 'special' else f"Step {match['step']}, Level {match['level']}"
+        lines.append(f"{match['id']:5d}  {match['word']:<20} {where}")
+    lines.append(f"\n{found['total']} match(es)")
+    return "\n".join(lines)
+
+def add_commands(subparsers):
+    """Register the commands that can be run on their own or as lines of a batch file."""
+    step = _bounded('step', STEPS)
+    level = _bounded('level', LEVELS)
+    
+    parser = subparsers.add_parser('fetch', help='Show the words of a step and level')
+    parser.add_argument('step', type=step, help=f'Step number (1-{STEPS})')
+    parser.add_argument('level', type=level, help=f'Level number (1-{LEVELS})')
+    parser.set_defaults(run=run_fetch)
+    
+    parser = subparsers.add_parser('assign', help="Put words of a step and level on a student's learning list")
+    parser.add_argument('student', help='Student name')
+    parser.add_argument('step', type=step, help=f'Step number (1-{STEPS})')
+    parser.add_argument('level', type=level, help=f'Level number (1-{LEVELS})')
+    parser.add_argument('numbers', type=int, nargs='*', help='Word numbers within the level (default: all)')
+    parser.set_defaults(run=run_assign)
+    
+    parser = subparsers.add_parser('retrieve', help="Show a student's learning words by step and level")
+    parser.add_argument('student', help='Student name')
+    parser.set_defaults(run=run_retrieve)
+    
+    parser = subparsers.add_parser('add', help="Add words to a student's learning list by ID")
+    parser.add_argument('student', help='Student name')
+    parser.add_argument('word_ids', type=int, nargs='+', help='Word IDs')
+    parser.set_defaults(run=run_add)
+    
+    parser = subparsers.add_parser('remove', help="Remove words from a student's learning list by ID")
+    parser.add_argument('student', help='Student name')
+    parser.add_argument('word_ids', type=int, nargs='+', help='Word IDs')
+    parser.set_defaults(run=run_remove)
+    
+    parser = subparsers.add_parser('list', help="List a student's learning words with IDs, or every word")
+    parser.add_argument('student', nargs='?', help='Student name (default: list every word)')
+    parser.set_defaults(run=run_list)
+    
+    parser = subparsers.add_parser('search', help='Search the word lists by spelling')
+    parser.add_argument('query', help='Word or part of a word to look for')
+    parser.add_argument('--limit', type=int, default=20, help='Number of results to show')
+    parser.set_defaults(run=run_search)
+
+def read_batch(path):
+    """Parse a batch file (one command per line, # for comments) into (line number, args) pairs.
+    
+    Every line is checked before anything runs, so a typo on the last line doesn't leave half a batch applied.
+    """
+    parser = _BatchParser(prog='batch', add_help=False)
+    add_commands(parser.add_subparsers(dest='command', required=True))
+    
+    file = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        commands = []
+        for number, line in enumerate(file, 1):
+            try:
+                words = shlex.split(line, comments=True)
+                if words:
+                    commands.append((number, parser.parse_args(words)))
+            except (BatchError, ValueError) as error:
+                raise BatchError(f"line {number}: {error}")
+        return commands
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+def run_batch(path, db_path, conn):
+    """Run every command of a batch file in one transaction; nothing is saved if any of them fails."""
+    commands = read_batch(path)
+    try:
+        for number, args in commands:
+            args.db = db_path
+            try:
+                output = args.run(args, conn)
+            except BatchError as error:
+                raise BatchError(f"line {number}: {error}")
+            print(output)
+            print()
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return len(commands)
+
+def main():
+    parser = argparse.ArgumentParser(prog='pathway', description='Pathway vocabulary tools')
+    parser.add_argument('--db', default=DATABASE, help='Path to the database')
+    parser.add_argument('--batch', metavar='FILE',
+                        help="Run the commands in FILE ('-' for standard input) in one transaction")
+    parser.add_argument('--copy', action='store_true', help='Also copy the output to the clipboard')
+    subparsers = parser.add_subparsers(dest='command')
+    add_commands(subparsers)
+    args = parser.parse_args()
+    
+    if args.batch is None and args.command is None:
+        parser.print_help()
+        return
+    if args.batch is not None and args.command is not None:
+        parser.error('give either a command or --batch, not both')
+    
+    from sqltrace import connect
+    
+    # One connection for the whole run; batches share a single transaction on it
+    conn = connect(args.db)
+    try:
+        if args.batch is not None:
+            count = run_batch(args.batch, args.db, conn)
+            print(f"Ran {count} command(s).")
+            return
+        
+        output = args.run(args, conn)
+        conn.commit()
+    except (BatchError, OSError, sqlite3.Error) as error:
+        print(f"Error: {error}")
+        sys.exit(1)
+    finally:
+        conn.close()
+    
+    print(output)
+    if args.copy:
+        import pyperclip
+        pyperclip.copy(output)
+        print("\nCopied to clipboard!")
+
+if __name__ == '__main__':
+    main()
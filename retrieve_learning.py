@@ -1,25 +1,30 @@
-import sqlite3
-import pyperclip
 import argparse
-import sys
 
-def get_learning_words(student_name, db_path='pathway.db'):
+from catalog import get_catalog
+from students import get_student_id
+from sqltrace import connect
+from pathway import ask_student
+
+def get_learning_words(student_name, db_path='pathway.db', conn=None):
     """Get all learning words for a student, grouped by step and level."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT w.word, w.step, w.level, w.rank
-        FROM StudentWords sw
-        JOIN Words w ON sw.word_id = w.id
-        WHERE sw.student_name = ? AND sw.status = 'learning'
-        ORDER BY w.step, w.level, w.rank
-    """, (student_name,))
+    own_conn = conn is None
+    if own_conn:
+        conn = connect(db_path)
     
-    words = cursor.fetchall()
-    conn.close()
+    try:
+        student_id = get_student_id(conn, student_name)
+        word_ids = [row[0] for row in conn.execute("""
+            SELECT word_id
+            FROM StudentWords
+            WHERE student_id = ? AND status = 'learning'
+        """, (student_id,))]
+    finally:
+        if own_conn:
+            conn.close()
     
-    return words
+    # The catalog sorts by step, level and rank, so SQLite can answer from the index alone
+    entries = get_catalog(db_path).in_pathway_order(word_ids)
+    return [(entry['word'], entry['step'], entry['level'], entry['rank']) for entry in entries]
 
 def format_clipboard_output(student_name, words):
     """Format the output for clipboard."""
@@ -51,17 +56,13 @@ def main():
     args = parser.parse_args()
     
     # Prompt for student name if not provided
-    if args.student is None:
-        args.student = input("Enter student name: ").strip()
-    
-    if not args.student:
-        print("Student name cannot be empty.")
-        sys.exit(1)
+    args.student = ask_student(args.student)
     
     # Get learning words
     words = get_learning_words(args.student)
     
     # Format and copy to clipboard
+    import pyperclip
     output = format_clipboard_output(args.student, words)
     pyperclip.copy(output)
     
@@ -0,0 +1,196 @@
+import sqlite3
+import argparse
+from datetime import date, datetime, timedelta, timezone
+
+# Reward types written by app.py, in the order they are reported
+REWARD_TYPES = ('word_mastered', 'special_word_mastered', 'special_word_added')
+
+STATS_WEEKS = 12  # Weekly totals returned by the stats endpoint
+CHART_DAYS = 28  # Daily counts returned for the activity chart
+
+# Statements run by the Rewards triggers ({row} is NEW or OLD); reward_date is a UTC timestamp
+_DAY = "COALESCE(date({row}.reward_date), date('now'))"
+
+_ADD = f"""
+            INSERT INTO RewardDaily (student_id, day, reward_type, count)
+            VALUES ({{row}}.student_id, {_DAY}, {{row}}.reward_type, 1)
+            ON CONFLICT(student_id, day, reward_type) DO UPDATE SET count = count + 1;
+            INSERT INTO RewardTotals (student_id, reward_type, count)
+            VALUES ({{row}}.student_id, {{row}}.reward_type, 1)
+            ON CONFLICT(student_id, reward_type) DO UPDATE SET count = count + 1;"""
+
+_REMOVE = f"""
+            UPDATE RewardDaily SET count = count - 1
+            WHERE student_id = {{row}}.student_id AND day = {_DAY} AND reward_type = {{row}}.reward_type;
+            DELETE FROM RewardDaily
+            WHERE student_id = {{row}}.student_id AND day = {_DAY} AND reward_type = {{row}}.reward_type AND count <= 0;
+            UPDATE RewardTotals SET count = count - 1
+            WHERE student_id = {{row}}.student_id AND reward_type = {{row}}.reward_type;
+            DELETE FROM RewardTotals
+            WHERE student_id = {{row}}.student_id AND reward_type = {{row}}.reward_type AND count <= 0;"""
+
+def create_reward_rollups(cursor):
+    """Create the reward rollup tables and the triggers on Rewards that keep them current.
+    
+    The rollups are filled from the existing rewards when they are first created. Does nothing
+    until the Rewards table exists.
+    """
+    tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'Rewards' not in tables:
+        return
+    
+    # One row per student, day and reward type that has any rewards
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS RewardDaily (
+            student_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            reward_type TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (student_id, day, reward_type)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS RewardTotals (
+            student_id INTEGER NOT NULL,
+            reward_type TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (student_id, reward_type)
+        ) WITHOUT ROWID
+    """)
+    
+    # Recreated every time so databases pick up changes to the rollups
+    for event in ('insert', 'update', 'delete'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_rewards_rollup_{event}")
+    
+    cursor.execute(f"""
+        CREATE TRIGGER trg_rewards_rollup_insert AFTER INSERT ON Rewards
+        BEGIN{_ADD.format(row='NEW')}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_rewards_rollup_update AFTER UPDATE OF student_id, reward_type, reward_date ON Rewards
+        BEGIN{_REMOVE.format(row='OLD')}{_ADD.format(row='NEW')}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_rewards_rollup_delete AFTER DELETE ON Rewards
+        BEGIN{_REMOVE.format(row='OLD')}
+        END
+    """)
+    
+    if 'RewardDaily' not in tables:
+        rebuild_reward_rollups(cursor)
+
+def rebuild_reward_rollups(cursor):
+    """Recompute both rollups from the Rewards table."""
+    cursor.execute("DELETE FROM RewardDaily")
+    cursor.execute("DELETE FROM RewardTotals")
+    cursor.execute("""
+        INSERT INTO RewardDaily (student_id, day, reward_type, count)
+        SELECT student_id, COALESCE(date(reward_date), date('now')), reward_type, COUNT(*)
+        FROM Rewards
+        GROUP BY 1, 2, 3
+    """)
+    cursor.execute("""
+        INSERT INTO RewardTotals (student_id, reward_type, count)
+        SELECT student_id, reward_type, SUM(count)
+        FROM RewardDaily
+        GROUP BY 1, 2
+    """)
+
+def _by_type():
+    return {reward_type: 0 for reward_type in REWARD_TYPES}
+
+def _add(bucket, reward_type, count):
+    bucket['by_type'][reward_type] = bucket['by_type'].get(reward_type, 0) + count
+    bucket['total'] += count
+
+def current_streak(conn, student_id, today):
+    """Count consecutive days with rewards, ending today (or yesterday if nothing happened today yet)."""
+    rows = conn.execute("""
+        SELECT DISTINCT day
+        FROM RewardDaily
+        WHERE student_id = ? AND day <= ?
+        ORDER BY day DESC
+    """, (student_id, today.isoformat()))
+    
+    # Rows are read newest first and only until the first gap, so the cost grows with the streak, not the history
+    last_active_day = None
+    streak = 0
+    expected = None
+    for (day,) in rows:
+        day = date.fromisoformat(day)
+        if last_active_day is None:
+            last_active_day = day
+            if day < today - timedelta(days=1):
+                break
+            expected = day
+        if day != expected:
+            break
+        streak += 1
+        expected = day - timedelta(days=1)
+    
+    return {'current': streak, 'last_active_day': last_active_day.isoformat() if last_active_day else None}
+
+def read_reward_stats(conn, student_id, today=None, weeks=STATS_WEEKS, chart_days=CHART_DAYS):
+    """Summarize a student's rewards from the rollups: totals, the current streak, weekly totals and a daily chart."""
+    today = today or datetime.now(timezone.utc).date()
+    
+    totals = _by_type()
+    for reward_type, count in conn.execute(
+            "SELECT reward_type, count FROM RewardTotals WHERE student_id = ?", (student_id,)).fetchall():
+        totals[reward_type] = count
+    
+    # Weeks start on Monday; the window reads at most a few rollup rows per day
+    this_week = today - timedelta(days=today.weekday())
+    first_week = this_week - timedelta(weeks=weeks - 1)
+    first_chart_day = today - timedelta(days=chart_days - 1)
+    window_start = min(first_week, first_chart_day)
+    
+    week_buckets = [{'week_start': (first_week + timedelta(weeks=i)).isoformat(), 'total': 0, 'by_type': _by_type()}
+                    for i in range(weeks)]
+    day_buckets = [{'day': (first_chart_day + timedelta(days=i)).isoformat(), 'total': 0, 'by_type': _by_type()}
+                   for i in range(chart_days)]
+    
+    for day, reward_type, count in conn.execute("""
+        SELECT day, reward_type, count
+        FROM RewardDaily
+        WHERE student_id = ? AND day >= ? AND day <= ?
+    """, (student_id, window_start.isoformat(), today.isoformat())).fetchall():
+        day = date.fromisoformat(day)
+        if day >= first_week:
+            _add(week_buckets[(day - first_week).days // 7], reward_type, count)
+        if day >= first_chart_day:
+            _add(day_buckets[(day - first_chart_day).days], reward_type, count)
+    
+    return {
+        'today': today.isoformat(),
+        'totals': dict(totals, all=sum(totals.values())),
+        'streak': current_streak(conn, student_id, today),
+        'weeks': week_buckets,
+        'days': day_buckets
+    }
+
+def update_reward_rollups(db_path='pathway.db', rebuild=False):
+    """Add the reward rollups to an existing database, optionally recomputing them."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        create_reward_rollups(cursor)
+        if rebuild:
+            rebuild_reward_rollups(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Add or rebuild the reward statistics rollups')
+    parser.add_argument('--db', default='pathway.db', help='Path to the database')
+    parser.add_argument('--rebuild', action='store_true', help='Recompute the rollups from the Rewards table')
+    args = parser.parse_args()
+    
+    update_reward_rollups(args.db, args.rebuild)
+    print("Reward rollups rebuilt!" if args.rebuild else "Reward rollups are up to date!")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+import sqlite3
+import argparse
+from collections import Counter
+
+SEARCH_LIMIT = 20  # Results returned by one search
+CANDIDATE_LIMIT = 200  # Index matches re-ranked in Python for each search
+MIN_TRIGRAM_QUERY = 3  # Shorter queries can't use the trigram index and use prefix lookups instead
+
+# Each source table keeps its rows in WordSearch under its own rowid range
+# (Words ids as they are, SpecialWords ids negated), so triggers can find them by rowid
+SOURCES = {
+    'Words': ('word', 'NEW.id', 'OLD.id', 'NEW.step', 'NEW.level', 'word, step, level'),
+    'SpecialWords': ('special', '-NEW.id', '-OLD.id', 'NULL', 'NULL', 'word')
+}
+
+def create_search_index(cursor):
+    """Create the trigram search index and the triggers that keep it in sync; tables that don't exist yet are skipped."""
+    tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS WordSearch USING fts5(
+            word,
+            kind UNINDEXED,
+            step UNINDEXED,
+            level UNINDEXED,
+            tokenize = 'trigram'
+        )
+    """)
+    
+    for table, (kind, new_rowid, old_rowid, step, level, indexed_columns) in SOURCES.items():
+        if table not in tables:
+            continue
+        prefix = f"trg_{table.lower()}_search"
+        insert = f"""
+            INSERT INTO WordSearch (rowid, word, kind, step, level)
+            VALUES ({new_rowid}, NEW.word, '{kind}', {step}, {level});"""
+        delete = f"""
+            DELETE FROM WordSearch WHERE rowid = {old_rowid};"""
+        
+        # Recreated every time so databases pick up changes to what is indexed
+        for event in ('insert', 'update', 'delete'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {prefix}_{event}")
+        
+        cursor.execute(f"CREATE TRIGGER {prefix}_insert AFTER INSERT ON {table} BEGIN{insert} END")
+        cursor.execute(f"CREATE TRIGGER {prefix}_update AFTER UPDATE OF {indexed_columns} ON {table} BEGIN{delete}{insert} END")
+        cursor.execute(f"CREATE TRIGGER {prefix}_delete AFTER DELETE ON {table} BEGIN{delete} END")
+    
+    if 'WordSearch' not in tables:
+        rebuild_search_index(cursor, tables)
+
+def rebuild_search_index(cursor, tables=None):
+    """Refill the search index from Words and SpecialWords."""
+    if tables is None:
+        tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    
+    cursor.execute("DELETE FROM WordSearch")
+    if 'Words' in tables:
+        cursor.execute("""
+            INSERT INTO WordSearch (rowid, word, kind, step, level)
+            SELECT id, word, 'word', step, level FROM Words
+        """)
+    if 'SpecialWords' in tables:
+        cursor.execute("""
+            INSERT INTO WordSearch (rowid, word, kind, step, level)
+            SELECT -id, word, 'special', NULL, NULL FROM SpecialWords
+        """)
+
+def trigrams(text):
+    """The set of three-character slices of a lowercased string."""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+def _candidates(conn, query):
+    if len(query) < MIN_TRIGRAM_QUERY:
+        # Too short for trigrams: a prefix range on the UNIQUE word indexes
+        upper = query + '\U0010ffff'
+        rows = conn.execute("""
+            SELECT id, word, 'word', step, level FROM Words WHERE word >= ? AND word < ?
+            UNION ALL
+            SELECT -id, word, 'special', NULL, NULL FROM SpecialWords WHERE word >= ? AND word < ?
+            LIMIT ?
+        """, (query, upper, query, upper, CANDIDATE_LIMIT))
+        return rows.fetchall()
+    
+    # Any shared trigram makes a candidate, so misspellings still match; bm25 puts the closest first
+    match = ' OR '.join(_quote(gram) for gram in sorted(trigrams(query)))
+    return conn.execute("""
+        SELECT rowid, word, kind, step, level
+        FROM WordSearch
+        WHERE WordSearch MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    """, (match, CANDIDATE_LIMIT)).fetchall()
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (a swap of neighbours counts as one edit); stops early above `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    
+    # Only cells within `limit` of the diagonal can stay within the limit, so the rest are never computed
+    over = limit + 1
+    before = None
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        char = a[i - 1]
+        row = [i if i <= limit else over] + [over] * len(b)
+        row_best = row[0]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = previous[j - 1] if char == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if row[j - 1] + 1 < value:
+                value = row[j - 1] + 1
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1] and before[j - 2] + 1 < value:
+                value = before[j - 2] + 1
+            if value > over:
+                value = over
+            row[j] = value
+            if value < row_best:
+                row_best = value
+        if row_best > limit:
+            return over
+        before, previous = previous, row
+    return previous[-1]
+
+def bag_distance(counts, word):
+    """A cheap lower bound on the edit distance: letters one side has and the other lacks (`counts` from the query)."""
+    remaining = dict(counts)
+    extra = 0
+    for char in word:
+        if remaining.get(char, 0) > 0:
+            remaining[char] -= 1
+        else:
+            extra += 1
+    return max(extra, sum(remaining.values()))
+
+def allowed_typos(query):
+    """How many edits a misspelled query may be away from a word."""
+    return 1 if len(query) <= 5 else 2
+
+def score(query, word, query_grams=None, query_counts=None):
+    """Rank a candidate: exact match, then prefix, then substring, then close spellings (0 to 1 within each tier).
+    
+    Returns None for a word that is not a plausible match.
+    """
+    query = query.lower()
+    word_lower = word.lower()
+    
+    query_grams = trigrams(query) if query_grams is None else query_grams
+    word_grams = trigrams(word_lower)
+    similarity = 2 * len(query_grams & word_grams) / (len(query_grams) + len(word_grams)) if query_grams and word_grams else 0.0
+    
+    if word_lower == query:
+        return 3 + similarity
+    if word_lower.startswith(query):
+        return 2 + similarity
+    if query in word_lower:
+        return 1 + similarity
+    
+    limit = allowed_typos(query)
+    # Most candidates only share a trigram or two; counting letters rules them out before the full comparison
+    if bag_distance(query_counts or Counter(query), word_lower) > limit:
+        return None
+    distance = edit_distance(query, word_lower, limit)
+    if distance > limit:
+        return None
+    return max(similarity, 1 - distance / max(len(query), len(word_lower)))
+
+def search_words(conn, query, limit=SEARCH_LIMIT, step=None, level=None):
+    """Search Words and SpecialWords by prefix, substring or approximate spelling.
+    
+    Returns the best `limit` results, the number of matches and step/level facets counted over
+    all matches (before the step and level filters are applied).
+    """
+    query = query.strip().lower()
+    if not query:
+        return {'query': query, 'total': 0, 'results': [], 'facets': {'steps': {}, 'levels': {}, 'special': 0}}
+    
+    query_grams = trigrams(query)
+    query_counts = Counter(query)
+    matches = []
+    for rowid, word, kind, word_step, word_level in _candidates(conn, query):
+        match_score = score(query, word, query_grams, query_counts)
+        if match_score is None:
+            continue
+        matches.append({
+            'id': abs(rowid),
+            'word': word,
+            'type': kind,
+            'step': word_step,
+            'level': word_level,
+            'score': round(match_score, 3)
+        })
+    
+    facets = {'steps': {}, 'levels': {}, 'special': 0}
+    for match in matches:
+        if match['type'] == 'special':
+            facets['special'] += 1
+        else:
+            facets['steps'][match['step']] = facets['steps'].get(match['step'], 0) + 1
+            facets['levels'][match['level']] = facets['levels'].get(match['level'], 0) + 1
+    
+    if step is not None:
+        matches = [match for match in matches if match['step'] == step]
+    if level is not None:
+        matches = [match for match in matches if match['level'] == level]
+    
+    # Best score first; among equals, shorter words and earlier steps first
+    matches.sort(key=lambda match: (-match['score'], len(match['word']), match['step'] or 99, match['level'] or 9, match['word']))
+    
+    return {'query': query, 'total': len(matches), 'results': matches[:limit], 'facets': facets}
+
+def update_search_index(db_path='pathway.db', rebuild=False):
+    """Add the search index to an existing database, optionally refilling it."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        create_search_index(cursor)
+        if rebuild:
+            rebuild_search_index(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Search the word lists, or maintain the search index')
+    parser.add_argument('query', nargs='?', help='Word or part of a word to look for')
+    parser.add_argument('--db', default='pathway.db', help='Path to the database')
+    parser.add_argument('--limit', type=int, default=SEARCH_LIMIT, help='Number of results to show')
+    parser.add_argument('--rebuild', action='store_true', help='Refill the index from Words and SpecialWords')
+    args = parser.parse_args()
+    
+    update_search_index(args.db, args.rebuild)
+    if not args.query:
+        print("Search index is up to date!")
+        return
+    
+    conn = sqlite3.connect(args.db)
+    found = search_words(conn, args.query, args.limit)
+    conn.close()
+    
+    if not found['results']:
+        print("No matching words found.")
+        return
+    
+    for match in found['results']:
+        where = 'special word' if match['type'] == 'special' else f"Step {match['step']}, Level {match['level']}"
+        print(f"{match['id']:5d}  {match['word']:<20} {where}")
+    print(f"\n{found['total']} match(es)")
+
+if __name__ == '__main__':
+    main()
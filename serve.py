@@ -0,0 +1,112 @@
+import argparse
+import os
+import signal
+import threading
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # gunicorn is optional (and Unix only); without it one threaded process serves everything
+    BaseApplication = None
+
+import app as pathway_app
+
+HOST = '0.0.0.0'
+PORT = 5001
+WORKERS = min(os.cpu_count() or 1, 4)  # SQLite takes one writer at a time, so more processes stop helping soon
+THREADS = 32  # Per worker; every open page holds one thread in its /api/changes long poll
+GRACEFUL_TIMEOUT = 30  # Seconds in-flight requests get to finish on shutdown
+TIMEOUT = 120  # Seconds before a stuck worker is restarted
+
+def _post_fork(server, worker):
+    pathway_app.reset_after_fork()
+
+def _post_worker_init(worker):
+    # gunicorn installs its own SIGTERM handler when the worker starts; release long polls
+    # before it begins waiting for in-flight requests
+    stop = signal.getsignal(signal.SIGTERM)
+    
+    def handle_term(signum, frame):
+        pathway_app.begin_shutdown()
+        stop(signum, frame)
+    
+    signal.signal(signal.SIGTERM, handle_term)
+
+def _worker_exit(server, worker):
+    pathway_app.shutdown()
+
+def run_gunicorn(wsgi_app, host, port, workers, threads, graceful_timeout):
+    """Serve with gunicorn: the app is loaded once in the master and forked into each worker."""
+    options = {
+        'bind': f"{host}:{port}",
+        'workers': workers,
+        'worker_class': 'gthread',
+        'threads': threads,
+        'preload_app': True,
+        'graceful_timeout': graceful_timeout,
+        'timeout': TIMEOUT,
+        'accesslog': '-',
+        'post_fork': _post_fork,
+        'post_worker_init': _post_worker_init,
+        'worker_exit': _worker_exit
+    }
+    
+    class PathwayServer(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            return wsgi_app
+    
+    PathwayServer().run()
+
+def run_threaded(wsgi_app, host, port):
+    """Serve from one process with a thread per request, stopping cleanly on SIGTERM or Ctrl+C."""
+    from werkzeug.serving import make_server
+    
+    server = make_server(host, port, wsgi_app, threaded=True)
+    # Wait for request threads when closing instead of cutting them off
+    server.daemon_threads = False
+    
+    def handle_term(signum, frame):
+        pathway_app.begin_shutdown()
+        # shutdown() waits for serve_forever to return, so it can't run on this thread
+        threading.Thread(target=server.shutdown).start()
+    
+    signal.signal(signal.SIGTERM, handle_term)
+    
+    print(f"Serving on http://{host}:{port} (one process; install gunicorn for more workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pathway_app.begin_shutdown()
+    finally:
+        server.server_close()
+        pathway_app.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the Pathway web app for production use')
+    parser.add_argument('--db', default=pathway_app.DATABASE, help='Path to the database')
+    parser.add_argument('--host', default=HOST, help='Address to listen on')
+    parser.add_argument('--port', type=int, default=PORT, help='Port to listen on')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='Worker processes (needs gunicorn)')
+    parser.add_argument('--threads', type=int, default=THREADS, help='Threads per worker process')
+    parser.add_argument('--graceful-timeout', type=int, default=GRACEFUL_TIMEOUT,
+                        help='Seconds to let requests finish on shutdown')
+    args = parser.parse_args()
+    
+    try:
+        wsgi_app = pathway_app.create_app(args.db)
+    except FileNotFoundError as error:
+        print(f"Error: {error}")
+        return
+    
+    if BaseApplication is None:
+        if args.workers > 1:
+            print("gunicorn is not installed (pip install gunicorn), so only one worker process will run.")
+        run_threaded(wsgi_app, args.host, args.port)
+    else:
+        run_gunicorn(wsgi_app, args.host, args.port, args.workers, args.threads, args.graceful_timeout)
+
+if __name__ == '__main__':
+    main()
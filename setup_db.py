@@ -2,10 +2,26 @@ import sqlite3
 import csv
 import os
 import argparse
+from itertools import islice
+
+from update_students import create_students_table, migrate_student_names
+from llm_cache import create_llm_cache_table
+from update_indexes import create_covering_indexes
+from data_versions import create_data_version_triggers
+from change_log import create_change_log
+from search import create_search_index
+from lemmas import create_word_forms, rebuild_word_forms
+from db import SYNCHRONOUS
+
+IMPORT_BATCH_SIZE = 5000  # CSV rows sent to SQLite per executemany call
 
 def create_database(db_path):
     """Create the SQLite database and tables."""
     conn = sqlite3.connect(db_path)
+    
+    # Convert databases created before the Students table existed
+    migrate_student_names(conn)
+    
     cursor = conn.cursor()
     
     # Create Words table
@@ -19,21 +35,47 @@ def create_database(db_path):
         )
     """)
     
+    # Create Students table
+    create_students_table(cursor)
+    
     # Create StudentWords table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS StudentWords (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            student_name TEXT NOT NULL,
+            student_id INTEGER NOT NULL,
             word_id INTEGER NOT NULL,
             status TEXT NOT NULL CHECK(status IN ('learning','mastered')) DEFAULT 'learning',
-            UNIQUE(student_name, word_id),
+            UNIQUE(student_id, word_id),
+            FOREIGN KEY(student_id) REFERENCES Students(id) ON DELETE CASCADE,
             FOREIGN KEY(word_id) REFERENCES Words(id) ON DELETE CASCADE
         )
     """)
     
+    # Version stamp bumped on every import so running apps can reload their word catalog
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS CatalogVersion (
+            id INTEGER PRIMARY KEY CHECK(id = 1),
+            version INTEGER NOT NULL DEFAULT 0,
+            imported_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create the cache for generated stories and questions
+    create_llm_cache_table(cursor)
+    
     # Create indexes for performance
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_words_rank ON Words(rank)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_studentwords_student ON StudentWords(student_name)")
+    create_covering_indexes(cursor)
+    
+    # Record every change to a student's rows (data versions and the change log)
+    create_data_version_triggers(cursor)
+    create_change_log(cursor)
+    
+    # Trigram index for word search, kept in sync with Words by triggers
+    create_search_index(cursor)
+    
+    # Inflected forms of the words (running -> run), refilled by each import
+    create_word_forms(cursor)
     
     conn.commit()
     conn.close()
@@ -44,11 +86,17 @@ def compute_step_level(rank):
     level = (((rank - 1) % 100) // 20) + 1
     return step, level
 
-def import_words(csv_path, db_path):
-    """Import words from CSV file and compute step/level."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
+def bump_catalog_version(cursor):
+    """Mark the Words table as changed so cached catalogs reload."""
+    cursor.execute("""
+        INSERT INTO CatalogVersion (id, version) VALUES (1, 1)
+        ON CONFLICT(id) DO UPDATE SET
+            version = version + 1,
+            imported_date = CURRENT_TIMESTAMP
+    """)
+
+def read_word_rows(csv_path):
+    """Parse the CSV into (word, rank, step, level) rows, skipping invalid ones."""
     with open(csv_path, 'r', encoding='utf-8') as file:
         reader = csv.reader(file)
         next(reader)  # Skip header row
@@ -66,22 +114,90 @@ def import_words(csv_path, db_path):
                     
                     # Compute step and level
                     step, level = compute_step_level(rank)
-                    
-                    # Upsert word into database
-                    cursor.execute("""
-                        INSERT INTO Words (word, rank, step, level)
-                        VALUES (?, ?, ?, ?)
-                        ON CONFLICT(word) DO UPDATE SET
-                            rank=excluded.rank,
-                            step=excluded.step,
-                            level=excluded.level
-                    """, (word, rank, step, level))
+                    yield word, rank, step, level
                 except ValueError:
                     print(f"Warning: Skipping invalid data row: {row}")
                     continue
+
+def import_words(csv_path, db_path, batch_size=IMPORT_BATCH_SIZE):
+    """Import words from CSV file, applying only what changed since the last import.
+    
+    Returns a summary dict with the number of added, re-ranked, unchanged and removed words.
+    Words that were dropped from the CSV but are still on a student's list are kept.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+    cursor = conn.cursor()
+    
+    # Stage the whole CSV in a temp table; a repeated word keeps its last rank, as before
+    cursor.execute("""
+        CREATE TEMP TABLE ImportWords (
+            word TEXT PRIMARY KEY,
+            rank INTEGER NOT NULL,
+            step INTEGER NOT NULL,
+            level INTEGER NOT NULL
+        )
+    """)
+    
+    rows = read_word_rows(csv_path)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        cursor.executemany("INSERT OR REPLACE INTO ImportWords (word, rank, step, level) VALUES (?, ?, ?, ?)", batch)
+    
+    imported = cursor.execute("SELECT COUNT(*) FROM ImportWords").fetchone()[0]
     
+    # New words
+    cursor.execute("""
+        INSERT INTO Words (word, rank, step, level)
+        SELECT i.word, i.rank, i.step, i.level
+        FROM ImportWords i
+        WHERE NOT EXISTS (SELECT 1 FROM Words w WHERE w.word = i.word)
+        ORDER BY i.rank
+    """)
+    added = cursor.rowcount
+    
+    # Words whose rank moved
+    cursor.execute("""
+        UPDATE Words
+        SET rank = i.rank, step = i.step, level = i.level
+        FROM ImportWords i
+        WHERE Words.word = i.word AND Words.rank != i.rank
+    """)
+    reranked = cursor.rowcount
+    
+    # Words no longer in the CSV (an empty CSV never wipes the list)
+    removed = kept = 0
+    if imported:
+        cursor.execute("""
+            DELETE FROM Words
+            WHERE word NOT IN (SELECT word FROM ImportWords)
+              AND id NOT IN (SELECT word_id FROM StudentWords)
+        """)
+        removed = cursor.rowcount
+        kept = cursor.execute("""
+            SELECT COUNT(*) FROM Words
+            WHERE word NOT IN (SELECT word FROM ImportWords)
+        """).fetchone()[0]
+    
+    # Only refill the word forms and make running apps reload their catalog when something actually changed
+    if added or reranked or removed:
+        rebuild_word_forms(cursor)
+        bump_catalog_version(cursor)
+    
+    cursor.execute("DROP TABLE ImportWords")
     conn.commit()
     conn.close()
+    
+    return {
+        'imported': imported,
+        'added': added,
+        'reranked': reranked,
+        'unchanged': imported - added - reranked,
+        'removed': removed,
+        'kept_in_use': kept
+    }
 
 def main():
     parser = argparse.ArgumentParser(description='Setup Pathway database and import words')
@@ -99,9 +215,13 @@ def main():
     create_database(db_path)
     
     print("Importing words...")
-    import_words(csv_path, db_path)
+    summary = import_words(csv_path, db_path)
+    print(f"{summary['imported']} words in CSV: {summary['added']} added, {summary['reranked']} re-ranked, "
+          f"{summary['unchanged']} unchanged, {summary['removed']} removed")
+    if summary['kept_in_use']:
+        print(f"Kept {summary['kept_in_use']} words that are no longer in the CSV but are on a student's list")
     
     print("Database setup complete!")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,227 @@
+import sqlite3
+import argparse
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+
+from metrics import InstrumentedConnection, InstrumentedCursor
+
+# Tracing is opt-in: set PATHWAY_SQL_TRACE=1 for the web server or any of the CLIs
+TRACE_ENABLED = os.environ.get('PATHWAY_SQL_TRACE', '') not in ('', '0')
+SLOW_QUERY_MS = float(os.environ.get('PATHWAY_SLOW_QUERY_MS', '50'))
+TRACE_LOG = os.environ.get('PATHWAY_SQL_TRACE_LOG', 'sql_trace.jsonl')
+FLUSH_INTERVAL = 60  # Seconds between writing aggregate statistics to the log
+TRACED_STATEMENTS = 32  # Expanded statements a connection keeps; statements run outside a traced cursor would otherwise pile up
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def fingerprint(sql):
+    """Normalize SQL text so statements differing only in literals aggregate together."""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    return _PLACEHOLDER_LIST.sub('(?, ...)', sql)
+
+def _jsonable(parameters):
+    if isinstance(parameters, dict):
+        return {key: _jsonable(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_jsonable(value) for value in parameters]
+    if isinstance(parameters, bytes):
+        return f"<{len(parameters)} bytes>"
+    return parameters
+
+class SQLTracer:
+    """Aggregates statement timings by fingerprint and logs the slow ones."""
+    
+    def __init__(self, log_path=TRACE_LOG, slow_query_ms=SLOW_QUERY_MS):
+        self.log_path = log_path
+        self.slow_query_ms = slow_query_ms
+        self.process_id = uuid.uuid4().hex
+        self.program = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python'
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._last_flush = time.monotonic()
+    
+    def record(self, conn, sql, parameters, seconds, expanded=None):
+        """Add one statement's timing; logs it with its plan if it was slow."""
+        key = fingerprint(sql)
+        ms = seconds * 1000
+        
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = [0, 0.0, 0.0]  # count, total ms, max ms
+            stats[0] += 1
+            stats[1] += ms
+            stats[2] = max(stats[2], ms)
+            flush = time.monotonic() - self._last_flush >= FLUSH_INTERVAL
+        
+        if ms >= self.slow_query_ms:
+            self._write({
+                'type': 'slow',
+                'time': time.time(),
+                'program': self.program,
+                'ms': round(ms, 3),
+                'fingerprint': key,
+                'sql': sql.strip(),
+                'parameters': _jsonable(parameters),
+                'expanded': expanded,
+                'plan': self._plan(conn, sql, parameters)
+            })
+        
+        if flush:
+            self.flush()
+    
+    def _plan(self, conn, sql, parameters):
+        if conn is None or not sql.lstrip().upper().startswith(('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')):
+            return None
+        try:
+            # A plain cursor, so explaining the statement is not traced itself
+            rows = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        except sqlite3.Error:
+            return None
+        return [row[3] for row in rows]
+    
+    def _write(self, entry):
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            with open(self.log_path, 'a', encoding='utf-8') as file:
+                file.write(line + '\n')
+    
+    def flush(self):
+        """Write this process's cumulative statistics to the log."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._stats:
+                return
+            statements = {key: {'count': count, 'total_ms': round(total, 3), 'max_ms': round(largest, 3)}
+                          for key, (count, total, largest) in self._stats.items()}
+        
+        self._write({
+            'type': 'stats',
+            'time': time.time(),
+            'program': self.program,
+            'process_id': self.process_id,
+            'statements': statements
+        })
+    
+    def top(self, n=10):
+        """This process's statements with the highest total time."""
+        with self._lock:
+            items = [(key, count, total, largest) for key, (count, total, largest) in self._stats.items()]
+        return sorted(items, key=lambda item: item[2], reverse=True)[:n]
+
+tracer = SQLTracer()
+if TRACE_ENABLED:
+    atexit.register(tracer.flush)
+
+class TracedCursor(InstrumentedCursor):
+    """Cursor that reports every statement's time to the tracer."""
+    
+    def execute(self, sql, parameters=()):
+        conn = self.connection
+        conn.traced_statements.clear()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - start
+            expanded = conn.traced_statements[-1] if conn.traced_statements else None
+            tracer.record(conn, sql, parameters, elapsed, expanded)
+    
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        self.connection.traced_statements.clear()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            tracer.record(None, sql, {'rows': len(seq_of_parameters)}, time.perf_counter() - start)
+
+class TracedConnection(InstrumentedConnection):
+    """Connection that captures the expanded SQL of each statement and times commits."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # SQLite hands the trace callback each statement with its bound values filled in
+        self.traced_statements = deque(maxlen=TRACED_STATEMENTS)
+        self.set_trace_callback(self.traced_statements.append)
+    
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+    
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            tracer.record(None, 'COMMIT', (), time.perf_counter() - start)
+
+def connect(db_path, **kwargs):
+    """sqlite3.connect, returning a traced connection when PATHWAY_SQL_TRACE is set."""
+    if TRACE_ENABLED:
+        kwargs.setdefault('factory', TracedConnection)
+    return sqlite3.connect(db_path, **kwargs)
+
+def read_report(log_path, top_n=10):
+    """Combine the statistics in a trace log; returns (top statements, slow counts by fingerprint)."""
+    latest = {}
+    slow = {}
+    
+    with open(log_path, encoding='utf-8') as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get('type') == 'stats':
+                # Each flush is cumulative, so only the newest one per process counts
+                latest[entry['process_id']] = entry['statements']
+            elif entry.get('type') == 'slow':
+                slow[entry['fingerprint']] = slow.get(entry['fingerprint'], 0) + 1
+    
+    totals = {}
+    for statements in latest.values():
+        for key, stats in statements.items():
+            total = totals.setdefault(key, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            total['count'] += stats['count']
+            total['total_ms'] += stats['total_ms']
+            total['max_ms'] = max(total['max_ms'], stats['max_ms'])
+    
+    top = sorted(totals.items(), key=lambda item: item[1]['total_ms'], reverse=True)[:top_n]
+    return top, slow
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the SQL statements that took the most time')
+    parser.add_argument('--log', default=TRACE_LOG, help='Trace log written with PATHWAY_SQL_TRACE=1')
+    parser.add_argument('--top', type=int, default=10, help='Number of statements to show')
+    parser.add_argument('--width', type=int, default=90, help='Characters of SQL to show per statement')
+    args = parser.parse_args()
+    
+    if not os.path.exists(args.log):
+        print(f"Error: trace log '{args.log}' not found. Run with PATHWAY_SQL_TRACE=1 first.")
+        return
+    
+    top, slow = read_report(args.log, args.top)
+    if not top:
+        print("No statement statistics in the log yet.")
+        return
+    
+    print(f"{'total ms':>10} {'count':>7} {'avg ms':>8} {'max ms':>8} {'slow':>5}  statement")
+    for key, stats in top:
+        sql = key if len(key) <= args.width else key[:args.width - 3] + '...'
+        average = stats['total_ms'] / stats['count']
+        print(f"{stats['total_ms']:10.1f} {stats['count']:7d} {average:8.2f} {stats['max_ms']:8.2f} {slow.get(key, 0):5d}  {sql}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+import time
+
+from data_versions import STUDENT_LIST_ID
+
+# How often (in seconds) the cache checks whether another process changed the student list
+LIST_CHECK_INTERVAL = 5.0
+
+# Student name -> Students.id, filled from committed rows only
+_student_ids = {}
+_lock = threading.Lock()
+_list_version = None
+_checked_at = 0.0
+
+def _check_student_list(conn):
+    # A student deleted (or renamed) by another server process or a CLI bumps the list version
+    global _list_version, _checked_at
+    now = time.monotonic()
+    if now - _checked_at < LIST_CHECK_INTERVAL:
+        return
+    
+    try:
+        row = conn.execute("SELECT version FROM StudentDataVersion WHERE student_id = ?", (STUDENT_LIST_ID,)).fetchone()
+    except sqlite3.OperationalError:
+        # Database created before the data versions existed
+        return
+    
+    version = row[0] if row else 0
+    with _lock:
+        if version != _list_version:
+            _student_ids.clear()
+            _list_version = version
+        _checked_at = now
+
+def get_student_id(conn, student_name, create=False, cached=True):
+    """Resolve a student name to its integer id, optionally creating the student.
+    
+    Writes pass cached=False to read the id from Students at write time: the cache can lag another
+    process by up to LIST_CHECK_INTERVAL, and a student deleted and re-created there has a new id.
+    """
+    if cached:
+        _check_student_list(conn)
+        student_id = _student_ids.get(student_name)
+        if student_id is not None:
+            return student_id
+    
+    row = conn.execute("SELECT id FROM Students WHERE name = ?", (student_name,)).fetchone()
+    if row is not None:
+        with _lock:
+            if cached:
+                _student_ids[student_name] = row[0]
+            elif _student_ids.get(student_name) != row[0]:
+                # The row may not be committed yet, so a stale entry is dropped rather than replaced
+                _student_ids.pop(student_name, None)
+        return row[0]
+    
+    if not create:
+        return None
+    
+    # Not cached until the caller commits, so a rolled back insert never leaves a stale id behind
+    conn.execute("INSERT OR IGNORE INTO Students (name) VALUES (?)", (student_name,))
+    row = conn.execute("SELECT id FROM Students WHERE name = ?", (student_name,)).fetchone()
+    return row[0]
+
+def forget_student(student_name):
+    """Drop a student from the lookup cache (after deleting them)."""
+    with _lock:
+        _student_ids.pop(student_name, None)
+
+def clear_student_cache():
+    """Empty the lookup cache."""
+    with _lock:
+        _student_ids.clear()
@@ -1,23 +1,11 @@
-import sqlite3
-import pyperclip
 import argparse
-import sys
+
+from catalog import get_catalog
+from pathway import ask_step_level
 
 def get_words_by_step_level(step, level, db_path='pathway.db'):
     """Get words for a specific step and level."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT word FROM Words 
-        WHERE step = ? AND level = ? 
-        ORDER BY rank
-    """, (step, level))
-    
-    words = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    
-    return words
+    return [word for word_id, word in get_catalog(db_path).words_for(step, level)]
 
 def format_clipboard_output(step, level, words):
     """Format the output for clipboard."""
@@ -34,28 +22,7 @@ def main():
     args = parser.parse_args()
     
     # If arguments not provided, prompt user
-    if args.step is None:
-        try:
-            args.step = int(input("Enter step (1-28): "))
-        except ValueError:
-            print("Invalid step number.")
-            sys.exit(1)
-    
-    if args.level is None:
-        try:
-            args.level = int(input("Enter level (1-5): "))
-        except ValueError:
-            print("Invalid level number.")
-            sys.exit(1)
-    
-    # Validate inputs
-    if not (1 <= args.step <= 28):
-        print("Step must be between 1 and 28.")
-        sys.exit(1)
-    
-    if not (1 <= args.level <= 5):
-        print("Level must be between 1 and 5.")
-        sys.exit(1)
+    args.step, args.level = ask_step_level(args.step, args.level)
     
     # Get words
     words = get_words_by_step_level(args.step, args.level)
@@ -65,6 +32,7 @@ def main():
         return
     
     # Format and copy to clipboard
+    import pyperclip
     output = format_clipboard_output(args.step, args.level, words)
     pyperclip.copy(output)
     
@@ -1,30 +1,36 @@
 import sqlite3
 import json
 
+from catalog import get_catalog
+from students import get_student_id
+
 def get_learning_words(student_name, db_path='pathway.db'):
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
+    student_id = get_student_id(conn, student_name)
     
     # Get regular learning words
     cursor.execute("""
-        SELECT w.id, w.word, w.step, w.level, sw.status
-        FROM StudentWords sw
-        JOIN Words w ON sw.word_id = w.id
-        WHERE sw.student_name = ? AND sw.status = 'learning'
-        ORDER BY w.step, w.level, w.rank
-    """, (student_name,))
+        SELECT word_id
+        FROM StudentWords
+        WHERE student_id = ? AND status = 'learning'
+    """, (student_id,))
     
-    regular_words = [dict(row) for row in cursor.fetchall()]
+    entries = get_catalog(db_path).in_pathway_order(row['word_id'] for row in cursor.fetchall())
+    regular_words = [
+        {'id': entry['id'], 'word': entry['word'], 'step': entry['step'], 'level': entry['level'], 'status': 'learning'}
+        for entry in entries
+    ]
     
     # Get special learning words
     cursor.execute("""
         SELECT sp.id, sp.word, NULL as step, NULL as level, sw.status, 'special' as word_type, sw.special_word_id
         FROM StudentSpecialWords sw
         JOIN SpecialWords sp ON sw.special_word_id = sp.id
-        WHERE sw.student_name = ? AND sw.status = 'learning'
+        WHERE sw.student_id = ? AND sw.status = 'learning'
         ORDER BY sw.added_date
-    """, (student_name,))
+    """, (student_id,))
     
     special_words = [dict(row) for row in cursor.fetchall()]
     
@@ -0,0 +1,74 @@
+import os
+import sqlite3
+
+import pytest
+
+import catalog
+from setup_db import bump_catalog_version, import_words
+
+WORDS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'words_rank.csv')
+
+@pytest.fixture
+def reload_at_once(monkeypatch):
+    # Catalog changes are otherwise noticed within VERSION_CHECK_INTERVAL seconds
+    monkeypatch.setattr(catalog, 'VERSION_CHECK_INTERVAL', 0)
+
+def get_catalog(client, **headers):
+    return client.get('/api/catalog', headers=dict({'Accept-Encoding': 'identity'}, **headers))
+
+def test_etag_is_the_content_hash(client):
+    response = get_catalog(client)
+    assert response.status_code == 200
+    body = response.get_json()
+    
+    assert response.headers['ETag'] == f'"{body["hash"]}"'
+    assert len(body['ids']) == len(body['words']) > 2000
+    assert body['words'][:2] == ['the', 'be']
+    # Each step/level slice points into the rank-ordered lists
+    step, level, start, stop = body['slices'][0]
+    assert (step, level, start) == (1, 1, 0) and stop > start
+
+def test_if_none_match_gets_304(client):
+    etag = get_catalog(client).headers['ETag']
+    
+    response = get_catalog(client, **{'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.data == b''
+    
+    # The gzip copy has its own ETag, and any copy's ETag revalidates
+    gzipped = client.get('/api/catalog', headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzipped.headers['ETag'] != etag
+    assert get_catalog(client, **{'If-None-Match': f'W/{gzipped.headers["ETag"]}'}).status_code == 304
+    assert get_catalog(client, **{'If-None-Match': '"stale"'}).status_code == 200
+
+def test_hash_changes_after_a_catalog_edit(client, db_path, tmp_path, reload_at_once):
+    old = get_catalog(client)
+    
+    # Swap the ranks of the first two words
+    with open(WORDS_CSV, encoding='utf-8') as file:
+        lines = file.read().splitlines()
+    lines[1:3] = ['1,be', '2,the']
+    edited = tmp_path / 'words_rank.csv'
+    edited.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    assert import_words(str(edited), db_path)['reranked'] == 2
+    
+    new = get_catalog(client, **{'If-None-Match': old.headers['ETag']})
+    assert new.status_code == 200
+    assert new.headers['ETag'] != old.headers['ETag']
+    assert new.get_json()['words'][:2] == ['be', 'the']
+    assert get_catalog(client, **{'If-None-Match': new.headers['ETag']}).status_code == 304
+
+def test_new_version_with_the_same_words_keeps_the_etag(client, db_path, reload_at_once):
+    etag = get_catalog(client).headers['ETag']
+    version = catalog.get_catalog(db_path).version
+    
+    conn = sqlite3.connect(db_path)
+    bump_catalog_version(conn.cursor())
+    conn.commit()
+    conn.close()
+    
+    # The catalog is reloaded, but clients keep their copy
+    assert get_catalog(client, **{'If-None-Match': etag}).status_code == 304
+    assert catalog.get_catalog(db_path).version == version + 1
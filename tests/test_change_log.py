@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+
+from change_log import prune_changes, read_changes
+
+@pytest.fixture
+def student(client):
+    """Ann, learning words 1 and 2 and one special word; returns the special word's id."""
+    client.post('/api/student/Ann/learning_words', json={'word_ids': [1, 2]})
+    client.post('/api/student/Ann/special_words', json={'word': 'zorbing'})
+    return client.get('/api/student/Ann/special_words').get_json()['words'][0]['special_word_id']
+
+def latest(client):
+    return client.get('/api/changes').get_json()['latest']
+
+# Each write route, a POST to make before it (so the write changes something), and the
+# (entity, action) pairs it must add to the journal
+ROUTES = [
+    ('post', 'learning_words', {'word_ids': [3]}, None, {('word', 'upsert')}),
+    ('patch', 'learning_words', {'operations': [{'op': 'master', 'word_ids': [2]}]}, None,
+     {('word', 'upsert'), ('reward', 'upsert')}),
+    ('delete', 'learning_words/1', None, None, {('word', 'delete')}),
+    ('post', 'learning_words/2/master', None, None, {('word', 'upsert'), ('reward', 'upsert')}),
+    ('post', 'learning_words/2/learning', None, 'learning_words/2/master', {('word', 'upsert')}),
+    ('post', 'progress', {'step': 3, 'level': 2}, None, {('progress', 'upsert')}),
+    ('post', 'special_words', {'word': 'quokka'}, None, {('special_word', 'upsert'), ('reward', 'upsert')}),
+    ('post', 'special_words/batch', {'words': ['wombat', 'numbat']}, None, {('special_word', 'upsert'), ('reward', 'upsert')}),
+    ('post', 'special_words/{special}/master', None, None, {('special_word', 'upsert'), ('reward', 'upsert')}),
+    ('post', 'special_words/{special}/learning', None, 'special_words/{special}/master', {('special_word', 'upsert')}),
+    ('delete', 'learning_special_words/{special}', None, None, {('special_word', 'delete')}),
+    ('delete', 'special_words/{special}', None, None, {('special_word', 'delete')}),
+    ('delete', '', None, None, {('student', 'delete'), ('word', 'delete'), ('special_word', 'delete'), ('reward', 'delete')}),
+]
+
+@pytest.mark.parametrize('method, suffix, body, before, expected', ROUTES, ids=[f'{r[0]} {r[1]}' for r in ROUTES])
+def test_write_routes_are_journaled(client, student, method, suffix, body, before, expected):
+    if before:
+        client.post('/api/student/Ann/' + before.format(special=student))
+    since = latest(client)
+    url = '/api/student/Ann' + ('/' + suffix.format(special=student) if suffix else '')
+    response = getattr(client, method)(url, json=body)
+    assert response.status_code == 200
+    
+    result = client.get(f'/api/changes?since={since}').get_json()
+    assert result['changes'], 'no journal entry'
+    assert {(change['entity'], change['action']) for change in result['changes']} == expected
+    assert all(change['seq'] > since for change in result['changes'])
+    assert result['latest'] == result['changes'][-1]['seq'] == latest(client)
+
+def test_since_returns_only_newer_changes(client, student):
+    first = latest(client)
+    client.post('/api/student/Ann/learning_words', json={'word_ids': [3]})
+    second = latest(client)
+    client.post('/api/student/Ann/learning_words', json={'word_ids': [4]})
+    
+    changes = client.get(f'/api/changes?since={second}').get_json()['changes']
+    assert [change['data']['word_id'] for change in changes] == [4]
+    
+    changes = client.get(f'/api/changes?since={first}').get_json()['changes']
+    assert [change['data']['word_id'] for change in changes] == [3, 4]
+    
+    assert client.get(f'/api/changes?since={latest(client)}').get_json()['changes'] == []
+
+def test_changes_for_one_student(client, student):
+    since = latest(client)
+    client.post('/api/student/Ann/learning_words', json={'word_ids': [3]})
+    client.post('/api/student/Bob/learning_words', json={'word_ids': [4]})
+    
+    changes = client.get(f'/api/changes?since={since}&student=Ann').get_json()['changes']
+    # Ann's own change and the new student in the list
+    assert [(change['entity'], change['data'].get('word_id')) for change in changes] == [('word', 3), ('student', None)]
+
+def test_pruned_changes_ask_for_a_reset(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO Students (name) VALUES ('Ann')")
+    student_id = conn.execute("SELECT id FROM Students").fetchone()[0]
+    conn.executemany("INSERT INTO StudentWords (student_id, word_id) VALUES (?, ?)",
+                     [(student_id, word_id) for word_id in range(1, 11)])
+    conn.commit()
+    
+    assert prune_changes(conn.cursor(), keep=4) == 7
+    conn.commit()
+    
+    latest = read_changes(conn, 0)['latest']
+    assert read_changes(conn, latest - 5)['reset']
+    kept = read_changes(conn, latest - 4)
+    assert not kept['reset'] and len(kept['changes']) == 4
+    conn.close()
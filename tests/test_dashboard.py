@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+
+@pytest.fixture
+def seeded(client):
+    # Two list words, one mastered (a reward), a special word (another reward) and a progress row
+    client.post('/api/student/Ann/learning_words', json={'word_ids': [1, 2, 3]})
+    client.post('/api/student/Ann/special_words', json={'word': 'zorbing'})
+    client.post('/api/student/Ann/learning_words/2/master')
+    client.post('/api/student/Ann/progress', json={'step': 3, 'level': 2})
+    client.post('/api/student/Bob/progress', json={'step': 1, 'level': 1})
+    return client
+
+def test_dashboard_matches_the_separate_endpoints(seeded):
+    response = seeded.get('/api/student/Ann/dashboard')
+    assert response.status_code == 200
+    dashboard = response.get_json()
+    
+    assert dashboard['student'] == 'Ann'
+    assert dashboard['learning_words'] == seeded.get('/api/student/Ann/learning_words').get_json()['words']
+    assert dashboard['special_words'] == seeded.get('/api/student/Ann/special_words').get_json()['words']
+    assert dashboard['rewards'] == seeded.get('/api/student/Ann/rewards').get_json()
+    assert dashboard['progress'] == {'step': 3, 'level': 2}
+    assert dashboard['students'] == ['Ann', 'Bob']
+    
+    assert [word['word'] for word in dashboard['learning_words']] == ['the', 'and', 'zorbing']
+    assert [reward['reward_type'] for reward in dashboard['rewards']['rewards']] == ['word_mastered', 'special_word_added']
+
+def test_fields_selects_parts(seeded):
+    dashboard = seeded.get('/api/student/Ann/dashboard?fields=progress, students').get_json()
+    assert dashboard == {'student': 'Ann', 'progress': {'step': 3, 'level': 2}, 'students': ['Ann', 'Bob']}
+    
+    response = seeded.get('/api/student/Ann/dashboard?fields=progress,grades')
+    assert response.status_code == 400
+    assert 'grades' in response.get_json()['error']
+
+def test_unknown_student_gets_empty_parts(seeded):
+    dashboard = seeded.get('/api/student/Nobody/dashboard').get_json()
+    assert dashboard['learning_words'] == [] and dashboard['special_words'] == []
+    assert dashboard['rewards'] == {'rewards': [], 'next_before': None}
+    assert dashboard['progress'] == {'step': 1, 'level': 1}
+
+def test_unchanged_dashboard_gets_304(seeded):
+    etag = seeded.get('/api/student/Ann/dashboard').headers['ETag']
+    assert seeded.get('/api/student/Ann/dashboard', headers={'If-None-Match': etag}).status_code == 304
+    
+    seeded.post('/api/student/Ann/learning_words/3/master')
+    assert seeded.get('/api/student/Ann/dashboard', headers={'If-None-Match': etag}).status_code == 200
+
+def test_parts_are_read_from_one_snapshot(seeded, pathway_app, db_path, monkeypatch):
+    fetch_learning_words = pathway_app.DASHBOARD_FIELDS['learning_words']
+    
+    def fetch_then_write_elsewhere(cursor, student_id):
+        words = fetch_learning_words(cursor, student_id)
+        # Another connection commits a reward and a new word between two parts of the dashboard
+        other = sqlite3.connect(db_path)
+        other.execute("INSERT INTO Rewards (student_id, word_id, reward_type) VALUES (?, 3, 'word_mastered')", (student_id,))
+        other.execute("INSERT INTO StudentWords (student_id, word_id) VALUES (?, 4)", (student_id,))
+        other.commit()
+        other.close()
+        return words
+    
+    monkeypatch.setitem(pathway_app.DASHBOARD_FIELDS, 'learning_words', fetch_then_write_elsewhere)
+    dashboard = seeded.get('/api/student/Ann/dashboard?fields=learning_words,rewards').get_json()
+    monkeypatch.undo()
+    
+    # The parts read after the commit still show the state from before it
+    assert len(dashboard['rewards']['rewards']) == 2
+    after = seeded.get('/api/student/Ann/dashboard?fields=learning_words,rewards').get_json()
+    assert len(after['rewards']['rewards']) == 3
+    assert len(after['learning_words']) == len(dashboard['learning_words']) + 1
@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from data_versions import STUDENT_LIST_ID, read_data_versions
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO Students (name) VALUES (?)", [('Ann',), ('Bob',)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+def student_id(conn, name):
+    return conn.execute("SELECT id FROM Students WHERE name = ?", (name,)).fetchone()[0]
+
+def test_student_list_changes_bump_the_list_version(conn):
+    _, before = read_data_versions(conn, STUDENT_LIST_ID)
+    conn.execute("UPDATE Students SET name = 'Anne' WHERE name = 'Ann'")
+    conn.execute("DELETE FROM Students WHERE name = 'Bob'")
+    
+    assert read_data_versions(conn, STUDENT_LIST_ID)[1] == before + 2
+
+@pytest.mark.parametrize('sql', [
+    "INSERT INTO StudentWords (student_id, word_id) VALUES (:ann, 1)",
+    "INSERT INTO StudentSpecialWords (student_id, special_word_id) VALUES (:ann, 1)",
+    "INSERT INTO Rewards (student_id, reward_type, word_id) VALUES (:ann, 'word_mastered', 1)",
+    "INSERT INTO StudentProgress (student_id, current_step, current_level) VALUES (:ann, 2, 3)",
+])
+def test_each_student_table_bumps_only_its_student(conn, sql):
+    ann, bob = student_id(conn, 'Ann'), student_id(conn, 'Bob')
+    assert read_data_versions(conn, ann) == (0, 2)
+    
+    conn.execute(sql, {'ann': ann})
+    assert read_data_versions(conn, ann) == (1, 2)
+    assert read_data_versions(conn, bob) == (0, 2)
+
+def test_updates_and_deletes_bump_the_version(conn):
+    ann = student_id(conn, 'Ann')
+    conn.execute("INSERT INTO StudentWords (student_id, word_id) VALUES (?, 1)", (ann,))
+    conn.execute("UPDATE StudentWords SET status = 'mastered' WHERE student_id = ?", (ann,))
+    conn.execute("DELETE FROM StudentWords WHERE student_id = ?", (ann,))
+    
+    assert read_data_versions(conn, ann)[0] == 3
+
+def test_moving_a_row_bumps_both_students(conn):
+    ann, bob = student_id(conn, 'Ann'), student_id(conn, 'Bob')
+    conn.execute("INSERT INTO StudentWords (student_id, word_id) VALUES (?, 1)", (ann,))
+    conn.execute("UPDATE StudentWords SET student_id = ? WHERE student_id = ?", (bob, ann))
+    
+    assert read_data_versions(conn, ann)[0] == 2
+    assert read_data_versions(conn, bob)[0] == 1
+
+def test_etag_changes_only_when_the_student_data_does(client):
+    client.post('/api/student/Ann/learning_words', json={'word_ids': [1]})
+    client.post('/api/student/Bob/learning_words', json={'word_ids': [1]})
+    url = '/api/student/Ann/learning_words'
+    etag = client.get(url).headers['ETag']
+    
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    # Another student's write leaves Ann's version alone
+    client.post('/api/student/Bob/learning_words', json={'word_ids': [2]})
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    
+    client.post('/api/student/Ann/learning_words', json={'word_ids': [2]})
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
@@ -0,0 +1,64 @@
+import os
+import sqlite3
+
+import pytest
+
+from db import ConnectionPool
+
+@pytest.fixture
+def pool(db_path):
+    pool = ConnectionPool(db_path, max_idle=2)
+    yield pool
+    pool.close_all()
+
+def test_connections_are_reused(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    
+    stats = pool.stats()
+    assert (stats['created'], stats['reused'], stats['idle'], stats['in_use']) == (1, 1, 1, 0)
+
+def test_connections_are_tuned(pool):
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        # Rows can be read by column name
+        assert conn.execute("SELECT 1 AS one").fetchone()['one'] == 1
+
+def test_pool_keeps_at_most_max_idle(pool):
+    conns = [pool.acquire() for _ in range(4)]
+    assert pool.stats()['in_use'] == 4
+    for conn in conns:
+        pool.release(conn)
+    
+    stats = pool.stats()
+    assert (stats['idle'], stats['closed'], stats['in_use']) == (2, 2, 0)
+
+def test_release_rolls_back_an_open_transaction(pool):
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO Students (name) VALUES ('uncommitted')")
+        assert conn.in_transaction
+    
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM Students").fetchone()[0] == 0
+
+def test_failed_open_is_not_counted_in_use(tmp_path):
+    pool = ConnectionPool(os.path.join(tmp_path, 'missing', 'pathway.db'))
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire()
+    assert pool.stats()['in_use'] == 0
+
+def test_reset_drops_connections_without_closing_them(pool):
+    with pool.connection() as conn:
+        pass
+    pool.reset()
+    
+    assert pool.stats()['idle'] == 0
+    # Still open: a forked child must leave the parent's copies alone
+    assert conn.execute("SELECT 1").fetchone()[0] == 1
+    with pool.connection() as new:
+        assert new is not conn
+    conn.close()
@@ -0,0 +1,97 @@
+import sqlite3
+
+import pytest
+
+import setup_db
+from setup_db import create_database, import_words
+from update_db import update_database
+
+@pytest.fixture
+def empty_db(tmp_path):
+    path = str(tmp_path / 'pathway.db')
+    create_database(path)
+    update_database(path)
+    return path
+
+@pytest.fixture
+def write_csv(tmp_path):
+    def write(*rows, name='words.csv'):
+        path = tmp_path / name
+        path.write_text('Rank,Word\n' + ''.join(f'{row}\n' for row in rows), encoding='utf-8')
+        return str(path)
+    return write
+
+def words(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT word, id, rank, step, level FROM Words ORDER BY word").fetchall()
+    conn.close()
+    return {word: rest for word, *rest in rows}
+
+def catalog_version(db_path):
+    conn = sqlite3.connect(db_path)
+    version = conn.execute("SELECT version FROM CatalogVersion WHERE id = 1").fetchone()
+    conn.close()
+    return version[0] if version else 0
+
+def test_first_import_adds_every_valid_row(empty_db, write_csv):
+    csv_path = write_csv('1,the', '2,be', '150,running', '3000,toolarge', 'x,bad', '4,the')
+    summary = import_words(csv_path, empty_db)
+    
+    # A repeated word keeps its last rank; out of range and unparsable rows are skipped
+    assert summary == {'imported': 3, 'added': 3, 'reranked': 0, 'unchanged': 0, 'removed': 0, 'kept_in_use': 0}
+    assert {word: row[1:] for word, row in words(empty_db).items()} == {
+        'the': [4, 1, 1], 'be': [2, 1, 1], 'running': [150, 2, 3]
+    }
+    assert catalog_version(empty_db) == 1
+
+def test_reimport_only_applies_the_differences(empty_db, write_csv):
+    import_words(write_csv('1,the', '2,be', '3,and', '4,of', '5,a'), empty_db)
+    before = words(empty_db)
+    conn = sqlite3.connect(empty_db)
+    conn.execute("INSERT INTO Students (name) VALUES ('Ann')")
+    conn.execute("INSERT INTO StudentWords (student_id, word_id) VALUES (1, ?)", (before['of'][0],))
+    conn.commit()
+    conn.close()
+    
+    # 'be' moves to a later step, 'to' is new, 'and' and 'of' are dropped but 'of' is on Ann's list
+    summary = import_words(write_csv('1,the', '120,be', '5,a', '6,to', name='next.csv'), empty_db)
+    assert summary == {'imported': 4, 'added': 1, 'reranked': 1, 'unchanged': 2, 'removed': 1, 'kept_in_use': 1}
+    
+    after = words(empty_db)
+    assert sorted(after) == ['a', 'be', 'of', 'the', 'to']
+    # Existing words keep their ids, so student rows stay attached to them
+    assert after['the'] == before['the'] and after['of'] == before['of']
+    assert after['be'] == [before['be'][0], 120, 2, 1]
+    assert catalog_version(empty_db) == 2
+
+def test_unchanged_csv_leaves_the_catalog_version(empty_db, write_csv):
+    csv_path = write_csv('1,the', '2,be')
+    import_words(csv_path, empty_db)
+    summary = import_words(csv_path, empty_db)
+    assert (summary['added'], summary['reranked'], summary['unchanged'], summary['removed']) == (0, 0, 2, 0)
+    assert catalog_version(empty_db) == 1
+
+def test_batch_size_does_not_change_the_result(tmp_path, write_csv):
+    csv_path = write_csv(*(f'{rank},word{rank}' for rank in range(1, 101)))
+    results = []
+    for batch_size in (7, 1000):
+        db_path = str(tmp_path / f'batch{batch_size}.db')
+        create_database(db_path)
+        update_database(db_path)
+        results.append((import_words(csv_path, db_path, batch_size=batch_size), words(db_path)))
+    assert results[0] == results[1]
+
+def test_failed_import_changes_nothing(empty_db, write_csv, monkeypatch):
+    import_words(write_csv('1,the', '2,be'), empty_db)
+    before = words(empty_db)
+    
+    def fail(cursor):
+        raise sqlite3.OperationalError('disk full')
+    
+    # The last step before the commit fails, after every insert, update and delete has run
+    monkeypatch.setattr(setup_db, 'bump_catalog_version', fail)
+    with pytest.raises(sqlite3.OperationalError):
+        import_words(write_csv('1,and', '3,be', name='next.csv'), empty_db)
+    
+    assert words(empty_db) == before
+    assert catalog_version(empty_db) == 1
@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+
+from jobs import JobQueue
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(max_concurrency=2)
+    yield queue
+    queue.shutdown()
+
+def blocked_until(release, result='text'):
+    def func():
+        assert release.wait(5)
+        return result, False
+    return func
+
+def test_submitted_job_runs_and_finishes(queue):
+    job, deduplicated = queue.submit('key', 'story', lambda: ('Once upon a time.', False))
+    assert not deduplicated
+    assert job.wait(5)
+    
+    assert queue.get(job.id) is job
+    job = job.to_dict()
+    assert (job['status'], job['result'], job['cached']) == ('done', 'Once upon a time.', False)
+    assert job['submitted_at'] <= job['started_at'] <= job['finished_at']
+
+def test_failed_job_reports_its_error(queue):
+    def fail():
+        raise RuntimeError('Ollama is not running')
+    
+    job, _ = queue.submit('key', 'story', fail)
+    assert job.wait(5)
+    assert job.to_dict()['status'] == 'error' and job.to_dict()['error'] == 'Ollama is not running'
+    assert queue.stats()['failed'] == 1
+
+def test_identical_requests_share_a_job_until_it_finishes(queue):
+    release = threading.Event()
+    job, _ = queue.submit('key', 'story', blocked_until(release))
+    again, deduplicated = queue.submit('key', 'story', blocked_until(release))
+    assert deduplicated and again is job
+    
+    release.set()
+    assert job.wait(5)
+    # Retried once finished, a request gets a new job
+    assert queue.submit('key', 'story', blocked_until(release))[0] is not job
+    assert queue.stats()['deduplicated'] == 1
+
+def test_at_most_max_concurrency_jobs_run(queue):
+    release = threading.Event()
+    running = []
+    peak = []
+    lock = threading.Lock()
+    
+    def func():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        release.wait(5)
+        with lock:
+            running.pop()
+        return 'text', False
+    
+    jobs = [queue.submit(f'key{i}', 'story', func)[0] for i in range(5)]
+    deadline = time.monotonic() + 5
+    while queue.stats()['running'] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    
+    stats = queue.stats()
+    assert (stats['running'], stats['queue_depth']) == (2, 3)
+    assert [job.status for job in jobs].count('queued') == 3
+    
+    release.set()
+    assert all(job.wait(5) for job in jobs)
+    assert max(peak) == 2
+    assert queue.stats()['completed'] == 5
+
+def test_streams_and_jobs_share_the_slots(queue):
+    # A streaming request holds a slot the same way
+    queue.slots.acquire()
+    queue.slots.acquire()
+    job, _ = queue.submit('key', 'story', lambda: ('text', False))
+    assert not job.wait(0.1)
+    assert job.status == 'queued'
+    
+    queue.slots.release()
+    assert job.wait(5)
+    queue.slots.release()
+    with pytest.raises(ValueError):
+        # Bounded: releasing more than was taken is an error, not an extra slot
+        queue.slots.release()
+
+@pytest.fixture
+def ollama(pathway_app, monkeypatch, queue, client):
+    """Stands in for Ollama's generate call, answering once `release` is set."""
+    release = threading.Event()
+    calls = []
+    
+    def generate(prompt, url, model):
+        calls.append(prompt)
+        assert release.wait(5)
+        return 'Once upon a time.'
+    
+    monkeypatch.setattr(pathway_app, 'generation_jobs', queue)
+    monkeypatch.setattr(pathway_app, 'generate', generate)
+    client.post('/api/student/Ann/learning_words', json={'word_ids': [1, 2, 3]})
+    return release, calls
+
+def test_job_routes_submit_and_poll(client, ollama):
+    release, calls = ollama
+    response = client.post('/api/student/Ann/generate_story/jobs')
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['status'] in ('queued', 'running') and not job['deduplicated']
+    
+    # Asking again for the same words joins the same job
+    again = client.post('/api/student/Ann/generate_story/jobs').get_json()
+    assert again['job_id'] == job['job_id'] and again['deduplicated']
+    
+    # ?wait= returns when the wait runs out if the job is still going...
+    started = time.monotonic()
+    polled = client.get(f"/api/jobs/{job['job_id']}?wait=0.2").get_json()
+    assert polled['status'] in ('queued', 'running') and 'result' not in polled
+    assert time.monotonic() - started >= 0.2
+    
+    # ...and as soon as the job finishes otherwise
+    threading.Timer(0.1, release.set).start()
+    polled = client.get(f"/api/jobs/{job['job_id']}?wait=10").get_json()
+    assert (polled['status'], polled['result']) == ('done', 'Once upon a time.')
+    assert len(calls) == 1
+    
+    # The story is cached, so the next request is answered without a job
+    cached = client.post('/api/student/Ann/generate_story/jobs')
+    assert cached.status_code == 200
+    assert cached.get_json()['job_id'] is None and cached.get_json()['cached']
+
+def test_unknown_job_is_404(client, ollama):
+    assert client.get('/api/jobs/nope').status_code == 404
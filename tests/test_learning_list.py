@@ -0,0 +1,130 @@
+import sqlite3
+
+import pytest
+
+def student_state(db_path, name):
+    conn = sqlite3.connect(db_path)
+    student_id = conn.execute("SELECT id FROM Students WHERE name = ?", (name,)).fetchone()[0]
+    words = conn.execute("""
+        SELECT word_id, status FROM StudentWords WHERE student_id = ? ORDER BY word_id
+    """, (student_id,)).fetchall()
+    special_words = conn.execute("""
+        SELECT special_word_id, status FROM StudentSpecialWords WHERE student_id = ? ORDER BY special_word_id
+    """, (student_id,)).fetchall()
+    rewards = conn.execute("""
+        SELECT reward_type, word_id, special_word_id FROM Rewards WHERE student_id = ? ORDER BY id
+    """, (student_id,)).fetchall()
+    conn.close()
+    return words, special_words, rewards
+
+@pytest.fixture
+def special_word_id(client):
+    # Added for a third student, so its reward isn't part of the comparison
+    client.post('/api/student/Other/special_words', json={'word': 'zorbing'})
+    return client.get('/api/student/Other/special_words').get_json()['words'][0]['special_word_id']
+
+# Each step is (route suffix, batch op, word_ids, special_word_ids); word 3 is never on the list
+STEPS = [
+    ('learning_words/1/master', 'master', [1], []),
+    ('learning_words/1/master', 'master', [1], []),
+    ('learning_words/3/master', 'master', [3], []),
+    ('learning_words/1/learning', 'relearn', [1], []),
+    ('learning_words/1/master', 'master', [1], []),
+    ('special_words/{special}/master', 'master', [], ['special']),
+    ('special_words/{special}/master', 'master', [], ['special']),
+    ('special_words/{special}/learning', 'relearn', [], ['special']),
+]
+
+def test_single_and_batch_routes_give_the_same_result(client, db_path, special_word_id):
+    for name in ('Single', 'Batch'):
+        client.post(f'/api/student/{name}/learning_words', json={'word_ids': [1, 2], 'special_word_ids': [special_word_id]})
+    
+    for suffix, op, word_ids, special_word_ids in STEPS:
+        special_word_ids = [special_word_id for _ in special_word_ids]
+        response = client.post('/api/student/Single/' + suffix.format(special=special_word_id))
+        assert response.status_code == 200
+        response = client.patch('/api/student/Batch/learning_words', json={
+            'operations': [{'op': op, 'word_ids': word_ids, 'special_word_ids': special_word_ids}]
+        })
+        assert response.status_code == 200
+    
+    single = student_state(db_path, 'Single')
+    assert single == student_state(db_path, 'Batch')
+    
+    # A reward only for each move from learning to mastered
+    assert [reward[0] for reward in single[2]] == ['word_mastered', 'word_mastered', 'special_word_mastered']
+
+@pytest.mark.parametrize('operation', [
+    {'op': 'master', 'word_ids': [True]},
+    {'op': 'remove', 'word_ids': [1, False]},
+    {'op': 'relearn', 'special_word_ids': [True]},
+    {'op': 'master', 'word_ids': [1.0]},
+    {'op': 'master', 'word_ids': ['1']},
+])
+def test_batch_rejects_ids_that_are_not_integers(client, db_path, operation):
+    client.post('/api/student/Ann/learning_words', json={'word_ids': [1]})
+    before = student_state(db_path, 'Ann')
+    
+    # The valid first operation is not applied either
+    response = client.patch('/api/student/Ann/learning_words', json={
+        'operations': [{'op': 'master', 'word_ids': [1]}, operation]
+    })
+    assert response.status_code == 400
+    assert student_state(db_path, 'Ann') == before
+
+def add_special_words(client, words, **options):
+    response = client.post('/api/student/Ann/special_words/batch', json=dict(options, words=words))
+    assert response.status_code == 200
+    return response.get_json()['results']
+
+def test_batch_sorts_words_into_added_existing_and_errors(client, db_path):
+    results = add_special_words(client, ['zorbing', 'The', 'running', '', None, 7, ['quokka'], 'zorbing', 'quokka'])
+    
+    # New words become special words once each, in the order given
+    assert [added['word'] for added in results['added']] == ['zorbing', 'quokka']
+    assert not any('existing' in added for added in results['added'])
+    # Words in the main list (including inflected forms) are reported with their base word instead
+    assert [(word['word'], word['base_word']) for word in results['existing']] == [('The', 'the'), ('running', 'run')]
+    assert [error['word'] for error in results['errors']] == ['', None, 7, ['quokka']]
+    
+    words, special_words, rewards = student_state(db_path, 'Ann')
+    assert words == []
+    assert special_words == [(added['id'], 'learning') for added in sorted(results['added'], key=lambda a: a['id'])]
+    assert rewards == [('special_word_added', None, added['id']) for added in results['added']]
+
+def test_batch_force_adds_main_list_words_as_special_words(client, db_path):
+    results = add_special_words(client, ['houses', 'zorbing'], force_add=True)
+    
+    assert [(added['word'], added.get('existing')) for added in results['added']] == [('houses', True), ('zorbing', None)]
+    assert results['existing'] == [] and results['errors'] == []
+    assert len(student_state(db_path, 'Ann')[1]) == 2
+
+def test_batch_reuses_special_words_added_for_other_students(client, db_path):
+    client.post('/api/student/Other/special_words', json={'word': 'zorbing'})
+    special_word_id = client.get('/api/student/Other/special_words').get_json()['words'][0]['special_word_id']
+    
+    results = add_special_words(client, ['zorbing'])
+    assert results['added'] == [{'word': 'zorbing', 'id': special_word_id}]
+    
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM SpecialWords WHERE word = 'zorbing'").fetchone()[0] == 1
+    conn.close()
+
+def test_batch_runs_the_same_statements_for_any_number_of_words(sql_statements, client):
+    route = '/api/student/<student_name>/special_words/batch'
+    # The first batch also creates the student
+    add_special_words(client, ['zorbing'])
+    counts = []
+    for size in (2, 40):
+        before = sql_statements(route)
+        words = [f'zorb{size}x{i}' for i in range(size)] + ['the', 'running']
+        results = add_special_words(client, words)
+        assert len(results['added']) == size and len(results['existing']) == 2
+        counts.append(sql_statements(route) - before)
+    
+    assert counts[0] == counts[1]
+
+@pytest.mark.parametrize('body', [{}, {'words': []}, {'words': 'zorbing'}])
+def test_batch_needs_a_list_of_words(client, body):
+    response = client.post('/api/student/Ann/special_words/batch', json=body)
+    assert response.status_code == 400
@@ -0,0 +1,66 @@
+import pytest
+
+from catalog import WordCatalog, load_catalog
+from lemmas import inflections
+
+@pytest.mark.parametrize('word, forms', [
+    ('service', {'services', 'serviced', 'servicing'}),
+    ('stop', {'stops', 'stopped', 'stopping'}),
+    ('visit', {'visits', 'visited', 'visiting'}),
+    ('study', {'studies', 'studied', 'studying'}),
+    ('die', {'dies', 'died', 'dying'}),
+    ('knife', {'knives'}),
+    ('box', {'boxes'}),
+    ('happy', {'happier', 'happiest'}),
+    ('big', {'biggest'}),
+    ('go', {'goes', 'went', 'gone'}),
+    ('child', {'children'}),
+])
+def test_inflections_include(word, forms):
+    assert forms <= inflections(word)
+
+@pytest.mark.parametrize('word, not_forms', [
+    ('stop', {'stoped', 'stoping'}),  # One syllable always doubles
+    ('car', {'caring', 'cared'}),  # Forms of care
+    ('see', {'seing'}),
+    ('unit', {'united'}),
+    ('good', {'goods'}),
+    ('will', {'willing'}),
+    ('the', {'thes', 'theed'}),  # Function words get no endings
+])
+def test_inflections_exclude(word, not_forms):
+    assert not not_forms & inflections(word)
+
+def test_inflections_ignore_case_and_leave_out_the_word():
+    assert inflections('Run') == inflections('run')
+    assert 'run' not in inflections('run')
+
+@pytest.fixture(scope='module')
+def catalog(template_db):
+    return load_catalog(template_db)
+
+@pytest.mark.parametrize('word, base', [
+    ('believe', 'believe'),
+    ('Believe', 'believe'),
+    ('The', 'the'),
+    ('RUNNING', 'run'),
+    ('Services', 'service'),
+    ('Went', 'go'),
+])
+def test_lookup_base_ignores_case(catalog, word, base):
+    assert catalog.lookup_base(word)['word'] == base
+
+def test_lookup_base_skips_standalone_words(catalog):
+    assert catalog.lookup_base('united') is None
+    assert catalog.lookup_base('Goods') is None
+
+def test_lookup_ignores_case(catalog):
+    assert catalog.lookup('Believe') == catalog.lookup('believe')
+    assert catalog.word_id('THE') == catalog.word_id('the')
+    assert 'The' in catalog
+    # Inflected forms are only found by lookup_base
+    assert catalog.lookup('running') is None
+
+def test_more_frequent_spelling_wins():
+    catalog = WordCatalog([(1, 'may', 1), (2, 'May', 2)])
+    assert catalog.lookup('MAY')['id'] == 1
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+import llm_cache
+from llm_cache import ResponseCache
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(1000.0)
+    monkeypatch.setattr(llm_cache.time, 'time', clock)
+    return clock
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+def store(cache, conn, key):
+    cache.put(conn, key, 'story', 'model', 1, [key], f'text for {key}')
+
+def cached_keys(conn):
+    return sorted(row[0] for row in conn.execute("SELECT cache_key FROM LLMCache"))
+
+def test_entries_expire_after_the_ttl(clock, conn):
+    cache = ResponseCache(ttl=60)
+    store(cache, conn, 'old')
+    
+    clock.now += 59
+    assert cache.get(conn, 'old') == 'text for old'
+    
+    clock.now += 2
+    assert cache.get(conn, 'old') is None
+    
+    # The expired row is swept by the next put
+    store(cache, conn, 'new')
+    assert cached_keys(conn) == ['new']
+    assert cache.stats(conn)['evictions'] == 1
+
+def test_put_evicts_the_least_recently_used(clock, conn):
+    cache = ResponseCache(max_entries=3)
+    for key in ('a', 'b', 'c'):
+        store(cache, conn, key)
+        clock.now += 1
+    
+    # Reading 'a' makes 'b' the least recently used
+    assert cache.get(conn, 'a') == 'text for a'
+    clock.now += 1
+    store(cache, conn, 'd')
+    
+    assert cached_keys(conn) == ['a', 'c', 'd']
+    assert conn.execute("SELECT hits FROM LLMCache WHERE cache_key = 'a'").fetchone()[0] == 1
+
+def test_get_does_not_write(clock, conn):
+    cache = ResponseCache()
+    store(cache, conn, 'a')
+    changes = conn.total_changes
+    
+    for _ in range(3):
+        assert cache.get(conn, 'a') == 'text for a'
+    assert cache.get(conn, 'missing') is None
+    assert conn.total_changes == changes
+    assert not conn.in_transaction
+    
+    clock.now += 5
+    cache.flush(conn)
+    assert conn.execute("SELECT hits, last_used FROM LLMCache WHERE cache_key = 'a'").fetchone() == (3, 1000.0)
+
+def test_force_refresh_skips_the_cached_story(pathway_app, client, monkeypatch):
+    monkeypatch.setattr(pathway_app, 'llm_cache', ResponseCache())
+    stories = iter(['first story', 'second story'])
+    monkeypatch.setattr(pathway_app, 'generate', lambda prompt, url, model: next(stories))
+    client.post('/api/student/Ann/learning_words', json={'word_ids': [1, 2]})
+    url = '/api/student/Ann/generate_story'
+    
+    assert client.post(url).get_json() == {'story': 'first story', 'cached': False}
+    assert client.post(url).get_json() == {'story': 'first story', 'cached': True}
+    assert client.post(url + '?force_refresh=1').get_json() == {'story': 'second story', 'cached': False}
+    assert client.post(url).get_json() == {'story': 'second story', 'cached': True}
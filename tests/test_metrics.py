@@ -0,0 +1,64 @@
+import pytest
+
+from metrics import CONTENT_TYPE, Metrics
+
+def sample(text, name, **labels):
+    """The value of one series in Prometheus text output, or None if it is missing."""
+    label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    prefix = f'{name}{{{label_text}}} ' if labels else f'{name} '
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return None
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics()
+    metrics.start_request()
+    for seconds in (0.003, 0.02, 0.02, 90):
+        metrics.finish_request('/x', 'GET', 200, seconds)
+    text = metrics.render()
+    
+    duration = 'pathway_http_request_duration_seconds'
+    assert sample(text, f'{duration}_bucket', route='/x', method='GET', le='0.005') == 1
+    assert sample(text, f'{duration}_bucket', route='/x', method='GET', le='0.025') == 3
+    assert sample(text, f'{duration}_bucket', route='/x', method='GET', le='60.0') == 3
+    assert sample(text, f'{duration}_bucket', route='/x', method='GET', le='+Inf') == 4
+    assert sample(text, f'{duration}_count', route='/x', method='GET') == 4
+    assert sample(text, f'{duration}_sum', route='/x', method='GET') == pytest.approx(90.043)
+
+def test_label_values_are_escaped():
+    metrics = Metrics()
+    metrics.finish_request('/a"b\\c', 'GET', 200, 0.001)
+    assert 'route="/a\\"b\\\\c"' in metrics.render()
+
+def test_metrics_route_counts_requests_and_sql_per_route(client):
+    route = '/api/student/<student_name>/learning_words'
+    before = client.get('/metrics').get_data(as_text=True)
+    
+    client.post('/api/student/Ann/learning_words', json={'word_ids': [1, 2]})
+    for _ in range(3):
+        client.get('/api/student/Ann/learning_words')
+    client.get('/api/student/Ann/nothing-here')
+    
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == CONTENT_TYPE
+    text = response.get_data(as_text=True)
+    
+    def added(name, **labels):
+        return (sample(text, name, **labels) or 0) - (sample(before, name, **labels) or 0)
+    
+    # Requests by route template (not the student's name), method and status
+    assert added('pathway_http_requests_total', route=route, method='GET', status='200') == 3
+    assert added('pathway_http_requests_total', route=route, method='POST', status='200') == 1
+    assert added('pathway_http_requests_total', route='<unmatched>', method='GET', status='404') == 1
+    assert added('pathway_http_request_duration_seconds_count', route=route, method='GET') == 3
+    
+    # SQL work is counted per route, including what the POST ran on the writer thread
+    assert added('pathway_sql_statements_total', route=route) >= 3 * 2 + 3
+    assert added('pathway_sql_duration_seconds_total', route=route) > 0
+    assert added('pathway_sql_rows_total', route=route) >= 3 * 2
+    
+    # Gauges are read when /metrics is scraped
+    assert sample(text, 'pathway_db_pool_connections', state='in_use') is not None
+    assert sample(text, 'pathway_write_batch_size_count') >= 1
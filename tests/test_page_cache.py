@@ -0,0 +1,69 @@
+import gzip
+import os
+
+import pytest
+
+import page_cache
+from page_cache import CachedPage
+
+BODY = b'<html>' + b'pathway ' * 500 + b'</html>'
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    # brotli is optional; a standard install serves gzip only
+    monkeypatch.setattr(page_cache, 'brotli', None)
+
+@pytest.fixture
+def page(tmp_path):
+    path = tmp_path / 'page.html'
+    path.write_bytes(BODY)
+    return CachedPage(str(path))
+
+def test_gzip_without_brotli(without_brotli, page):
+    page.load()
+    assert set(page.variants) == {'identity', 'gzip'}
+    assert gzip.decompress(page.variants['gzip']) == BODY
+    assert page.choose_encoding('br, gzip') == 'gzip'
+    assert page.choose_encoding('br') == 'identity'
+
+def test_brotli_when_installed(page):
+    brotli = pytest.importorskip('brotli')
+    page.load()
+    assert set(page.variants) == {'identity', 'gzip', 'br'}
+    assert brotli.decompress(page.variants['br']) == BODY
+    assert page.choose_encoding('gzip, br') == 'br'
+    assert page.choose_encoding('gzip, br;q=0') == 'gzip'
+
+def test_each_encoding_has_its_own_etag(page):
+    page.load()
+    assert page.etag_for('identity') != page.etag_for('gzip')
+    assert page.matches(page.etag_for('gzip'))
+    assert page.matches(f'"other", W/{page.etag_for("identity")}')
+    assert not page.matches('"other"')
+
+def test_refresh_reloads_a_changed_file(page, tmp_path):
+    page.load()
+    etag = page.etag
+    path = tmp_path / 'page.html'
+    path.write_bytes(BODY + b'<!-- edited -->')
+    # The edit could land within the file system's timestamp resolution
+    os.utime(path, (page.mtime + 10, page.mtime + 10))
+    page.refresh()
+    assert page.etag != etag
+
+def test_page_route_without_brotli(without_brotli, pathway_app, client):
+    pathway_app.index_page.load()
+    response = client.get('/', headers={'Accept-Encoding': 'br, gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    
+    etag = response.headers['ETag']
+    assert client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code == 304
+
+def test_page_route_with_brotli(pathway_app, client):
+    brotli = pytest.importorskip('brotli')
+    pathway_app.index_page.load()
+    response = client.get('/', headers={'Accept-Encoding': 'br, gzip'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data) == pathway_app.index_page.variants['identity']
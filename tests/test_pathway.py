@@ -0,0 +1,57 @@
+import sqlite3
+import sys
+
+import pytest
+
+import pathway
+
+def run(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['pathway.py', *args])
+    pathway.main()
+
+def learning_words(db_path, name):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("""
+        SELECT sw.word_id FROM StudentWords sw JOIN Students s ON s.id = sw.student_id
+        WHERE s.name = ? ORDER BY sw.word_id
+    """, (name,)).fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+def write_batch(tmp_path, text):
+    path = tmp_path / 'batch.txt'
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+def test_batch_commits_every_command(db_path, tmp_path, monkeypatch, capsys):
+    batch = write_batch(tmp_path, "# Monday\nadd Ann 1 2 3\nremove Ann 2\nadd 'Bob Smith' 4\n")
+    run(monkeypatch, '--db', db_path, '--batch', batch)
+    
+    assert learning_words(db_path, 'Ann') == [1, 3]
+    assert learning_words(db_path, 'Bob Smith') == [4]
+    assert 'Ran 3 command(s).' in capsys.readouterr().out
+
+def test_failing_command_rolls_back_the_batch(db_path, tmp_path, monkeypatch, capsys):
+    # The third line only fails when it runs: level 1 of step 1 has 20 words
+    batch = write_batch(tmp_path, "add Ann 1 2\nassign Ann 1 1 1\nassign Ann 1 1 99\n")
+    with pytest.raises(SystemExit) as exit_info:
+        run(monkeypatch, '--db', db_path, '--batch', batch)
+    
+    assert exit_info.value.code == 1
+    assert 'line 3' in capsys.readouterr().out
+    assert learning_words(db_path, 'Ann') == []
+
+def test_bad_line_stops_the_batch_before_anything_runs(db_path, tmp_path, monkeypatch, capsys):
+    batch = write_batch(tmp_path, "add Ann 1\nfetch 40 1\n")
+    with pytest.raises(SystemExit):
+        run(monkeypatch, '--db', db_path, '--batch', batch)
+    
+    output = capsys.readouterr().out
+    assert 'line 2' in output and 'Added' not in output
+    assert learning_words(db_path, 'Ann') == []
+
+def test_single_command(db_path, monkeypatch, capsys):
+    run(monkeypatch, '--db', db_path, 'add', 'Ann', '5')
+    
+    assert learning_words(db_path, 'Ann') == [5]
+    assert "Added 1 word(s) to Ann's learning list." in capsys.readouterr().out
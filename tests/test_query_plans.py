@@ -0,0 +1,28 @@
+import os
+import sqlite3
+
+from check_query_plans import CANONICAL_QUERIES, check_query_plans
+
+BUNDLED_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pathway.db')
+
+def connect_read_only(path):
+    return sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+
+def test_fresh_database_uses_indexes(template_db):
+    conn = connect_read_only(template_db)
+    assert check_query_plans(conn) == []
+    conn.close()
+
+def test_bundled_database_uses_indexes():
+    conn = connect_read_only(BUNDLED_DB)
+    assert check_query_plans(conn) == []
+    conn.close()
+
+def test_missing_index_is_reported(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP INDEX idx_rewards_student_date_id")
+    failures = dict(check_query_plans(conn))
+    conn.close()
+    
+    assert {'rewards first page', 'rewards next page'} <= set(failures)
+    assert len(failures) < len(CANONICAL_QUERIES)
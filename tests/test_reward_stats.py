@@ -0,0 +1,60 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from reward_stats import read_reward_stats, rebuild_reward_rollups
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO Students (name) VALUES (?)", [('Ann',), ('Bob',)])
+    yield conn
+    conn.close()
+
+def reward(conn, student_id, reward_type, day, word_id=1):
+    column = 'word_id' if reward_type == 'word_mastered' else 'special_word_id'
+    return conn.execute(f"INSERT INTO Rewards (student_id, reward_type, reward_date, {column}) VALUES (?, ?, ?, ?)",
+                        (student_id, reward_type, f'{day} 10:00:00', word_id)).lastrowid
+
+def rollups(conn):
+    return (conn.execute("SELECT * FROM RewardDaily ORDER BY 1, 2, 3").fetchall(),
+            conn.execute("SELECT * FROM RewardTotals ORDER BY 1, 2").fetchall())
+
+def test_triggers_match_a_rebuild(conn):
+    ids = [
+        reward(conn, 1, 'word_mastered', '2026-10-01'),
+        reward(conn, 1, 'word_mastered', '2026-10-01', 2),
+        reward(conn, 1, 'special_word_added', '2026-10-02'),
+        reward(conn, 2, 'special_word_mastered', '2026-10-02'),
+        reward(conn, 2, 'word_mastered', '2026-10-03'),
+    ]
+    conn.execute("DELETE FROM Rewards WHERE id = ?", (ids[1],))
+    conn.execute("UPDATE Rewards SET reward_date = '2026-10-05 09:00:00' WHERE id = ?", (ids[2],))
+    conn.execute("UPDATE Rewards SET student_id = 1 WHERE id = ?", (ids[3],))
+    conn.execute("DELETE FROM Rewards WHERE id = ?", (ids[4],))
+    incremental = rollups(conn)
+    
+    rebuild_reward_rollups(conn.cursor())
+    assert incremental == rollups(conn)
+    # Emptied counts are removed, not left at zero
+    assert incremental[1] == [(1, 'special_word_added', 1), (1, 'special_word_mastered', 1), (1, 'word_mastered', 1)]
+
+def test_stats_totals_weeks_and_streak(conn):
+    for day in ('2026-10-14', '2026-10-16', '2026-10-17', '2026-10-17'):
+        reward(conn, 1, 'word_mastered', day)
+    reward(conn, 1, 'special_word_added', '2026-10-18')
+    reward(conn, 2, 'word_mastered', '2026-10-18')
+    
+    stats = read_reward_stats(conn, 1, today=date(2026, 10, 18), weeks=2, chart_days=3)
+    
+    assert stats['totals'] == {'word_mastered': 4, 'special_word_mastered': 0, 'special_word_added': 1, 'all': 5}
+    assert stats['streak'] == {'current': 3, 'last_active_day': '2026-10-18'}
+    # 2026-10-18 is a Sunday, so the week starting the 12th holds everything
+    assert [(week['week_start'], week['total']) for week in stats['weeks']] == [('2026-10-05', 0), ('2026-10-12', 5)]
+    assert [(day['day'], day['total']) for day in stats['days']] == [('2026-10-16', 1), ('2026-10-17', 2), ('2026-10-18', 1)]
+
+def test_streak_survives_until_the_end_of_the_next_day(conn):
+    reward(conn, 1, 'word_mastered', '2026-10-17')
+    assert read_reward_stats(conn, 1, today=date(2026, 10, 18))['streak']['current'] == 1
+    assert read_reward_stats(conn, 1, today=date(2026, 10, 19))['streak']['current'] == 0
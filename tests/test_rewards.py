@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+# (word_id, special_word_id, reward_type, reward_date, notes), inserted with ids 1 to 5
+REWARDS = [
+    (1, None, 'word_mastered', '2026-10-01 09:00:00', None),
+    (2, None, 'word_mastered', '2026-10-01 09:00:00', None),  # Same time as 1, so the id breaks the tie
+    (None, 1, 'special_word_added', '2026-10-02 10:00:00', None),
+    (None, 1, 'special_word_mastered', '2026-10-03 11:00:00', 'gold star'),
+    (3, None, 'word_mastered', '2026-10-04 08:00:00', '100% right'),
+]
+
+@pytest.fixture
+def db_path(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO Students (name) VALUES (?)", [('Ann',), ('Bob',)])
+    conn.execute("INSERT INTO SpecialWords (id, word) VALUES (1, 'zorbing')")
+    conn.executemany("""
+        INSERT INTO Rewards (student_id, word_id, special_word_id, reward_type, reward_date, notes)
+        VALUES (1, ?, ?, ?, ?, ?)
+    """, REWARDS)
+    # Another student's reward never shows up in Ann's pages
+    conn.execute("INSERT INTO Rewards (student_id, word_id, reward_type, reward_date) "
+                 "VALUES (2, 1, 'word_mastered', '2026-10-02 12:00:00')")
+    conn.commit()
+    conn.close()
+    return db_path
+
+def reward_ids(client, query=''):
+    response = client.get(f'/api/student/Ann/rewards?{query}')
+    assert response.status_code == 200
+    return [reward['id'] for reward in response.get_json()['rewards']]
+
+def test_pages_follow_the_before_cursor(client):
+    pages = []
+    query = 'limit=2'
+    while True:
+        body = client.get(f'/api/student/Ann/rewards?{query}').get_json()
+        pages.append([reward['id'] for reward in body['rewards']])
+        if body['next_before'] is None:
+            break
+        query = f"limit=2&before={body['next_before']}"
+    
+    # Newest first, and rows sharing a reward_date are neither repeated nor skipped across pages
+    assert pages == [[5, 4], [3, 2], [1]]
+
+def test_default_page_has_everything_and_no_cursor(client):
+    body = client.get('/api/student/Ann/rewards').get_json()
+    assert [reward['id'] for reward in body['rewards']] == [5, 4, 3, 2, 1]
+    assert body['next_before'] is None
+    assert body['rewards'][1]['word'] == 'zorbing'
+
+def test_type_filter(client):
+    assert reward_ids(client, 'type=word_mastered') == [5, 2, 1]
+    assert reward_ids(client, 'type=special_word_added, special_word_mastered') == [4, 3]
+
+def test_date_range_includes_whole_days(client):
+    assert reward_ids(client, 'from=2026-10-02&to=2026-10-03') == [4, 3]
+    # A time after the date is ignored
+    assert reward_ids(client, 'from=2026-10-02T23:00&to=2026-10-02T00:00') == [3]
+    assert reward_ids(client, 'to=2026-10-01') == [2, 1]
+
+def test_text_filter_matches_notes_and_words(client):
+    assert reward_ids(client, 'q=gold') == [4]
+    assert reward_ids(client, 'q=zorb') == [4, 3]
+    assert reward_ids(client, 'q=BE') == [2]
+    # LIKE wildcards are matched literally
+    assert reward_ids(client, 'q=%25') == [5]
+    assert reward_ids(client, 'q=_') == []
+
+def test_filters_combine_with_paging(client):
+    body = client.get('/api/student/Ann/rewards?type=word_mastered&limit=1&before=2026-10-04 08:00:00,5').get_json()
+    assert [reward['id'] for reward in body['rewards']] == [2]
+    assert body['next_before'] == '2026-10-01 09:00:00,2'
+
+@pytest.mark.parametrize('query', [
+    'limit=abc',
+    'limit=',
+    'limit=0',
+    'limit=-1',
+    'limit=201',
+    'before=5',
+    'before=2026-10-01 09:00:00,x',
+    'before=yesterday,5',
+    'before=2026-13-01 09:00:00,5',
+    'from=2026-02-30',
+    'from=20261001',
+    'to=01/10/2026',
+    'to=2026-10',
+])
+def test_invalid_parameters_are_rejected(client, query):
+    response = client.get(f'/api/student/Ann/rewards?{query}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
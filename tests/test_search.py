@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+from search import edit_distance, search_words
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+def words(found):
+    return [match['word'] for match in found['results']]
+
+@pytest.mark.parametrize('a, b, distance', [
+    ('house', 'house', 0),
+    ('house', 'horse', 1),
+    ('form', 'from', 1),  # A swap is one edit
+    ('house', 'hose', 1),
+    ('kitten', 'sitting', 3),
+])
+def test_edit_distance(a, b, distance):
+    assert edit_distance(a, b, 3) == distance
+
+def test_edit_distance_stops_above_the_limit():
+    assert edit_distance('kitten', 'sitting', 1) == 2
+    assert edit_distance('a', 'abcdef', 2) == 3
+
+def test_exact_match_comes_first(conn):
+    found = search_words(conn, 'House')
+    assert found['query'] == 'house'
+    assert words(found)[0] == 'house'
+    assert found['results'][0]['type'] == 'word'
+
+def test_misspellings_are_found(conn):
+    assert words(search_words(conn, 'familly'))[0] == 'family'
+    assert 'because' in words(search_words(conn, 'becuase'))
+
+def test_short_queries_match_prefixes(conn):
+    found = search_words(conn, 'ab', limit=100)
+    assert found['results']
+    assert all(word.lower().startswith('ab') for word in words(found))
+
+def test_step_filter_keeps_the_facets(conn):
+    everything = search_words(conn, 'play', limit=100)
+    step = everything['results'][0]['step']
+    filtered = search_words(conn, 'play', limit=100, step=step)
+    
+    assert filtered['facets'] == everything['facets']
+    assert {match['step'] for match in filtered['results']} == {step}
+    assert filtered['total'] == everything['facets']['steps'][step]
+
+def test_special_words_are_indexed_by_trigger(conn):
+    conn.execute("INSERT INTO SpecialWords (word) VALUES ('zorbing')")
+    special_id = conn.execute("SELECT id FROM SpecialWords WHERE word = 'zorbing'").fetchone()[0]
+    match = search_words(conn, 'zorbin')['results'][0]
+    assert (match['id'], match['word'], match['type'], match['step']) == (special_id, 'zorbing', 'special', None)
+    
+    conn.execute("UPDATE SpecialWords SET word = 'quokka' WHERE id = ?", (special_id,))
+    assert search_words(conn, 'zorbing')['facets']['special'] == 0
+    assert words(search_words(conn, 'quokka')) == ['quokka']
+    
+    conn.execute("DELETE FROM SpecialWords WHERE id = ?", (special_id,))
+    assert search_words(conn, 'quokka')['facets']['special'] == 0
+
+def test_empty_query(conn):
+    assert search_words(conn, '   ')['total'] == 0
+
+def test_search_route(client):
+    response = client.get('/api/search?q=familly')
+    assert response.status_code == 200
+    assert response.get_json()['results'][0]['word'] == 'family'
@@ -0,0 +1,36 @@
+import sys
+
+import pytest
+
+import serve
+
+@pytest.fixture
+def servers(monkeypatch, pathway_app):
+    # Records which server main() would start instead of listening on a port
+    started = []
+    monkeypatch.setattr(serve, 'run_threaded', lambda wsgi_app, *args: started.append(('threaded', wsgi_app) + args))
+    monkeypatch.setattr(serve, 'run_gunicorn', lambda wsgi_app, *args: started.append(('gunicorn', wsgi_app) + args))
+    return started
+
+def test_one_threaded_process_without_gunicorn(monkeypatch, capsys, servers, pathway_app, db_path):
+    # gunicorn is optional, and not available on Windows
+    monkeypatch.setattr(serve, 'BaseApplication', None)
+    monkeypatch.setattr(sys, 'argv', ['serve.py', '--db', db_path, '--port', '5055', '--workers', '4'])
+    serve.main()
+    
+    assert servers == [('threaded', pathway_app.app, '0.0.0.0', 5055)]
+    assert 'gunicorn is not installed' in capsys.readouterr().out
+
+def test_gunicorn_workers_when_installed(monkeypatch, servers, pathway_app, db_path):
+    pytest.importorskip('gunicorn')
+    monkeypatch.setattr(sys, 'argv', ['serve.py', '--db', db_path, '--workers', '3', '--threads', '8'])
+    serve.main()
+    
+    assert servers == [('gunicorn', pathway_app.app, '0.0.0.0', 5001, 3, 8, serve.GRACEFUL_TIMEOUT)]
+
+def test_missing_database_is_not_served(monkeypatch, capsys, servers, tmp_path):
+    monkeypatch.setattr(sys, 'argv', ['serve.py', '--db', str(tmp_path / 'missing.db')])
+    serve.main()
+    
+    assert servers == []
+    assert 'Error' in capsys.readouterr().out
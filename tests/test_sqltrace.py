@@ -0,0 +1,25 @@
+import sqlite3
+
+import pytest
+
+import sqltrace
+from sqltrace import TRACED_STATEMENTS, SQLTracer, TracedConnection
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqltrace, 'tracer', SQLTracer(log_path=str(tmp_path / 'trace.jsonl')))
+    conn = sqlite3.connect(':memory:', factory=TracedConnection)
+    conn.execute("CREATE TABLE t (x)")
+    yield conn
+    conn.close()
+
+def test_traced_statements_stay_bounded(conn):
+    for _ in range(20):
+        conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(50)])
+        conn.commit()
+    assert len(conn.traced_statements) <= TRACED_STATEMENTS
+
+def test_execute_keeps_the_expanded_statement(conn):
+    conn.cursor().execute("SELECT ? + 1", (41,))
+    assert list(conn.traced_statements) == ['SELECT 41 + 1']
+    assert 'SELECT ? + ?' in [key for key, *_ in sqltrace.tracer.top()]
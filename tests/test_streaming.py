@@ -0,0 +1,101 @@
+import json
+
+import pytest
+import requests
+
+from jobs import JobQueue
+
+STREAM_URL = '/api/student/Ann/generate_story/stream'
+
+@pytest.fixture
+def slots(pathway_app, monkeypatch):
+    # One Ollama slot, so a second generation has to queue
+    jobs = JobQueue(max_concurrency=1)
+    monkeypatch.setattr(pathway_app, 'generation_jobs', jobs)
+    yield jobs.slots
+    jobs.shutdown()
+
+@pytest.fixture
+def ollama(pathway_app, monkeypatch, client):
+    """Stands in for Ollama's streaming API: yields the tokens (or raises the errors) set on it."""
+    class Ollama:
+        tokens = ['Once ', 'upon ', 'a time.']
+        calls = 0
+        
+        def stream(self, prompt, url, model):
+            self.calls += 1
+            for token in self.tokens:
+                if isinstance(token, Exception):
+                    raise token
+                yield token
+    
+    stub = Ollama()
+    monkeypatch.setattr(pathway_app, 'stream_generate', stub.stream)
+    client.post('/api/student/Ann/learning_words', json={'word_ids': [1, 2, 3]})
+    return stub
+
+def parse_events(chunks):
+    events = []
+    for message in ''.join(chunks).split('\n\n'):
+        if message:
+            event, data = message.split('\n')
+            events.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+    return events
+
+def stream(client):
+    response = client.post(STREAM_URL, buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    return response
+
+def test_tokens_then_done_and_a_cached_replay(client, slots, ollama):
+    events = parse_events(chunk.decode() for chunk in stream(client).response)
+    assert events == [('token', {'text': 'Once '}), ('token', {'text': 'upon '}), ('token', {'text': 'a time.'}),
+                      ('done', {'cached': False})]
+    assert slots.acquire(blocking=False)
+    slots.release()
+    
+    # The finished story is replayed from the cache in the same format
+    events = parse_events(chunk.decode() for chunk in stream(client).response)
+    assert events == [('token', {'text': 'Once upon a time.'}), ('done', {'cached': True})]
+    assert ollama.calls == 1
+
+def test_error_event_when_ollama_fails(client, slots, ollama):
+    ollama.tokens = ['Once ', requests.exceptions.ConnectionError('refused')]
+    events = parse_events(chunk.decode() for chunk in stream(client).response)
+    
+    assert [event for event, _ in events] == ['token', 'error']
+    assert 'Error connecting to Ollama' in events[1][1]['error']
+    assert slots.acquire(blocking=False)
+    slots.release()
+    
+    # A failed generation is not cached, so the next request asks Ollama again
+    events = parse_events(chunk.decode() for chunk in stream(client).response)
+    assert [event for event, _ in events] == ['token', 'error']
+    assert ollama.calls == 2
+
+def test_queued_event_while_the_slot_is_busy(client, slots, ollama):
+    slots.acquire()
+    chunks = iter(stream(client).response)
+    assert parse_events([next(chunks).decode()]) == [('queued', {})]
+    
+    slots.release()
+    events = parse_events(chunk.decode() for chunk in chunks)
+    assert [event for event, _ in events] == ['token', 'token', 'token', 'done']
+
+def test_disconnect_releases_the_slot(client, slots, ollama):
+    ollama.tokens = ['word '] * 1000
+    response = stream(client)
+    chunks = iter(response.response)
+    assert parse_events([next(chunks).decode()]) == [('token', {'text': 'word '})]
+    assert not slots.acquire(blocking=False)
+    
+    # The browser goes away mid-stream; the server closes the response iterator
+    response.close()
+    assert slots.acquire(blocking=False)
+    slots.release()
+    
+    # A cancelled stream is not cached
+    ollama.tokens = ['Complete.']
+    events = parse_events(chunk.decode() for chunk in stream(client).response)
+    assert events[-1] == ('done', {'cached': False})
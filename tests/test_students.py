@@ -0,0 +1,34 @@
+import sqlite3
+
+from students import get_student_id
+
+def test_write_after_student_recreated_elsewhere_uses_new_id(client, db_path):
+    assert client.post('/api/student/Eve/learning_words', json={'word_ids': [1]}).status_code == 200
+    # Reading fills this process's name -> id cache
+    assert client.get('/api/student/Eve/learning_words').status_code == 200
+    
+    # Another worker deletes Eve and creates the student again within the cache's check interval
+    other = sqlite3.connect(db_path)
+    old_id = other.execute("SELECT id FROM Students WHERE name = 'Eve'").fetchone()[0]
+    other.execute("DELETE FROM StudentWords WHERE student_id = ?", (old_id,))
+    other.execute("DELETE FROM Students WHERE id = ?", (old_id,))
+    other.execute("INSERT INTO Students (name) VALUES ('Eve')")
+    new_id = other.execute("SELECT id FROM Students WHERE name = 'Eve'").fetchone()[0]
+    other.commit()
+    assert new_id != old_id
+    
+    assert client.post('/api/student/Eve/learning_words', json={'word_ids': [2]}).status_code == 200
+    
+    rows = other.execute("SELECT student_id, word_id FROM StudentWords").fetchall()
+    other.close()
+    assert rows == [(new_id, 2)]
+
+def test_uncached_lookup_does_not_cache_uncommitted_students(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO Students (name) VALUES ('Zoe')")
+    student_id = get_student_id(conn, 'Zoe', cached=False)
+    conn.rollback()
+    
+    assert student_id is not None
+    assert get_student_id(conn, 'Zoe') is None
+    conn.close()
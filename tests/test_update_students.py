@@ -0,0 +1,122 @@
+import sqlite3
+
+import pytest
+
+import update_students
+from update_students import STUDENT_TABLES, get_columns, update_database_with_students
+
+# The student tables as they were before the Students table existed, keyed on the student's name
+LEGACY_SCHEMA = """
+    CREATE TABLE Words (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        word TEXT NOT NULL UNIQUE,
+        rank INTEGER NOT NULL CHECK(rank BETWEEN 1 AND 2800),
+        step INTEGER NOT NULL CHECK(step BETWEEN 1 AND 28),
+        level INTEGER NOT NULL CHECK(level BETWEEN 1 AND 5)
+    );
+    CREATE TABLE StudentWords (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_name TEXT NOT NULL,
+        word_id INTEGER NOT NULL,
+        status TEXT NOT NULL CHECK(status IN ('learning','mastered')) DEFAULT 'learning',
+        UNIQUE(student_name, word_id)
+    );
+    CREATE TABLE SpecialWords (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        word TEXT NOT NULL UNIQUE,
+        added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        notes TEXT
+    );
+    CREATE TABLE StudentSpecialWords (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_name TEXT NOT NULL,
+        special_word_id INTEGER NOT NULL,
+        status TEXT NOT NULL CHECK(status IN ('learning','mastered')) DEFAULT 'learning',
+        added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        mastered_date TIMESTAMP NULL,
+        UNIQUE(student_name, special_word_id)
+    );
+    CREATE TABLE Rewards (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_name TEXT NOT NULL,
+        word_id INTEGER NULL,
+        special_word_id INTEGER NULL,
+        reward_type TEXT NOT NULL,
+        reward_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        notes TEXT
+    );
+    CREATE TABLE StudentProgress (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_name TEXT NOT NULL UNIQUE,
+        current_step INTEGER NOT NULL DEFAULT 1,
+        current_level INTEGER NOT NULL DEFAULT 1,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    INSERT INTO Words (id, word, rank, step, level) VALUES (1, 'the', 1, 1, 1), (2, 'be', 2, 1, 1), (3, 'of', 3, 1, 1);
+    INSERT INTO SpecialWords (id, word) VALUES (1, 'zorbing');
+    INSERT INTO StudentWords (student_name, word_id, status) VALUES
+        ('Bob', 1, 'learning'), ('Ann', 1, 'mastered'), ('Ann', 2, 'learning');
+    INSERT INTO StudentSpecialWords (student_name, special_word_id, mastered_date) VALUES ('Ann', 1, NULL);
+    INSERT INTO Rewards (student_name, word_id, reward_type, reward_date) VALUES ('Ann', 1, 'word_mastered', '2026-10-01 10:00:00');
+    INSERT INTO StudentProgress (student_name, current_step, current_level) VALUES ('Cat', 4, 2);
+"""
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+    return path
+
+def test_student_names_become_ids(legacy_db):
+    assert update_database_with_students(legacy_db) == list(STUDENT_TABLES)
+    
+    conn = sqlite3.connect(legacy_db)
+    students = dict(conn.execute("SELECT name, id FROM Students"))
+    assert sorted(students) == ['Ann', 'Bob', 'Cat']
+    
+    for table in STUDENT_TABLES:
+        columns = get_columns(conn.cursor(), table)
+        assert 'student_name' not in columns and 'student_id' in columns
+    
+    assert conn.execute("SELECT student_id, word_id, status FROM StudentWords ORDER BY id").fetchall() == [
+        (students['Bob'], 1, 'learning'), (students['Ann'], 1, 'mastered'), (students['Ann'], 2, 'learning')
+    ]
+    assert conn.execute("SELECT student_id, special_word_id FROM StudentSpecialWords").fetchall() == [(students['Ann'], 1)]
+    assert conn.execute("SELECT student_id, reward_date FROM Rewards").fetchall() == [(students['Ann'], '2026-10-01 10:00:00')]
+    assert conn.execute("SELECT student_id, current_step, current_level FROM StudentProgress").fetchall() == [(students['Cat'], 4, 2)]
+    
+    # The side tables are filled from the migrated rows and kept current by their triggers again
+    assert conn.execute("SELECT student_id, reward_type, count FROM RewardTotals").fetchall() == [(students['Ann'], 'word_mastered', 1)]
+    conn.execute("INSERT INTO StudentWords (student_id, word_id) VALUES (?, 3)", (students['Bob'],))
+    assert conn.execute("SELECT COUNT(*) FROM ChangeLog WHERE student_id = ?", (students['Bob'],)).fetchone()[0] == 1
+    assert conn.execute("SELECT version FROM StudentDataVersion WHERE student_id = ?", (students['Bob'],)).fetchone()[0] == 1
+    conn.close()
+
+def test_migration_runs_once(legacy_db):
+    update_database_with_students(legacy_db)
+    assert update_database_with_students(legacy_db) == []
+
+def test_failed_migration_leaves_the_old_tables(legacy_db, monkeypatch):
+    def fail(cursor):
+        raise sqlite3.OperationalError("disk full")
+    
+    monkeypatch.setattr(update_students, 'create_reward_rollups', fail)
+    
+    with pytest.raises(sqlite3.OperationalError):
+        update_database_with_students(legacy_db)
+    
+    conn = sqlite3.connect(legacy_db)
+    assert 'student_name' in get_columns(conn.cursor(), 'StudentWords')
+    assert conn.execute("SELECT COUNT(*) FROM StudentWords").fetchone()[0] == 3
+    conn.close()
+
+@pytest.fixture
+def db_path(legacy_db):
+    # The app fixtures start the server on the legacy database instead of a new one
+    return legacy_db
+
+def test_migrated_database_is_served(client):
+    words = client.get('/api/student/Ann/learning_words').get_json()
+    assert [word['word'] for word in words['words']] == ['be', 'zorbing']
@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from writer import GroupCommitWriter
+
+@pytest.fixture
+def writer(db_path):
+    writer = GroupCommitWriter(db_path, max_delay=0.05)
+    yield writer
+    writer.close()
+
+def insert_student(name):
+    def write(cursor):
+        cursor.execute("INSERT INTO Students (name) VALUES (?)", (name,))
+        return cursor.lastrowid
+    return write
+
+def student_names(db_path):
+    conn = sqlite3.connect(db_path)
+    names = [row[0] for row in conn.execute("SELECT name FROM Students ORDER BY name")]
+    conn.close()
+    return names
+
+def run_concurrently(writer, funcs):
+    results = [None] * len(funcs)
+    
+    def run(i):
+        try:
+            results[i] = writer.execute(funcs[i])
+        except Exception as error:
+            results[i] = error
+    
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(funcs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_writes_share_commits(writer, db_path):
+    results = run_concurrently(writer, [insert_student(f"s{i:02d}") for i in range(20)])
+    
+    assert all(isinstance(result, int) for result in results)
+    assert student_names(db_path) == [f"s{i:02d}" for i in range(20)]
+    stats = writer.stats()
+    assert stats['writes'] == 20
+    assert stats['batches'] < 20
+    assert stats['largest_batch'] > 1
+
+def test_failing_write_is_rolled_back_alone(writer, db_path):
+    def failing(cursor):
+        cursor.execute("INSERT INTO Students (name) VALUES ('half done')")
+        raise ValueError("bad write")
+    
+    results = run_concurrently(writer, [insert_student('a'), failing, insert_student('b')])
+    
+    assert isinstance(results[1], ValueError)
+    assert student_names(db_path) == ['a', 'b']
+    assert writer.stats()['failed'] == 1
+
+def test_close_commits_queued_writes(db_path):
+    # A long window keeps the writes queued until close is called
+    writer = GroupCommitWriter(db_path, max_delay=0.5)
+    threads = [threading.Thread(target=writer.execute, args=(insert_student(f"q{i}"),)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    writer.close()
+    for thread in threads:
+        thread.join()
+    
+    assert len(student_names(db_path)) == 10
+    assert writer.stats()['queued'] == 0
+
+def test_timed_out_write_is_cancelled_before_it_runs(writer, db_path):
+    release = threading.Event()
+    
+    def blocking(cursor):
+        release.wait(5)
+    
+    blocker = threading.Thread(target=writer.execute, args=(blocking,))
+    blocker.start()
+    time.sleep(0.1)  # The blocking write's batch is now running
+    
+    with pytest.raises(TimeoutError, match='cancelled'):
+        writer.execute(insert_student('late'), timeout=0.1)
+    release.set()
+    blocker.join()
+    
+    # The writer carries on, and the cancelled write never ran
+    writer.execute(insert_student('next'))
+    assert student_names(db_path) == ['next']
+
+def test_failed_writer_thread_fails_writes_and_restarts(tmp_path, db_path):
+    broken = GroupCommitWriter(os.path.join(tmp_path, 'missing', 'pathway.db'))
+    started = time.monotonic()
+    with pytest.raises(sqlite3.OperationalError):
+        broken.execute(insert_student('x'), timeout=5)
+    assert time.monotonic() - started < 1
+    
+    # The next write starts a new thread instead of waiting on the dead one
+    broken.db_path = db_path
+    broken.execute(insert_student('x'))
+    broken.close()
+    assert student_names(db_path) == ['x']
+
+def test_housekeeping_runs_every_n_writes_in_the_batch(db_path):
+    runs = []
+    
+    def housekeeping(cursor):
+        runs.append(cursor.connection.in_transaction)
+        if len(runs) == 1:
+            # A failing run is rolled back on its own and retried with the next batch
+            cursor.execute("INSERT INTO Students (name) VALUES ('housekeeping')")
+            raise ValueError("housekeeping failed")
+    
+    writer = GroupCommitWriter(db_path, housekeeping=housekeeping, housekeeping_every=3)
+    for i in range(5):
+        writer.execute(insert_student(f"h{i}"))
+    writer.close()
+    
+    # Due after the third write, it fails there and runs again after the fourth
+    assert runs == [True, True]
+    assert student_names(db_path) == [f"h{i}" for i in range(5)]
+    assert writer.stats()['failed'] == 0
+
+def test_write_route_reports_the_sql_run_by_the_writer(sql_statements, client):
+    route = '/api/student/<student_name>/learning_words/<int:word_id>'
+    assert client.post('/api/student/Eve/learning_words', json={'word_ids': [1]}).status_code == 200
+    before = sql_statements(route)
+    
+    # The route itself runs no SQL; the lookup and delete happen on the writer thread
+    assert client.delete('/api/student/Eve/learning_words/1').status_code == 200
+    assert sql_statements(route) >= before + 2
@@ -1,9 +1,20 @@
 import sqlite3
 import argparse
 
+from update_students import migrate_student_names
+from update_indexes import create_covering_indexes
+from data_versions import create_data_version_triggers
+from change_log import create_change_log
+from reward_stats import create_reward_rollups
+from search import create_search_index
+
 def update_database(db_path='pathway.db'):
     """Update the database schema to support special words and rewards."""
     conn = sqlite3.connect(db_path)
+    
+    # Convert databases created before the Students table existed
+    migrate_student_names(conn)
+    
     cursor = conn.cursor()
     
     # Create SpecialWords table for words not in the 2800-word database
@@ -20,12 +31,13 @@ def update_database(db_path='pathway.db'):
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS StudentSpecialWords (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            student_name TEXT NOT NULL,
+            student_id INTEGER NOT NULL,
             special_word_id INTEGER NOT NULL,
             status TEXT NOT NULL CHECK(status IN ('learning','mastered')) DEFAULT 'learning',
             added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             mastered_date TIMESTAMP NULL,
-            UNIQUE(student_name, special_word_id),
+            UNIQUE(student_id, special_word_id),
+            FOREIGN KEY(student_id) REFERENCES Students(id) ON DELETE CASCADE,
             FOREIGN KEY(special_word_id) REFERENCES SpecialWords(id) ON DELETE CASCADE
         )
     """)
@@ -34,21 +46,30 @@ def update_database(db_path='pathway.db'):
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS Rewards (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            student_name TEXT NOT NULL,
+            student_id INTEGER NOT NULL,
             word_id INTEGER NULL,  -- For regular words
             special_word_id INTEGER NULL,  -- For special words
             reward_type TEXT NOT NULL,  -- 'word_mastered', 'special_word_mastered', etc.
             reward_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             notes TEXT,
             CHECK ((word_id IS NOT NULL AND special_word_id IS NULL) OR 
-                   (word_id IS NULL AND special_word_id IS NOT NULL))
+                   (word_id IS NULL AND special_word_id IS NOT NULL)),
+            FOREIGN KEY(student_id) REFERENCES Students(id) ON DELETE CASCADE
         )
     """)
     
     # Add indexes for performance
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_special_words_word ON SpecialWords(word)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_student_special_words ON StudentSpecialWords(student_name, status)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_rewards_student ON Rewards(student_name)")
+    create_covering_indexes(cursor)
+    
+    # Record every change to a student's rows (data versions and the change log)
+    create_data_version_triggers(cursor)
+    create_change_log(cursor)
+    
+    # Daily reward counts for the stats endpoint
+    create_reward_rollups(cursor)
+    
+    # Index the special words for search as well
+    create_search_index(cursor)
     
     conn.commit()
     conn.close()
@@ -0,0 +1,59 @@
+import sqlite3
+import argparse
+
+# Composite indexes that cover the per-student queries in app.py and the CLIs,
+# so they are answered from the index alone and come back already sorted
+COVERING_INDEXES = {
+    # Learning/mastered word ids for a student
+    'idx_studentwords_student_status_word': ('StudentWords', 'student_id, status, word_id'),
+    # A student's special words by date added (learning list and special words tab)
+    'idx_student_special_words_added': ('StudentSpecialWords', 'student_id, added_date, status, special_word_id, mastered_date'),
+    # A student's rewards, newest first, paged by (reward_date, id)
+    'idx_rewards_student_date_id': ('Rewards', 'student_id, reward_date, id, reward_type, notes, word_id, special_word_id')
+}
+
+# Indexes made redundant by the ones above (or by a UNIQUE constraint)
+SUPERSEDED_INDEXES = (
+    'idx_studentwords_student',
+    'idx_student_special_words',
+    'idx_rewards_student',
+    'idx_rewards_student_date',
+    'idx_special_words_word'
+)
+
+def create_covering_indexes(cursor):
+    """Create the covering indexes and drop the ones they replace; tables that don't exist yet are skipped."""
+    tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    
+    created = []
+    for name, (table, columns) in COVERING_INDEXES.items():
+        if table in tables:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})")
+            created.append(name)
+    
+    for name in SUPERSEDED_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    
+    return created
+
+def update_indexes(db_path='pathway.db'):
+    """Bring an existing database's indexes up to date."""
+    conn = sqlite3.connect(db_path)
+    try:
+        created = create_covering_indexes(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+    
+    return created
+
+def main():
+    parser = argparse.ArgumentParser(description='Add covering indexes to the Pathway database')
+    parser.add_argument('--db', default='pathway.db', help='Path to the database')
+    args = parser.parse_args()
+    
+    created = update_indexes(args.db)
+    print(f"Indexes up to date: {', '.join(created) if created else 'no student tables found'}")
+
+if __name__ == '__main__':
+    main()
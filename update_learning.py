@@ -1,74 +1,78 @@
-import sqlite3
 import argparse
 import sys
 
-def get_learning_words(student_name, db_path='pathway.db'):
+from catalog import get_catalog
+from students import get_student_id
+from sqltrace import connect
+from search import search_words
+
+def get_learning_words(student_name, db_path='pathway.db', conn=None):
     """Get all learning words for a student."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT w.id, w.word, w.step, w.level
-        FROM StudentWords sw
-        JOIN Words w ON sw.word_id = w.id
-        WHERE sw.student_name = ? AND sw.status = 'learning'
-        ORDER BY w.step, w.level, w.rank
-    """, (student_name,))
-    
-    words = cursor.fetchall()
-    conn.close()
-    
-    return words
+    own_conn = conn is None
+    if own_conn:
+        conn = connect(db_path)
+    
+    try:
+        student_id = get_student_id(conn, student_name)
+        word_ids = [row[0] for row in conn.execute("""
+            SELECT word_id
+            FROM StudentWords
+            WHERE student_id = ? AND status = 'learning'
+        """, (student_id,))]
+    finally:
+        if own_conn:
+            conn.close()
+    
+    # The catalog sorts by step, level and rank, so SQLite can answer from the index alone
+    entries = get_catalog(db_path).in_pathway_order(word_ids)
+    return [(entry['id'], entry['word'], entry['step'], entry['level']) for entry in entries]
 
-def add_words_to_learning(student_name, word_ids, db_path='pathway.db'):
-    """Add words to student's learning list."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    for word_id in word_ids:
-        cursor.execute("""
-            INSERT OR IGNORE INTO StudentWords (student_name, word_id, status)
+def add_words_to_learning(student_name, word_ids, db_path='pathway.db', conn=None):
+    """Add words to student's learning list (with a connection passed in, the caller commits)."""
+    own_conn = conn is None
+    if own_conn:
+        conn = connect(db_path)
+    
+    try:
+        student_id = get_student_id(conn, student_name, create=True, cached=False)
+        conn.executemany("""
+            INSERT OR IGNORE INTO StudentWords (student_id, word_id, status)
             VALUES (?, ?, 'learning')
-        """, (student_name, word_id))
-    
-    conn.commit()
-    conn.close()
+        """, [(student_id, word_id) for word_id in word_ids])
+        if own_conn:
+            conn.commit()
+    finally:
+        if own_conn:
+            conn.close()
 
-def remove_words_from_learning(student_name, word_ids, db_path='pathway.db'):
-    """Remove words from student's learning list."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    for word_id in word_ids:
-        cursor.execute("""
+def remove_words_from_learning(student_name, word_ids, db_path='pathway.db', conn=None):
+    """Remove words from student's learning list (with a connection passed in, the caller commits)."""
+    own_conn = conn is None
+    if own_conn:
+        conn = connect(db_path)
+    
+    try:
+        student_id = get_student_id(conn, student_name, cached=False)
+        conn.executemany("""
             DELETE FROM StudentWords
-            WHERE student_name = ? AND word_id = ?
-        """, (student_name, word_id))
-    
-    conn.commit()
-    conn.close()
+            WHERE student_id = ? AND word_id = ?
+        """, [(student_id, word_id) for word_id in word_ids])
+        if own_conn:
+            conn.commit()
+    finally:
+        if own_conn:
+            conn.close()
 
 def get_word_by_text(word_text, db_path='pathway.db'):
     """Get word ID by its text."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT id FROM Words WHERE word = ?", (word_text,))
-    result = cursor.fetchone()
-    conn.close()
-    
-    return result[0] if result else None
+    return get_catalog(db_path).word_id(word_text)
 
 def list_all_words(db_path='pathway.db'):
     """List all words in the database with their IDs."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT id, word, step, level FROM Words ORDER BY step, level, rank")
-    words = cursor.fetchall()
-    conn.close()
+    catalog = get_catalog(db_path)
     
-    return words
+    # The catalog is already in step, level and rank order
+    return [(catalog.ids[i], catalog.words[i], catalog.steps[i], catalog.levels[i]) for i in range(len(catalog))]
 
 def format_words_list(words):
     """Format the words list for display."""
@@ -107,12 +111,14 @@ def interactive_mode(student_name, db_path='pathway.db'):
             if action.lower() == 'search':
                 search_term = input("Enter search term: ").strip()
                 if search_term:
-                    conn = sqlite3.connect(db_path)
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT id, word, step, level FROM Words WHERE word LIKE ? ORDER BY word", (f"%{search_term}%",))
-                    results = cursor.fetchall()
+                    conn = connect(db_path)
+                    found = search_words(conn, search_term, limit=50)
                     conn.close()
                     
+                    # Only regular words can go on the learning list from here; best matches first
+                    results = [(match['id'], match['word'], match['step'], match['level'])
+                               for match in found['results'] if match['type'] == 'word']
+                    
                     if results:
                         print("\nSearch results:")
                         print(format_words_list(results))
@@ -1,24 +1,34 @@
 import sqlite3
 import argparse
 
+from update_students import migrate_student_names
+from data_versions import create_data_version_triggers
+from change_log import create_change_log
+
 def update_database_with_student_progress(db_path='pathway.db'):
     """Update the database schema to track student progress (step and level)."""
     conn = sqlite3.connect(db_path)
+    
+    # Convert databases created before the Students table existed
+    migrate_student_names(conn)
+    
     cursor = conn.cursor()
     
     # Create a separate table for student progress to track their current position on the pathway
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS StudentProgress (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            student_name TEXT NOT NULL UNIQUE,
+            student_id INTEGER NOT NULL UNIQUE,
             current_step INTEGER NOT NULL DEFAULT 1 CHECK(current_step BETWEEN 1 AND 28),
             current_level INTEGER NOT NULL DEFAULT 1 CHECK(current_level BETWEEN 1 AND 5),
-            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(student_id) REFERENCES Students(id) ON DELETE CASCADE
         )
     """)
     
-    # Create index for performance
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_student_progress_name ON StudentProgress(student_name)")
+    # Progress changes are recorded like the other student tables
+    create_data_version_triggers(cursor)
+    create_change_log(cursor)
     
     conn.commit()
     conn.close()
@@ -0,0 +1,162 @@
+import sqlite3
+import argparse
+
+from update_indexes import create_covering_indexes
+from data_versions import create_data_version_triggers
+from change_log import create_change_log
+from reward_stats import create_reward_rollups
+
+# Tables that used to identify students by a free-text student_name column
+STUDENT_TABLES = ('StudentWords', 'StudentSpecialWords', 'StudentProgress', 'Rewards')
+
+def create_students_table(cursor):
+    """Create the Students identity table."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Students (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def get_columns(cursor, table):
+    """Return the column names of a table (empty if the table does not exist)."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+def create_new_tables(cursor):
+    """Create the student_id-keyed versions of the student tables under temporary names."""
+    cursor.execute("""
+        CREATE TABLE StudentWords_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            word_id INTEGER NOT NULL,
+            status TEXT NOT NULL CHECK(status IN ('learning','mastered')) DEFAULT 'learning',
+            UNIQUE(student_id, word_id),
+            FOREIGN KEY(student_id) REFERENCES Students(id) ON DELETE CASCADE,
+            FOREIGN KEY(word_id) REFERENCES Words(id) ON DELETE CASCADE
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE StudentSpecialWords_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            special_word_id INTEGER NOT NULL,
+            status TEXT NOT NULL CHECK(status IN ('learning','mastered')) DEFAULT 'learning',
+            added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            mastered_date TIMESTAMP NULL,
+            UNIQUE(student_id, special_word_id),
+            FOREIGN KEY(student_id) REFERENCES Students(id) ON DELETE CASCADE,
+            FOREIGN KEY(special_word_id) REFERENCES SpecialWords(id) ON DELETE CASCADE
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE StudentProgress_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL UNIQUE,
+            current_step INTEGER NOT NULL DEFAULT 1 CHECK(current_step BETWEEN 1 AND 28),
+            current_level INTEGER NOT NULL DEFAULT 1 CHECK(current_level BETWEEN 1 AND 5),
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(student_id) REFERENCES Students(id) ON DELETE CASCADE
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE Rewards_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            word_id INTEGER NULL,  -- For regular words
+            special_word_id INTEGER NULL,  -- For special words
+            reward_type TEXT NOT NULL,  -- 'word_mastered', 'special_word_mastered', etc.
+            reward_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            notes TEXT,
+            CHECK ((word_id IS NOT NULL AND special_word_id IS NULL) OR
+                   (word_id IS NULL AND special_word_id IS NOT NULL)),
+            FOREIGN KEY(student_id) REFERENCES Students(id) ON DELETE CASCADE
+        )
+    """)
+
+def create_student_indexes(cursor):
+    """Create the indexes used to look up a student's rows."""
+    create_covering_indexes(cursor)
+
+def migrate_student_names(conn):
+    """Rewrite any table still keyed on student_name to reference Students.id (safe to re-run)."""
+    cursor = conn.cursor()
+    create_students_table(cursor)
+    
+    legacy = [table for table in STUDENT_TABLES if 'student_name' in get_columns(cursor, table)]
+    if not legacy:
+        conn.commit()
+        return []
+    
+    # The whole rewrite happens in one transaction so a failure leaves the old tables intact
+    if not conn.in_transaction:
+        cursor.execute("BEGIN")
+    
+    try:
+        for table in legacy:
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO Students (name)
+                SELECT DISTINCT student_name FROM {table} ORDER BY student_name
+            """)
+        
+        create_new_tables(cursor)
+        
+        copy_columns = {
+            'StudentWords': ['id', 'word_id', 'status'],
+            'StudentSpecialWords': ['id', 'special_word_id', 'status', 'added_date', 'mastered_date'],
+            'StudentProgress': ['id', 'current_step', 'current_level', 'last_updated'],
+            'Rewards': ['id', 'word_id', 'special_word_id', 'reward_type', 'reward_date', 'notes']
+        }
+        
+        for table in STUDENT_TABLES:
+            if table in legacy:
+                columns = copy_columns[table]
+                cursor.execute(f"""
+                    INSERT INTO {table}_new (student_id, {', '.join(columns)})
+                    SELECT s.id, {', '.join('t.' + column for column in columns)}
+                    FROM {table} t
+                    JOIN Students s ON s.name = t.student_name
+                """)
+                cursor.execute(f"DROP TABLE {table}")
+                cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+            else:
+                # Not created yet (e.g. update_db.py has not been run); the setup scripts create it later
+                cursor.execute(f"DROP TABLE {table}_new")
+        
+        create_student_indexes(cursor)
+        # Rebuilding the tables dropped their triggers
+        create_data_version_triggers(cursor)
+        create_change_log(cursor)
+        create_reward_rollups(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    
+    return legacy
+
+def update_database_with_students(db_path='pathway.db'):
+    """Add the Students table and convert the student tables to integer student ids."""
+    conn = sqlite3.connect(db_path)
+    migrated = migrate_student_names(conn)
+    conn.close()
+    return migrated
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate Pathway student tables to integer student ids')
+    parser.add_argument('--db', default='pathway.db', help='Path to database file')
+    args = parser.parse_args()
+    
+    migrated = update_database_with_students(args.db)
+    
+    if migrated:
+        print(f"Migrated {', '.join(migrated)} to the Students table.")
+    else:
+        print("Database already uses the Students table.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+import queue
+import sqlite3
+import threading
+import time
+
+from db import configure_connection
+from metrics import add_sql, count_sql
+
+MAX_BATCH = 64  # Writes committed together at most
+MAX_DELAY = 0.002  # Seconds to wait for more writes after the first one arrives
+WRITE_TIMEOUT = 30  # Longest a caller waits for its commit, in seconds
+HOUSEKEEPING_EVERY = 100  # Writes between runs of the housekeeping function
+
+# One commit now covers a whole batch, so it can afford to sync to disk before writes are acknowledged
+SYNCHRONOUS = 'FULL'
+
+class _Write:
+    __slots__ = ('func', 'result', 'error', 'sql', 'done', 'taken', 'cancelled')
+    
+    def __init__(self, func):
+        self.func = func
+        self.result = None
+        self.error = None
+        self.sql = [0, 0.0, 0]  # Statements, seconds and rows of func, handed back to the caller's request
+        self.done = threading.Event()
+        self.taken = False  # Picked up into a batch; from then on it can't be cancelled
+        self.cancelled = False
+
+_STOP = object()
+
+class GroupCommitWriter:
+    """Runs writes on one dedicated thread and connection, committing the writes that arrive together in one transaction.
+    
+    Each write is a function taking a cursor. It must not commit; it runs inside its own savepoint,
+    so a write that raises is rolled back on its own while the rest of its batch still commits.
+    Callers are answered only after the commit covering their write has finished, and the SQL each
+    write ran is added to the metrics of the caller's request.
+    
+    `housekeeping(cursor)`, if given, runs at the end of a batch once every `housekeeping_every` writes,
+    in its own savepoint, so cleanup like trimming a log rides along with a commit that happens anyway.
+    
+    If the writer thread fails (the database can't be opened, or a rollback fails), every waiting
+    write gets the error and the next write starts a new thread.
+    """
+    
+    def __init__(self, db_path, factory=sqlite3.Connection, max_batch=MAX_BATCH, max_delay=MAX_DELAY, observe=None,
+                 housekeeping=None, housekeeping_every=HOUSEKEEPING_EVERY):
+        self.db_path = db_path
+        self.factory = factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        # observe(batch_size, commit_seconds, failed_writes) is called after every batch
+        self.observe = observe
+        self.housekeeping = housekeeping
+        self.housekeeping_every = housekeeping_every
+        self._since_housekeeping = 0  # Only touched by the writer thread
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._batches = 0
+        self._writes = 0
+        self._failed = 0
+        self._largest_batch = 0
+        self._commit_seconds = 0.0
+    
+    def execute(self, func, timeout=WRITE_TIMEOUT):
+        """Run func(cursor) in the next group commit and return its result once the commit is durable.
+        
+        A write still queued when `timeout` runs out is cancelled and never runs. One that was already
+        picked up into a batch can't be cancelled, and may still be committed after TimeoutError is raised.
+        """
+        write = _Write(func)
+        with self._lock:
+            # Started on first use (and after a failure), so a server that forks workers starts one writer in each of them
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='group-commit-writer', daemon=True)
+                self._thread.start()
+            # Queued under the lock, so a failing thread either fails this write or leaves it to the next thread
+            self._queue.put(write)
+        
+        if not write.done.wait(timeout):
+            with self._lock:
+                write.cancelled = not write.taken
+            if write.cancelled:
+                raise TimeoutError(f"Write was not started within {timeout} seconds and was cancelled")
+            raise TimeoutError(f"Write was not committed within {timeout} seconds (it may still be committed)")
+        add_sql(write.sql)
+        if write.error is not None:
+            raise write.error
+        return write.result
+    
+    def _take(self, write):
+        # False for a write whose caller already gave up waiting
+        with self._lock:
+            if write.cancelled:
+                return False
+            write.taken = True
+            return True
+    
+    def _open(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        configure_connection(conn)
+        conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+        # Transactions are started and ended explicitly below
+        conn.isolation_level = None
+        return conn
+    
+    def _next_batch(self, first):
+        batch = [first] if self._take(first) else []
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                write = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if write is _STOP:
+                # Finish this batch first; the stop is seen on the next turn
+                self._queue.put(_STOP)
+                break
+            if self._take(write):
+                batch.append(write)
+        return batch
+    
+    def _run(self):
+        batch = []
+        conn = None
+        try:
+            conn = self._open()
+            while True:
+                first = self._queue.get()
+                if first is _STOP:
+                    return
+                batch = self._next_batch(first)
+                if batch:
+                    self._commit(conn, batch)
+                batch = []
+        except Exception as error:
+            self._fail(batch, error)
+        finally:
+            if conn is not None:
+                conn.close()
+    
+    def _fail(self, batch, error):
+        # This thread is finished: answer everything it was holding, and let the next write start a new thread
+        with self._lock:
+            self._thread = None
+            pending = [write for write in batch if not write.done.is_set()]
+            while True:
+                try:
+                    write = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if write is not _STOP:
+                    pending.append(write)
+        
+        for write in pending:
+            write.result = None
+            write.error = error
+            write.done.set()
+    
+    def _commit(self, conn, batch):
+        cursor = conn.cursor()
+        failed = 0
+        try:
+            # IMMEDIATE takes the write lock up front (waiting up to the busy timeout) instead of failing mid-batch
+            cursor.execute("BEGIN IMMEDIATE")
+            for write in batch:
+                cursor.execute("SAVEPOINT write")
+                count_sql(write.sql)
+                try:
+                    write.result = write.func(cursor)
+                except Exception as error:
+                    write.error = error
+                    failed += 1
+                finally:
+                    count_sql(None)
+                if write.error is not None:
+                    cursor.execute("ROLLBACK TO write")
+                cursor.execute("RELEASE write")
+            self._housekeep(cursor, len(batch))
+            
+            start = time.perf_counter()
+            cursor.execute("COMMIT")
+            commit_seconds = time.perf_counter() - start
+        except Exception as error:
+            # Nothing in the batch was committed, so every caller gets the error. A failing rollback
+            # leaves the connection unusable and is raised to _run, which fails the batch and stops
+            if conn.in_transaction:
+                conn.rollback()
+            for write in batch:
+                write.result = None
+                write.error = error
+            failed = len(batch)
+            commit_seconds = 0.0
+        
+        with self._lock:
+            self._batches += 1
+            self._writes += len(batch)
+            self._failed += failed
+            self._largest_batch = max(self._largest_batch, len(batch))
+            self._commit_seconds += commit_seconds
+        for write in batch:
+            write.done.set()
+        
+        if self.observe is not None:
+            self.observe(len(batch), commit_seconds, failed)
+    
+    def _housekeep(self, cursor, writes):
+        if self.housekeeping is None:
+            return
+        self._since_housekeeping += writes
+        if self._since_housekeeping < self.housekeeping_every:
+            return
+        
+        cursor.execute("SAVEPOINT housekeeping")
+        try:
+            self.housekeeping(cursor)
+            self._since_housekeeping = 0
+        except Exception:
+            # Not worth failing the batch over; it is tried again with the next batch
+            cursor.execute("ROLLBACK TO housekeeping")
+        cursor.execute("RELEASE housekeeping")
+    
+    def reset(self):
+        """Forget the writer thread inherited from a parent process (call in a forked child)."""
+        with self._lock:
+            self._queue = queue.Queue()
+            self._thread = None
+    
+    def close(self):
+        """Commit what is queued, then stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+            with self._lock:
+                self._thread = None
+    
+    def stats(self):
+        """Return batch and commit counters."""
+        with self._lock:
+            return {
+                'batches': self._batches,
+                'writes': self._writes,
+                'failed': self._failed,
+                'queued': self._queue.qsize(),
+                'largest_batch': self._largest_batch,
+                'average_batch': round(self._writes / self._batches, 2) if self._batches else 0,
+                'average_commit_ms': round(self._commit_seconds * 1000 / self._batches, 3) if self._batches else 0
+            }